@@ -4,6 +4,7 @@
 
 # Connected Mobility Solution on AWS
 from .auth_configs import (
+    get_auth_configs,
     get_idp_config,
     get_service_client_config,
     get_user_client_config,
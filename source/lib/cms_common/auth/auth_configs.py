@@ -6,17 +6,17 @@
 import json
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import TYPE_CHECKING, List, Optional, Union, overload
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union, cast, overload
 
 # Third Party Libraries
 from cattrs import ClassValidationError, structure
 
 # AWS Libraries
-import boto3
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Connected Mobility Solution on AWS
+from ..boto3_wrappers.client_pool import get_client
+from ..cache.ttl_cache import config_ttl_cache
 from ..resource_names.auth import AuthSetupResourceNames
 
 if TYPE_CHECKING:
@@ -60,24 +60,25 @@ class CMSClientConfig:
     audience: Optional[str] = None
 
 
-MAX_CACHE_SIZE_BOTO_CLIENT = 10
+@dataclass(frozen=True)
+class CMSAuthConfigs:
+    idp_config: Optional[CMSIdPConfig] = None
+    service_client_config: Optional[CMSClientConfig] = None
+    user_client_config: Optional[CMSClientConfig] = None
+
+
 MAX_CACHE_SIZE_AUTH_CONFIG = 100
 
 
-@lru_cache(maxsize=MAX_CACHE_SIZE_BOTO_CLIENT)
 def _get_secrets_manager_client(user_agent_string: str) -> SecretsManagerClient:
-    return boto3.client(
-        "secretsmanager",
-        config=Config(user_agent_extra=user_agent_string),
+    return cast(
+        SecretsManagerClient,
+        get_client("secretsmanager", user_agent_string=user_agent_string),
     )
 
 
-@lru_cache(maxsize=MAX_CACHE_SIZE_BOTO_CLIENT)
 def _get_ssm_client(user_agent_string: str) -> SSMClient:
-    return boto3.client(
-        "ssm",
-        config=Config(user_agent_extra=user_agent_string),
-    )
+    return cast(SSMClient, get_client("ssm", user_agent_string=user_agent_string))
 
 
 @lru_cache(maxsize=MAX_CACHE_SIZE_AUTH_CONFIG)
@@ -129,6 +130,54 @@ def get_user_client_config(
     )
 
 
+# Resolves every requested config for an identity provider with one SSM GetParameters call and one
+# Secrets Manager BatchGetSecretValue call, instead of two sequential calls per config.
+@config_ttl_cache(maxsize=MAX_CACHE_SIZE_AUTH_CONFIG)
+def get_auth_configs(
+    user_agent_string: str,
+    identity_provider_id: str,
+    include_idp_config: bool = True,
+    include_service_client_config: bool = False,
+    include_user_client_config: bool = False,
+) -> CMSAuthConfigs:
+    auth_setup_resource_names = _get_auth_setup_resource_names(identity_provider_id)
+    requested_configs: Dict[
+        str, Tuple[str, Union[type[CMSIdPConfig], type[CMSClientConfig]]]
+    ] = {}
+    if include_idp_config:
+        requested_configs["idp_config"] = (
+            auth_setup_resource_names.idp_config_secret_arn_ssm_parameter,
+            CMSIdPConfig,
+        )
+    if include_service_client_config:
+        requested_configs["service_client_config"] = (
+            auth_setup_resource_names.service_client_config_secret_arn_ssm_parameter,
+            CMSClientConfig,
+        )
+    if include_user_client_config:
+        requested_configs["user_client_config"] = (
+            auth_setup_resource_names.user_client_config_secret_arn_ssm_parameter,
+            CMSClientConfig,
+        )
+
+    if not requested_configs:
+        return CMSAuthConfigs()
+
+    configs = _get_configs(
+        user_agent_string=user_agent_string,
+        requested_configs=requested_configs,
+    )
+    return CMSAuthConfigs(
+        idp_config=cast(Optional[CMSIdPConfig], configs.get("idp_config")),
+        service_client_config=cast(
+            Optional[CMSClientConfig], configs.get("service_client_config")
+        ),
+        user_client_config=cast(
+            Optional[CMSClientConfig], configs.get("user_client_config")
+        ),
+    )
+
+
 # Overloads necessary for mypy
 @overload
 def _get_config(
@@ -162,27 +211,84 @@ def _get_config(
         config_secret_value = _get_secrets_manager_client(
             user_agent_string
         ).get_secret_value(SecretId=config_secret_arn)["SecretString"]
+    except ClientError as e:
+        raise AuthConfigError(
+            "Auth Config Error: client error while retrieving the secret or ssm parameter from the AWS account."
+        ) from e
+    except KeyError as e:
+        raise AuthConfigError(
+            "Auth Config Error: unexpected response from Secrets Manager get_secret_value. Missing expected 'SecretString' key."
+        ) from e
+    return _parse_config(config_secret_value, config_dataclass_type)
 
-        config_object = json.loads(config_secret_value)
 
-        try:
-            config_dataclass: Union[CMSIdPConfig, CMSClientConfig] = structure(
-                obj=config_object, cl=config_dataclass_type
+def _get_configs(
+    user_agent_string: str,
+    requested_configs: Dict[
+        str, Tuple[str, Union[type[CMSIdPConfig], type[CMSClientConfig]]]
+    ],
+) -> Dict[str, Union[CMSIdPConfig, CMSClientConfig]]:
+    ssm_names = [ssm_name for ssm_name, _ in requested_configs.values()]
+    try:
+        get_parameters_response = _get_ssm_client(user_agent_string).get_parameters(
+            Names=ssm_names
+        )
+        if get_parameters_response["InvalidParameters"]:
+            raise AuthConfigError(
+                f"Auth Config Error: ssm parameters not found: {get_parameters_response['InvalidParameters']}."
             )
-        except ClassValidationError as e:
+        config_secret_arns = {
+            parameter["Name"]: parameter["Value"]
+            for parameter in get_parameters_response["Parameters"]
+        }
+
+        batch_get_secret_value_response = _get_secrets_manager_client(
+            user_agent_string
+        ).batch_get_secret_value(SecretIdList=list(set(config_secret_arns.values())))
+        if batch_get_secret_value_response["Errors"]:
             raise AuthConfigError(
-                "Auth Config Error: error while converting the auth config into the expected data format. Ensure your secret value matches the expected format."
-            ) from e
-    except json.JSONDecodeError as e:
-        raise AuthConfigError(
-            "Auth Config Error: JSON error while decoding the auth config secret."
-        ) from e
+                f"Auth Config Error: could not retrieve secrets: {[error['SecretId'] for error in batch_get_secret_value_response['Errors']]}."
+            )
+        # The SSM parameter may hold either the full or the partial secret ARN, so index by both
+        config_secret_values: Dict[str, str] = {}
+        for secret_value in batch_get_secret_value_response["SecretValues"]:
+            config_secret_values[secret_value["ARN"]] = secret_value["SecretString"]
+            config_secret_values[secret_value["Name"]] = secret_value["SecretString"]
+
+        return {
+            config_name: _parse_config(
+                config_secret_values[config_secret_arns[ssm_name]],
+                config_dataclass_type,
+            )
+            for config_name, (
+                ssm_name,
+                config_dataclass_type,
+            ) in requested_configs.items()
+        }
     except ClientError as e:
         raise AuthConfigError(
             "Auth Config Error: client error while retrieving the secret or ssm parameter from the AWS account."
         ) from e
     except KeyError as e:
         raise AuthConfigError(
-            "Auth Config Error: unexpected response from Secrets Manager get_secret_value. Missing expected 'SecretString' key."
+            "Auth Config Error: unexpected response from Secrets Manager batch_get_secret_value. Missing expected secret or 'SecretString' key."
+        ) from e
+
+
+def _parse_config(
+    config_secret_value: str,
+    config_dataclass_type: Union[type[CMSIdPConfig], type[CMSClientConfig]],
+) -> Union[CMSIdPConfig, CMSClientConfig]:
+    try:
+        config_dataclass: Union[CMSIdPConfig, CMSClientConfig] = structure(
+            obj=json.loads(config_secret_value), cl=config_dataclass_type
+        )
+    except json.JSONDecodeError as e:
+        raise AuthConfigError(
+            "Auth Config Error: JSON error while decoding the auth config secret."
+        ) from e
+    except ClassValidationError as e:
+        raise AuthConfigError(
+            "Auth Config Error: error while converting the auth config into the expected data format. Ensure your secret value matches the expected format."
         ) from e
     return config_dataclass
@@ -10,10 +10,14 @@ import pytest
 from moto import mock_aws
 
 # Connected Mobility Solution on AWS
+from ...boto3_wrappers.client_pool import get_client
 from ..auth_configs import (
     AuthConfigError,
     CMSClientConfig,
     CMSIdPConfig,
+    _get_secrets_manager_client,
+    _get_ssm_client,
+    get_auth_configs,
     get_idp_config,
     get_service_client_config,
     get_user_client_config,
@@ -21,6 +25,15 @@ from ..auth_configs import (
 from .fixture_auth import TEST_IDENTITY_PROVIDER_ID, TEST_USER_AGENT_STRING
 
 
+def test_auth_config_clients_are_pooled() -> None:
+    assert _get_ssm_client(TEST_USER_AGENT_STRING) is get_client(
+        "ssm", user_agent_string=TEST_USER_AGENT_STRING
+    )
+    assert _get_secrets_manager_client(TEST_USER_AGENT_STRING) is get_client(
+        "secretsmanager", user_agent_string=TEST_USER_AGENT_STRING
+    )
+
+
 @mock_aws
 def test_get_idp_config_success(
     idp_config_secret_string_valid: Dict[str, str | List[str]],
@@ -122,3 +135,57 @@ def test_get_user_client_config_success(
         user_client_config.client_secret
         == user_client_config_secret_string_valid["client_secret"]
     )
+
+
+@mock_aws
+def test_get_auth_configs_success(
+    idp_config_secret_string_valid: Dict[str, str | List[str]],
+    service_client_config_secret_string_valid: dict[str, str | Tuple[str, ...]],
+    mock_idp_config_valid: Callable[[], None],
+    mock_service_client_config_valid: Callable[[], None],
+) -> None:
+    mock_idp_config_valid()
+    mock_service_client_config_valid()
+    get_auth_configs.cache_clear()
+
+    auth_configs = get_auth_configs(
+        TEST_USER_AGENT_STRING,
+        TEST_IDENTITY_PROVIDER_ID,
+        include_service_client_config=True,
+    )
+    assert isinstance(auth_configs.idp_config, CMSIdPConfig)
+    assert auth_configs.idp_config.issuer == idp_config_secret_string_valid["issuer"]
+    assert isinstance(auth_configs.service_client_config, CMSClientConfig)
+    assert (
+        auth_configs.service_client_config.client_id
+        == service_client_config_secret_string_valid["client_id"]
+    )
+    assert auth_configs.user_client_config is None
+
+    # Served from the shared TTL cache on the next call
+    assert (
+        get_auth_configs(
+            TEST_USER_AGENT_STRING,
+            TEST_IDENTITY_PROVIDER_ID,
+            include_service_client_config=True,
+        )
+        is auth_configs
+    )
+
+
+@mock_aws
+def test_get_auth_configs_missing_parameter(
+    mock_idp_config_valid: Callable[[], None],
+) -> None:
+    mock_idp_config_valid()
+    get_auth_configs.cache_clear()
+
+    with pytest.raises(
+        AuthConfigError,
+        match=r"Auth Config Error: ssm parameters not found",
+    ):
+        get_auth_configs(
+            TEST_USER_AGENT_STRING,
+            TEST_IDENTITY_PROVIDER_ID,
+            include_user_client_config=True,
+        )
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import json
+import os
+from io import BytesIO
+from typing import Any, Dict, Generator
+from unittest.mock import MagicMock, patch
+
+# Third Party Libraries
+import jwt
+import pytest
+
+# AWS Libraries
+from botocore.response import StreamingBody
+
+# Connected Mobility Solution on AWS
+from ...boto3_wrappers.client_pool import clear_clients
+from .. import token_validation
+from ..token_validation import (
+    DENIED_AUTHORIZER_RESULT_TTL_IN_SECONDS,
+    TOKEN_VALIDATION_MODE_ENV_VAR,
+    TokenClaimsError,
+    TokenValidationMode,
+    TokenValidationResult,
+    get_authorizer_result_ttl_in_seconds,
+    get_resolver_context,
+    get_token_validation_mode,
+    validate_token_from_environment,
+    verify_claims,
+)
+from .fixture_auth import TEST_IDENTITY_PROVIDER_ID, TEST_USER_AGENT_STRING
+
+TEST_TOKEN_VALIDATION_LAMBDA_ARN = (
+    "arn:aws:lambda:us-east-1:111111111111:function:token-validation"
+)
+
+
+@pytest.fixture(name="token_validation_env")
+def fixture_token_validation_env() -> Generator[Dict[str, str], None, None]:
+    env = {
+        "USER_AGENT_STRING": TEST_USER_AGENT_STRING,
+        "IDENTITY_PROVIDER_ID": TEST_IDENTITY_PROVIDER_ID,
+        "TOKEN_VALIDATION_LAMBDA_ARN": TEST_TOKEN_VALIDATION_LAMBDA_ARN,
+    }
+    with patch.dict(os.environ, env):
+        os.environ.pop(TOKEN_VALIDATION_MODE_ENV_VAR, None)
+        clear_clients()
+        yield env
+    clear_clients()
+
+
+def mock_invoke(payload: Dict[str, Any]) -> MagicMock:
+    encoded_payload = json.dumps(payload).encode()
+    return MagicMock(
+        return_value={
+            "Payload": StreamingBody(BytesIO(encoded_payload), len(encoded_payload))
+        }
+    )
+
+
+def test_get_token_validation_mode(token_validation_env: Dict[str, str]) -> None:
+    assert get_token_validation_mode() is TokenValidationMode.IN_PROCESS
+
+    with patch.dict(os.environ, {TOKEN_VALIDATION_MODE_ENV_VAR: "remote"}):
+        assert get_token_validation_mode() is TokenValidationMode.REMOTE
+
+    os.environ.pop("IDENTITY_PROVIDER_ID")
+    assert get_token_validation_mode() is TokenValidationMode.REMOTE
+
+
+def test_validate_token_from_environment_in_process(
+    token_validation_env: Dict[str, str],
+) -> None:
+    result = TokenValidationResult(validated=False, status_code=401, message="Rejected")
+    with patch.object(
+        token_validation, "validate_token", return_value=result
+    ) as mock_validate_token, patch(
+        "botocore.client.BaseClient._make_api_call"
+    ) as mock_make_api_call:
+        assert validate_token_from_environment("token", specified_aud="aud") == result
+
+    mock_validate_token.assert_called_once_with(
+        token="token",
+        user_agent_string=TEST_USER_AGENT_STRING,
+        identity_provider_id=TEST_IDENTITY_PROVIDER_ID,
+        specified_aud="aud",
+    )
+    mock_make_api_call.assert_not_called()
+
+
+def test_validate_token_from_environment_falls_back_to_remote(
+    token_validation_env: Dict[str, str],
+) -> None:
+    result = TokenValidationResult(
+        validated=False, status_code=500, message="IdP config unavailable"
+    )
+    make_api_call = mock_invoke(
+        {"validated": True, "status_code": 200, "message": "Remote success"}
+    )
+    with patch.object(token_validation, "validate_token", return_value=result), patch(
+        "botocore.client.BaseClient._make_api_call", make_api_call
+    ):
+        remote_result = validate_token_from_environment("token")
+
+    assert remote_result == TokenValidationResult(
+        validated=True, status_code=200, message="Remote success"
+    )
+    operation_name, kwargs = make_api_call.call_args.args
+    assert operation_name == "Invoke"
+    assert kwargs["FunctionName"] == TEST_TOKEN_VALIDATION_LAMBDA_ARN
+    assert json.loads(kwargs["Payload"]) == {"Token": "token"}
+
+
+@pytest.mark.parametrize(
+    "result, expected_ttl",
+    [
+        (TokenValidationResult(True, 200, "ok", claims={"exp": 1120}), 120),
+        (TokenValidationResult(True, 200, "ok", claims={"exp": 9000}), 900),
+        (TokenValidationResult(True, 200, "ok", claims={"exp": 900}), 0),
+        (TokenValidationResult(True, 200, "ok"), 0),
+        (
+            TokenValidationResult(False, 401, "denied"),
+            DENIED_AUTHORIZER_RESULT_TTL_IN_SECONDS,
+        ),
+        (TokenValidationResult(False, 500, "error"), 0),
+    ],
+)
+def test_get_authorizer_result_ttl_in_seconds(
+    result: TokenValidationResult, expected_ttl: int
+) -> None:
+    with patch("time.time", return_value=1000):
+        assert (
+            get_authorizer_result_ttl_in_seconds(result, max_ttl_in_seconds=900)
+            == expected_ttl
+        )
+
+
+def test_get_resolver_context() -> None:
+    result = TokenValidationResult(
+        True,
+        200,
+        "ok",
+        claims={"sub": "user-id", "scope": "read write", "exp": 1120, "iat": 1000},
+    )
+    assert get_resolver_context(result) == {"sub": "user-id", "scope": "read write"}
+
+
+def test_verify_claims_rejects_unexpected_algorithm() -> None:
+    token = jwt.encode(
+        {"iss": "TEST_ISSUER"},
+        key="shared-secret-of-at-least-thirty-two-bytes",
+        algorithm="HS256",
+        headers={"kid": "test-kid"},
+    )
+    with pytest.raises(TokenClaimsError, match="token is invalid"):
+        verify_claims(token, "public-key", issuer="TEST_ISSUER", audience=None)
@@ -0,0 +1,635 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import _lru_cache_wrapper, lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union, cast
+
+# Third Party Libraries
+import jwt
+import requests
+
+# AWS Libraries
+from aws_lambda_powertools import Logger, Tracer
+
+# Connected Mobility Solution on AWS
+from ..boto3_wrappers.client_pool import get_client
+from ..cache.token_cache import TokenCache
+from ..cache.ttl_cache import TTLCache, config_ttl_cache, ttl_cache
+from .auth_configs import AuthConfigError, CMSIdPConfig, get_idp_config
+
+if TYPE_CHECKING:
+    # Third Party Libraries
+    from mypy_boto3_lambda import LambdaClient
+else:
+    LambdaClient = object
+
+tracer = Tracer()
+logger = Logger()
+
+MAX_CACHE_SIZE_CONFIG = 1
+MAX_CACHE_SIZE_TOKENS = 1024
+
+# The JWKS index is refreshed in the background once its TTL is reached. A token signed
+# with an unknown kid forces a refetch, at most once per interval, to pick up key rotation.
+JWKS_TTL_IN_SECONDS = 3600
+JWKS_STALE_WHILE_REVALIDATE_IN_SECONDS = 600
+MIN_SECONDS_BETWEEN_JWKS_REFETCHES = 30
+
+# Rejected tokens are remembered by digest so repeated junk does not reach the IdP config,
+# JWKS or RSA verification. Rejections that could be caused by a stale IdP config reload it,
+# at most once per interval.
+MAX_CACHE_SIZE_REJECTED_TOKENS = 1024
+REJECTED_TOKEN_TTL_IN_SECONDS = 60
+MIN_SECONDS_BETWEEN_IDP_CONFIG_REFETCHES = 30
+
+TOKEN_VALIDATION_MODE_ENV_VAR = "TOKEN_VALIDATION_MODE"
+VALIDATION_FAILURE_MESSAGE = "Could not validate token. See status code."
+VALIDATION_SUCCESS_MESSAGE = "Token validation successful!"
+
+# Authorizer results can be cached until the token expires, within the limit set by policy.
+# AppSync caches a Lambda authorizer result for at most an hour.
+MAX_AUTHORIZER_RESULT_TTL_IN_SECONDS = 3600
+DENIED_AUTHORIZER_RESULT_TTL_IN_SECONDS = 10
+RESOLVER_CONTEXT_CLAIMS = ("sub", "username", "client_id", "scope")
+
+
+class TokenDecodeError(Exception):
+    def __init__(self, message: str = "Token could not be decoded.", code: int = 401):
+        self.message = message
+        self.code = code
+
+
+class TokenClaimsError(Exception):
+    def __init__(self, message: str = "Token signature is invalid.", code: int = 401):
+        self.message = message
+        self.code = code
+
+
+class ExpirationError(Exception):
+    def __init__(self, message: str = "Token expiration is invalid.", code: int = 401):
+        self.message = message
+        self.code = code
+
+
+class IdPAudError(Exception):
+    def __init__(
+        self,
+        message: str = "Token aud is invalid.",
+        code: int = 401,
+    ):
+        self.message = message
+        self.code = code
+
+
+class ScopeError(Exception):
+    def __init__(self, message: str = "Token scope is invalid.", code: int = 401):
+        self.message = message
+        self.code = code
+
+
+class WellKnownJWKError(Exception):
+    def __init__(self, message: str = "Could not retrieve JWKs.", code: int = 500):
+        self.message = message
+        self.code = code
+
+
+class SigningKidError(Exception):
+    def __init__(
+        self,
+        message: str = "Token kid which signed this token is invalid.",
+        code: int = 401,
+    ):
+        self.message = message
+        self.code = code
+
+
+TOKEN_ERRORS = (
+    TokenDecodeError,
+    TokenClaimsError,
+    SigningKidError,
+    ExpirationError,
+    ScopeError,
+    IdPAudError,
+)
+IDP_CONFIG_IMPLICATED_TOKEN_ERRORS = (TokenClaimsError, ScopeError, IdPAudError)
+
+
+class TokenValidationMode(Enum):
+    """Where authorizers validate tokens"""
+
+    IN_PROCESS = "in-process"
+    REMOTE = "remote"
+
+
+@dataclass(frozen=True)
+class TokenValidationResult:
+    validated: bool
+    status_code: int
+    message: str
+    # Only set for validated tokens
+    claims: Dict[str, Any] = field(default_factory=dict)
+
+
+VerifiedTokenKey = Tuple[str, CMSIdPConfig, bool, Optional[str]]
+
+verified_tokens: TokenCache[bool] = TokenCache(MAX_CACHE_SIZE_TOKENS)
+rejected_tokens: TokenCache[int] = TokenCache(MAX_CACHE_SIZE_REJECTED_TOKENS)
+_last_jwks_refetch: Dict[str, float] = {}
+_last_idp_config_refetch: Dict[str, float] = {}
+
+
+# Usage:
+#   Validates any OAuth 2.0 compliant IdP access token, both CMS user and service access tokens, in the calling process.
+#   It requires a secret with IdP configurations, see cms_common.auth.auth_configs for the JSON data structures.
+#   The caches below live for the lifetime of the execution environment, so every warm Lambda that imports this
+#   module, e.g. the token validation Lambda or an API authorizer, keeps its own warm copy.
+#
+# Caching:
+#   For each unique token digest and idp_config combination, the entire verification will be cached until the token's exp.
+#   1024 unique tokens can be cached. Rejected token digests are cached for a minute, and a rejection never clears the other caches.
+#   A TTL of 10 minutes is applied to any cache which gets resources from the AWS account that might change without invalidating the cache.
+#   The issuer JWKS is cached as an index of kid to parsed public key, so verifying a new token costs a single signature check.
+def validate_token(
+    token: str,
+    user_agent_string: str,
+    identity_provider_id: str,
+    specified_aud: Optional[str] = None,
+) -> TokenValidationResult:
+    # Validation steps
+    # 1. Get IdP Config (cached)
+    # 2. Not expired
+    # 3. Verify Token (cached):
+    #   - The signing token was from a known KID
+    #   - Valid, non-malformed signature
+    #   - Known iss and aud (if present)
+    #   - At least 1 known scope
+    token_digest = get_token_digest(token)
+    rejected_token_key = (token_digest, specified_aud)
+    rejected_status_code = rejected_tokens.get(rejected_token_key)
+    if rejected_status_code is not None:
+        logger.info("Token was recently rejected, skipping validation.")
+        return TokenValidationResult(
+            validated=False,
+            status_code=rejected_status_code,
+            message=VALIDATION_FAILURE_MESSAGE,
+        )
+
+    try:
+        idp_config = get_cached_idp_config(
+            user_agent_string=user_agent_string,
+            identity_provider_id=identity_provider_id,
+        )
+
+        token_claims = get_cached_token_claims(token)  # Doesn't perform verification
+
+        verify_expiration(
+            token_claims
+        )  # Verify expiration explicitly to allow for caching the other claim verifications via `verify_token`.
+
+        verify_using_alternate_aud = token_claims.get("aud") is None
+        if verify_using_alternate_aud and idp_config.alternate_aud_key is None:
+            raise IdPAudError(
+                "Token does not have aud key, and no alternate aud key is specified."
+            )
+
+        validated = verify_and_cache_token(
+            token=token,
+            token_digest=token_digest,
+            token_claims=token_claims,
+            idp_config=idp_config,
+            verify_using_alternate_aud=verify_using_alternate_aud,
+            specified_aud=specified_aud,
+        )
+    except TOKEN_ERRORS as e:
+        logger.error(
+            e.message,
+            exc_info=True,
+        )
+        rejected_tokens.put(
+            rejected_token_key,
+            e.code,
+            expires_at=time.time() + REJECTED_TOKEN_TTL_IN_SECONDS,
+        )
+        if isinstance(e, IDP_CONFIG_IMPLICATED_TOKEN_ERRORS):
+            refetch_idp_config_if_allowed(
+                user_agent_string=user_agent_string,
+                identity_provider_id=identity_provider_id,
+            )
+        return TokenValidationResult(
+            validated=False, status_code=e.code, message=VALIDATION_FAILURE_MESSAGE
+        )
+    except (AuthConfigError, WellKnownJWKError) as e:
+        # Not the token's fault, so nothing is invalidated. Config errors are negatively cached
+        # for a few seconds and the JWKS index keeps serving stale keys while it refreshes.
+        logger.error(
+            e.message,
+            exc_info=True,
+        )
+        return TokenValidationResult(
+            validated=False, status_code=e.code, message=VALIDATION_FAILURE_MESSAGE
+        )
+
+    logger.info(VALIDATION_SUCCESS_MESSAGE)
+    return TokenValidationResult(
+        validated=validated,
+        status_code=200,
+        message=VALIDATION_SUCCESS_MESSAGE,
+        claims=token_claims,
+    )
+
+
+@tracer.capture_method
+def invoke_token_validation_lambda(
+    token: str,
+    token_validation_lambda_arn: str,
+    user_agent_string: Optional[str] = None,
+    specified_aud: Optional[str] = None,
+) -> TokenValidationResult:
+    # Raises ClientError, KeyError or ValueError if the Lambda could not be invoked or answered unexpectedly
+    payload: Dict[str, Any] = {"Token": token}
+    if specified_aud is not None:
+        payload["SpecifiedAud"] = specified_aud
+
+    lambda_client = cast(
+        LambdaClient, get_client("lambda", user_agent_string=user_agent_string)
+    )
+    token_validation_response = lambda_client.invoke(
+        FunctionName=token_validation_lambda_arn,
+        InvocationType="RequestResponse",
+        Payload=json.dumps(payload),
+    )
+    token_validation_response_payload = json.loads(
+        token_validation_response["Payload"].read().decode("utf-8")
+    )
+
+    return TokenValidationResult(
+        validated=token_validation_response_payload["validated"],
+        status_code=token_validation_response_payload.get("status_code") or 500,
+        message=token_validation_response_payload["message"],
+        claims=token_validation_response_payload.get("claims") or {},
+    )
+
+
+def get_token_validation_mode() -> TokenValidationMode:
+    # Defaults to in-process validation whenever the IdP to validate against is known
+    mode = os.environ.get(TOKEN_VALIDATION_MODE_ENV_VAR)
+    if mode is not None:
+        return TokenValidationMode(mode)
+    if "IDENTITY_PROVIDER_ID" in os.environ:
+        return TokenValidationMode.IN_PROCESS
+    return TokenValidationMode.REMOTE
+
+
+def validate_token_from_environment(
+    token: str, specified_aud: Optional[str] = None
+) -> TokenValidationResult:
+    """
+    Validate a token using the mode configured in the Lambda environment.
+
+    In-process validation needs IDENTITY_PROVIDER_ID. Remote validation invokes
+    the Lambda at TOKEN_VALIDATION_LAMBDA_ARN, which is also used as a fallback
+    when in-process validation fails for a reason other than the token itself.
+    """
+    user_agent_string = os.environ["USER_AGENT_STRING"]
+
+    if get_token_validation_mode() is TokenValidationMode.IN_PROCESS:
+        result = validate_token(
+            token=token,
+            user_agent_string=user_agent_string,
+            identity_provider_id=os.environ["IDENTITY_PROVIDER_ID"],
+            specified_aud=specified_aud,
+        )
+        if result.status_code < 500 or "TOKEN_VALIDATION_LAMBDA_ARN" not in os.environ:
+            return result
+        logger.warning(
+            "In-process token validation failed, falling back to the token validation Lambda."
+        )
+
+    return invoke_token_validation_lambda(
+        token=token,
+        token_validation_lambda_arn=os.environ["TOKEN_VALIDATION_LAMBDA_ARN"],
+        user_agent_string=user_agent_string,
+        specified_aud=specified_aud,
+    )
+
+
+def get_authorizer_result_ttl_in_seconds(
+    result: TokenValidationResult,
+    max_ttl_in_seconds: int = MAX_AUTHORIZER_RESULT_TTL_IN_SECONDS,
+) -> int:
+    if not result.validated:
+        # Failures that are not the token's fault are not cached, so a recovered IdP config
+        # or JWKS endpoint is picked up by the next request
+        return (
+            DENIED_AUTHORIZER_RESULT_TTL_IN_SECONDS if result.status_code < 500 else 0
+        )
+
+    try:
+        remaining_lifetime_in_seconds = int(float(result.claims["exp"]) - time.time())
+    except (KeyError, TypeError, ValueError):
+        return 0
+    return max(
+        0,
+        min(
+            remaining_lifetime_in_seconds,
+            max_ttl_in_seconds,
+            MAX_AUTHORIZER_RESULT_TTL_IN_SECONDS,
+        ),
+    )
+
+
+def get_resolver_context(result: TokenValidationResult) -> Dict[str, str]:
+    # Resolver context values must be strings
+    return {
+        claim: str(result.claims[claim])
+        for claim in RESOLVER_CONTEXT_CLAIMS
+        if claim in result.claims
+    }
+
+
+def clear_token_validation_caches() -> None:
+    cached_functions: List[Union[_lru_cache_wrapper[Any], TTLCache[Any]]] = [
+        get_cached_idp_config,
+        get_cached_token_claims,
+        get_cached_issuer_jwks,
+    ]
+    for function in cached_functions:
+        function.cache_clear()
+    verified_tokens.clear()
+    rejected_tokens.clear()
+    _last_jwks_refetch.clear()
+    _last_idp_config_refetch.clear()
+
+
+def get_token_digest(token: str) -> str:
+    # Cache keys hold a digest rather than the bearer token itself
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+# ========= GETTERS =========
+@config_ttl_cache(maxsize=MAX_CACHE_SIZE_CONFIG)
+@tracer.capture_method
+def get_cached_idp_config(
+    user_agent_string: str,
+    identity_provider_id: str,
+) -> CMSIdPConfig:
+    return get_idp_config(
+        user_agent_string=user_agent_string,
+        identity_provider_id=identity_provider_id,
+    )
+
+
+@lru_cache(maxsize=MAX_CACHE_SIZE_TOKENS)
+@tracer.capture_method
+def get_cached_token_claims(token: str) -> Dict[str, Any]:
+    try:
+        claims: Dict[str, Any] = jwt.decode(token, options={"verify_signature": False})
+        return claims
+    except jwt.exceptions.DecodeError as e:
+        raise TokenDecodeError("Validation Failure: token could not be decoded.") from e
+
+
+@tracer.capture_method
+def verify_expiration(
+    token_claims: Dict[str, Any],
+) -> None:
+    try:
+        if time.time() > token_claims["exp"]:
+            raise ExpirationError("Validation Failure: token is expired.")
+    except KeyError as e:
+        raise ExpirationError("Validation Failure: token is missing exp key.") from e
+
+
+def refetch_idp_config_if_allowed(
+    user_agent_string: str, identity_provider_id: str
+) -> bool:
+    # A token rejected for its claims may be valid under a rotated IdP config. Reload it, rate
+    # limited, and forget earlier rejections only if it actually changed.
+    now = time.monotonic()
+    last_refetch = _last_idp_config_refetch.get(identity_provider_id)
+    if (
+        last_refetch is not None
+        and now - last_refetch < MIN_SECONDS_BETWEEN_IDP_CONFIG_REFETCHES
+    ):
+        return False
+    _last_idp_config_refetch[identity_provider_id] = now
+
+    config_kwargs = {
+        "user_agent_string": user_agent_string,
+        "identity_provider_id": identity_provider_id,
+    }
+    try:
+        previous_idp_config = get_cached_idp_config(**config_kwargs)
+        get_cached_idp_config.cache_invalidate(**config_kwargs)
+        if get_cached_idp_config(**config_kwargs) != previous_idp_config:
+            rejected_tokens.clear()
+    except AuthConfigError:
+        logger.warning("Could not refetch the IdP config.", exc_info=True)
+    return True
+
+
+@tracer.capture_method
+def verify_and_cache_token(
+    token: str,
+    token_digest: str,
+    token_claims: Dict[str, Any],
+    idp_config: CMSIdPConfig,
+    verify_using_alternate_aud: bool,
+    specified_aud: Optional[str],
+) -> bool:
+    # Keyed on a digest rather than the token, and expires with the token
+    cache_key: VerifiedTokenKey = (
+        token_digest,
+        idp_config,
+        verify_using_alternate_aud,
+        specified_aud,
+    )
+    if verified_tokens.get(cache_key):
+        return True
+
+    token_public_key = verify_signing_kid(token, idp_config.issuer)
+    auds = [specified_aud] if specified_aud else idp_config.auds
+
+    if not verify_using_alternate_aud:
+        verified_claims = verify_claims(
+            token,
+            token_public_key,
+            issuer=idp_config.issuer,
+            audience=auds,
+        )  # Validate iss and supplied aud during decode
+    else:
+        verified_claims = verify_claims(
+            token,
+            token_public_key,
+            issuer=idp_config.issuer,
+            audience=None,
+        )
+        verify_alternate_aud(
+            alternate_aud_key=str(idp_config.alternate_aud_key),
+            known_auds=auds,
+            token_claims=verified_claims,
+        )
+
+    verify_scope(verified_claims, idp_config.scopes)
+
+    verified_tokens.put(cache_key, True, expires_at=token_claims["exp"])
+    return True
+
+
+# Not traced, since a stale index is refreshed from a background thread
+@ttl_cache(
+    ttl_in_seconds=JWKS_TTL_IN_SECONDS,
+    maxsize=MAX_CACHE_SIZE_CONFIG,
+    stale_while_revalidate_in_seconds=JWKS_STALE_WHILE_REVALIDATE_IN_SECONDS,
+)
+def get_cached_issuer_jwks(issuer: str) -> Dict[str, Any]:
+    try:
+        known_jwks: List[Dict[str, str]] = requests.get(
+            f"{issuer.rstrip('/')}/.well-known/jwks.json",
+            timeout=10,
+        ).json()["keys"]
+    except KeyError as e:
+        raise WellKnownJWKError(
+            "Validation Failure: the retrieved JWKs did not have the expected 'keys' key. This is likely an issue with the response provided by your IdP."
+        ) from e
+    except requests.RequestException as e:
+        raise WellKnownJWKError(
+            "Validation Failure: request exception while attempting to retrieve the known JWKs."
+        ) from e
+    except json.JSONDecodeError as e:
+        raise WellKnownJWKError(
+            "Validation Failure: well known JWKs response could not be decoded as JSON."
+        ) from e
+    return build_jwks_index(known_jwks)
+
+
+def build_jwks_index(known_jwks: List[Dict[str, str]]) -> Dict[str, Any]:
+    # Parse every public key once per fetch instead of once per token. Keys that cannot
+    # be used are skipped so a single bad entry does not reject tokens signed by the others.
+    rs256 = jwt.get_algorithm_by_name("RS256")
+    jwks_index: Dict[str, Any] = {}
+    for jwk in known_jwks:
+        kid = jwk.get("kid")
+        if kid is None:
+            logger.warning("Skipping well known JWK without a `kid` key.")
+            continue
+        try:
+            jwks_index[kid] = rs256.from_jwk(json.dumps(jwk))
+        except jwt.exceptions.InvalidKeyError:
+            logger.warning(
+                "Skipping well known JWK that could not be parsed as an RS256 public key.",
+                extra={"kid": kid},
+            )
+    return jwks_index
+
+
+def refetch_issuer_jwks_if_allowed(issuer: str) -> bool:
+    # Rate limited so tokens with made up kids cannot hammer the IdP
+    now = time.monotonic()
+    last_refetch = _last_jwks_refetch.get(issuer)
+    if (
+        last_refetch is not None
+        and now - last_refetch < MIN_SECONDS_BETWEEN_JWKS_REFETCHES
+    ):
+        return False
+    _last_jwks_refetch[issuer] = now
+    get_cached_issuer_jwks.cache_invalidate(issuer)
+    return True
+
+
+@tracer.capture_method
+def verify_signing_kid(token: str, issuer: str) -> Any:
+    # Verifies that the KID used to sign the token matches a KID from our list of
+    # well known JWKs associated with our IdP's "user pool", and returns its public key.
+    try:
+        token_kid = jwt.get_unverified_header(token)["kid"]
+    except jwt.exceptions.DecodeError as e:
+        raise SigningKidError(
+            "Validation Failure: token header could not be decoded."
+        ) from e
+    except KeyError as e:
+        raise SigningKidError(
+            "Validation Failure: token header does not contain `kid` key."
+        ) from e
+
+    token_public_key = get_cached_issuer_jwks(issuer).get(token_kid)
+    if token_public_key is None and refetch_issuer_jwks_if_allowed(issuer):
+        token_public_key = get_cached_issuer_jwks(issuer).get(token_kid)
+    if token_public_key is None:
+        raise SigningKidError(
+            "Validation Failure: key id for the token did not match a public key id for the issuer."
+        )
+    return token_public_key
+
+
+@tracer.capture_method
+def verify_claims(
+    token: str, token_public_key: Any, issuer: str, audience: List[str] | None
+) -> Dict[str, Any]:
+    try:
+        token_claims: Dict[str, Any] = jwt.decode(
+            token,
+            key=token_public_key,
+            algorithms=["RS256"],
+            issuer=issuer,
+            audience=audience,
+        )
+    except jwt.exceptions.MissingRequiredClaimError as e:
+        raise TokenClaimsError(
+            "Validation Failure: token missing required claims."
+        ) from e
+    except jwt.exceptions.InvalidSignatureError as e:
+        raise TokenClaimsError(
+            "Validation Failure: signature verification failed."
+        ) from e
+    except jwt.exceptions.InvalidAudienceError as e:
+        raise TokenClaimsError("Validation Failure: token audience is invalid.") from e
+    except jwt.exceptions.InvalidIssuerError as e:
+        raise TokenClaimsError("Validation Failure: token issuer is invalid.") from e
+    except jwt.exceptions.DecodeError as e:
+        raise TokenClaimsError("Validation Failure: token failed to decode.") from e
+    except jwt.exceptions.InvalidTokenError as e:
+        raise TokenClaimsError("Validation Failure: token is invalid.") from e
+    return token_claims
+
+
+@tracer.capture_method
+def verify_alternate_aud(
+    alternate_aud_key: str,
+    known_auds: List[str],
+    token_claims: Dict[str, Any],
+) -> None:
+    try:
+        if token_claims[alternate_aud_key] not in known_auds:
+            raise IdPAudError(
+                f"Validation Failure: {alternate_aud_key} was not a known client."
+            )
+    except KeyError as e:
+        raise IdPAudError(
+            "Validation Failure: token did not have the expected alternate aud key."
+        ) from e
+
+
+@tracer.capture_method
+def verify_scope(
+    token_claims: Dict[str, Any],
+    known_scopes: List[str],
+) -> None:
+    # At least one scope must be match a known scope from the list of known scopes configured with the IdP.
+    # The scopes are associated with clients, and there can be any numbers of clients with any number of scopes.
+    try:
+        token_scopes: List[str] = token_claims["scope"].split(
+            " "
+        )  # Scopes are always a space separated list
+        if len(set(known_scopes).intersection(token_scopes)) == 0:
+            raise ScopeError("Validation Failure: token did not have a known scope.")
+    except KeyError as e:
+        raise ScopeError("Validation Failure: token did not have a scope claim.") from e
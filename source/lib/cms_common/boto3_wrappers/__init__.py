@@ -3,4 +3,13 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Connected Mobility Solution on AWS
-from .dynamo_crud import DynHelpers
+from .client_pool import (
+    ClientConnectionStats,
+    ClientSettings,
+    clear_clients,
+    get_client,
+    get_client_config,
+    get_client_stats,
+    prewarm_clients,
+)
+from .dynamo_crud import DynBatchGetIncompleteError, DynHelpers, DynQueryPage
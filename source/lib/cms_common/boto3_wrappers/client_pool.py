@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# AWS Libraries
+import boto3
+from aws_lambda_powertools import Logger
+from botocore.config import Config
+
+logger = Logger()
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    connect_timeout_in_seconds: float = 5
+    read_timeout_in_seconds: float = 30
+    max_pool_connections: int = 25
+    max_attempts: int = 5
+
+
+@dataclass(frozen=True)
+class ClientConnectionStats:
+    service_name: str
+    user_agent_string: str
+    region_name: Optional[str]
+    requests: int
+    new_connections: int
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+
+DEFAULT_CLIENT_SETTINGS = ClientSettings()
+
+# Overrides for services whose calls are on a hot path or known to be slow
+SERVICE_CLIENT_SETTINGS: Dict[str, ClientSettings] = {
+    "athena": ClientSettings(read_timeout_in_seconds=20),
+    "dynamodb": ClientSettings(connect_timeout_in_seconds=1, read_timeout_in_seconds=5),
+    "iot-data": ClientSettings(connect_timeout_in_seconds=2, read_timeout_in_seconds=5),
+    "sagemaker-runtime": ClientSettings(read_timeout_in_seconds=60, max_attempts=3),
+    "secretsmanager": ClientSettings(
+        connect_timeout_in_seconds=2, read_timeout_in_seconds=10
+    ),
+    "sns": ClientSettings(connect_timeout_in_seconds=2, read_timeout_in_seconds=10),
+    "ssm": ClientSettings(connect_timeout_in_seconds=2, read_timeout_in_seconds=10),
+}
+
+# Only set by the Lambda runtime, so importing a handler in tests never
+# creates clients before mocks are in place
+LAMBDA_INITIALIZATION_TYPE_ENV_VAR = "AWS_LAMBDA_INITIALIZATION_TYPE"
+
+ClientKey = Tuple[str, str, Optional[str]]
+
+_clients: Dict[ClientKey, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client_config(service_name: str, user_agent_string: str) -> Config:
+    settings = SERVICE_CLIENT_SETTINGS.get(service_name, DEFAULT_CLIENT_SETTINGS)
+    return Config(
+        user_agent_extra=user_agent_string,
+        connect_timeout=settings.connect_timeout_in_seconds,
+        read_timeout=settings.read_timeout_in_seconds,
+        max_pool_connections=settings.max_pool_connections,
+        tcp_keepalive=True,
+        retries={"mode": "adaptive", "max_attempts": settings.max_attempts},
+    )
+
+
+def get_client(
+    service_name: str,
+    user_agent_string: Optional[str] = None,
+    region_name: Optional[str] = None,
+) -> Any:
+    """
+    Return the shared client for a service, creating it on first use.
+
+    Clients are thread safe, so one client per service, user agent and region
+    is kept for the lifetime of the execution environment and its connection
+    pool is reused across invocations.
+    """
+    user_agent_string = user_agent_string or os.environ["USER_AGENT_STRING"]
+    key = (service_name, user_agent_string, region_name)
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = boto3.client(
+                service_name,  # type: ignore[call-overload]
+                region_name=region_name,
+                config=get_client_config(
+                    service_name=service_name, user_agent_string=user_agent_string
+                ),
+            )
+        return _clients[key]
+
+
+def prewarm_clients(
+    service_names: Iterable[str],
+    user_agent_string: Optional[str] = None,
+    region_name: Optional[str] = None,
+) -> None:
+    # Called at module level so clients are built during Lambda init, which is
+    # not billed towards the first invocation's latency
+    if not os.environ.get(LAMBDA_INITIALIZATION_TYPE_ENV_VAR):
+        return
+
+    for service_name in service_names:
+        try:
+            get_client(
+                service_name=service_name,
+                user_agent_string=user_agent_string,
+                region_name=region_name,
+            )
+        except Exception:  # pylint: disable=broad-exception-caught
+            # A failed pre-warm must not fail init, the handler retries lazily
+            logger.warning("Could not pre-warm %s client.", service_name, exc_info=True)
+
+
+def get_client_stats() -> Dict[ClientKey, ClientConnectionStats]:
+    with _clients_lock:
+        clients = dict(_clients)
+
+    return {
+        key: ClientConnectionStats(
+            service_name=key[0],
+            user_agent_string=key[1],
+            region_name=key[2],
+            **_get_pool_counters(client),
+        )
+        for key, client in clients.items()
+    }
+
+
+def clear_clients() -> None:
+    with _clients_lock:
+        _clients.clear()
+
+
+def _get_pool_counters(client: Any) -> Dict[str, int]:
+    # botocore keeps one urllib3 pool per host behind the client's endpoint.
+    # urllib3 counts every request and every new connection made by a pool,
+    # so the difference is the number of requests served on a kept-alive one.
+    http_session = getattr(getattr(client, "_endpoint", None), "http_session", None)
+    managers = [getattr(http_session, "_manager", None)]
+    managers.extend(getattr(http_session, "_proxy_managers", {}).values())
+
+    requests = 0
+    new_connections = 0
+    for manager in managers:
+        pools = getattr(manager, "pools", None)
+        if pools is None:
+            continue
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            requests += getattr(pool, "num_requests", 0)
+            new_connections += getattr(pool, "num_connections", 0)
+
+    return {"requests": requests, "new_connections": new_connections}
@@ -3,23 +3,81 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
+import base64
+import json
 import os
+import queue
+import random
+import threading
 import time
-from typing import Any, Dict, Generator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 # AWS Libraries
 import boto3
 from aws_lambda_powertools import Logger, Tracer
-from botocore.config import Config
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder, Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from botocore.exceptions import ClientError
 
+# Connected Mobility Solution on AWS
+from .client_pool import get_client, get_client_config
+
 tracer = Tracer()
 logger = Logger()
 
 
+class DynBatchGetIncompleteError(Exception):
+    def __init__(self, table_name: str, unprocessed_keys: List[Dict[str, Any]]):
+        self.table_name = table_name
+        self.unprocessed_keys = unprocessed_keys
+        super().__init__(
+            f"{len(unprocessed_keys)} keys from {table_name} were still "
+            "unprocessed after retrying"
+        )
+
+
+@dataclass(frozen=True)
+class DynQueryPage:
+    items: List[Dict[str, Any]]
+    # Opaque token to resume the query after this page, None on the last page
+    cursor: Optional[str]
+
+
 class DynHelpers:
     dynamo_object = None
+    worker_pool: Optional[ThreadPoolExecutor] = None
+    thread_local = threading.local()
     MAX_ITEM_PER_BATCH_IN_BATCH_WRITE = 25
+    MAX_KEYS_PER_BATCH_IN_BATCH_GET = 100
+    MAX_BATCH_GET_ATTEMPTS = 8
+    MAX_BATCH_WRITE_ATTEMPTS = 8
+    THROTTLING_ERROR_CODES = frozenset(
+        (
+            "ProvisionedThroughputExceededException",
+            "RequestLimitExceeded",
+            "ThrottlingException",
+        )
+    )
+    BACKOFF_BASE_SECONDS = 0.05
+    BACKOFF_CAP_SECONDS = 5.0
+    DEADLINE_SAFETY_MARGIN_MILLIS = 500
+    MAX_WORKERS = 8
+    DEFAULT_SCAN_SEGMENTS = 4
+    MAX_BUFFERED_PAGES_PER_SEGMENT = 2
+    QUEUE_POLL_INTERVAL_SECONDS = 0.1
 
     @staticmethod
     def dyn_resource() -> Any:
@@ -29,15 +87,106 @@ class DynHelpers:
         DynHelpers.dynamo_object = boto3.resource(
             "dynamodb",
             region_name=os.environ.get("REGION_NAME"),
-            config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"]),
+            config=get_client_config(
+                service_name="dynamodb",
+                user_agent_string=os.environ["USER_AGENT_STRING"],
+            ),
         )
         return DynHelpers.dynamo_object
 
     @staticmethod
-    def get_all(*args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
-        return [
-            item for result in DynHelpers.dyn_scan(*args, **kwargs) for item in result
+    def dyn_thread_resource() -> Any:
+        # boto3 resources are not thread safe, so each worker thread gets its own
+        if getattr(DynHelpers.thread_local, "dynamo_object", None):
+            return DynHelpers.thread_local.dynamo_object
+
+        DynHelpers.thread_local.dynamo_object = boto3.session.Session().resource(
+            "dynamodb",
+            region_name=os.environ.get("REGION_NAME"),
+            config=get_client_config(
+                service_name="dynamodb",
+                user_agent_string=os.environ["USER_AGENT_STRING"],
+            ),
+        )
+        return DynHelpers.thread_local.dynamo_object
+
+    @staticmethod
+    def dyn_client() -> Any:
+        # Low level clients are thread safe, so every worker thread shares the
+        # pooled one instead of building a session and resource of its own
+        return get_client("dynamodb", region_name=os.environ.get("REGION_NAME"))
+
+    @staticmethod
+    def _client_request(operation: str, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Run a scan or query on the pooled client with the Python values and
+        condition objects a resource accepts, and return items, and the last
+        evaluated key, as Python values.
+        """
+        serializer = TypeSerializer()
+        deserializer = TypeDeserializer()
+        attribute_names = dict(kwargs.pop("ExpressionAttributeNames", None) or {})
+        attribute_values = dict(kwargs.pop("ExpressionAttributeValues", None) or {})
+
+        builder = ConditionExpressionBuilder()
+        for parameter, is_key_condition in (
+            ("KeyConditionExpression", True),
+            ("FilterExpression", False),
+        ):
+            condition = kwargs.get(parameter)
+            if isinstance(condition, ConditionBase):
+                expression = builder.build_expression(
+                    condition, is_key_condition=is_key_condition
+                )
+                kwargs[parameter] = expression.condition_expression
+                attribute_names.update(expression.attribute_name_placeholders)
+                attribute_values.update(expression.attribute_value_placeholders)
+
+        if attribute_names:
+            kwargs["ExpressionAttributeNames"] = attribute_names
+        if attribute_values:
+            kwargs["ExpressionAttributeValues"] = {
+                name: serializer.serialize(value)
+                for name, value in attribute_values.items()
+            }
+        if kwargs.get("ExclusiveStartKey"):
+            kwargs["ExclusiveStartKey"] = {
+                name: serializer.serialize(value)
+                for name, value in kwargs["ExclusiveStartKey"].items()
+            }
+
+        response = getattr(DynHelpers.dyn_client(), operation)(**kwargs)
+        response["Items"] = [
+            {name: deserializer.deserialize(value) for name, value in item.items()}
+            for item in response.get("Items", [])
         ]
+        if response.get("LastEvaluatedKey"):
+            response["LastEvaluatedKey"] = {
+                name: deserializer.deserialize(value)
+                for name, value in response["LastEvaluatedKey"].items()
+            }
+        return response
+
+    @staticmethod
+    def get_worker_pool() -> ThreadPoolExecutor:
+        if DynHelpers.worker_pool is None:
+            DynHelpers.worker_pool = ThreadPoolExecutor(
+                max_workers=DynHelpers.MAX_WORKERS,
+                thread_name_prefix="dyn-helpers",
+            )
+        return DynHelpers.worker_pool
+
+    @staticmethod
+    def get_all(
+        *args: Any, total_segments: int = 1, **kwargs: Any
+    ) -> List[Dict[str, Any]]:
+        if total_segments > 1:
+            pages = DynHelpers.dyn_parallel_scan(
+                *args, total_segments=total_segments, **kwargs
+            )
+        else:
+            pages = DynHelpers.dyn_scan(*args, **kwargs)
+        return [item for result in pages for item in result]
 
     @staticmethod
     def put_item(table_name: str, item: Dict[str, Any]) -> None:
@@ -128,29 +277,163 @@ class DynHelpers:
             raise
 
     @staticmethod
-    def dyn_batch_get(batch_keys: Dict[str, Any]) -> Dict[str, List[Any]]:
-        remaining_tries = 5
-        sleepy_time = 1  # Start with 1 second of sleep, then exponentially increase.
-        retrieved: Dict[str, List[Any]] = {key: [] for key in batch_keys}
-        while batch_keys and remaining_tries:
-            response = DynHelpers.dyn_resource().batch_get_item(RequestItems=batch_keys)
-            # Collect any retrieved items and retry unprocessed keys.
-            for key in response.get("Responses", []):
-                retrieved[key] += response["Responses"][key]
+    def dyn_batch_get(
+        batch_keys: Dict[str, Any],
+        remaining_time_in_millis: Optional[Callable[[], int]] = None,
+    ) -> Dict[str, List[Any]]:
+        retrieved: Dict[str, List[Any]] = {}
+        for table_name, table_request in batch_keys.items():
+            request_kwargs = {k: v for k, v in table_request.items() if k != "Keys"}
+            # Like BatchGetItem, each existing item is returned once however
+            # often its key was requested
+            unique_keys = list(
+                {
+                    DynHelpers._key_identity(key): key for key in table_request["Keys"]
+                }.values()
+            )
+            items = DynHelpers.dyn_batch_get_items(
+                table_name,
+                unique_keys,
+                remaining_time_in_millis,
+                **request_kwargs,
+            )
+            retrieved[table_name] = [item for item in items if item is not None]
+        return retrieved
+
+    @staticmethod
+    def dyn_batch_get_items(
+        table_name: str,
+        keys: List[Dict[str, Any]],
+        remaining_time_in_millis: Optional[Callable[[], int]] = None,
+        **request_kwargs: Any,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Fetch any number of keys from one table and return the items in the order
+        of the requested keys, with None for keys that do not exist.
 
-            batch_keys = response["UnprocessedKeys"]
+        The result has exactly one entry per requested key, so it can be zipped
+        with keys. Duplicate keys are fetched once and each of their entries is a
+        separate copy of the item. The key set is split into legal
+        BatchGetItem chunks that run concurrently on the shared worker pool.
+        Unprocessed keys are retried with jittered exponential backoff until
+        MAX_BATCH_GET_ATTEMPTS is reached or remaining_time_in_millis (e.g.
+        context.get_remaining_time_in_millis) leaves no room for another sleep,
+        at which point DynBatchGetIncompleteError is raised. A
+        ProjectionExpression must include the key attributes.
+        """
+        if not keys:
+            return []
+
+        unique_keys: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        for key in keys:
+            unique_keys.setdefault(DynHelpers._key_identity(key), key)
+
+        unique_key_list = list(unique_keys.values())
+        chunk_size = DynHelpers.MAX_KEYS_PER_BATCH_IN_BATCH_GET
+        worker_pool = DynHelpers.get_worker_pool()
+        futures = [
+            worker_pool.submit(
+                DynHelpers._batch_get_chunk,
+                table_name,
+                unique_key_list[index : index + chunk_size],
+                remaining_time_in_millis,
+                request_kwargs,
+            )
+            for index in range(0, len(unique_key_list), chunk_size)
+        ]
+
+        key_attributes = list(keys[0])
+        found: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        for future in futures:
+            for item in future.result():
+                item_key = {attribute: item[attribute] for attribute in key_attributes}
+                found[DynHelpers._key_identity(item_key)] = item
+
+        items: List[Optional[Dict[str, Any]]] = []
+        returned: Set[Tuple[Any, ...]] = set()
+        for key in keys:
+            key_identity = DynHelpers._key_identity(key)
+            item = found.get(key_identity)
+            if item is not None and key_identity in returned:
+                item = dict(item)
+            returned.add(key_identity)
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _batch_get_chunk(
+        table_name: str,
+        keys: List[Dict[str, Any]],
+        remaining_time_in_millis: Optional[Callable[[], int]],
+        request_kwargs: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        request_items = {table_name: {**request_kwargs, "Keys": keys}}
+        retrieved: List[Dict[str, Any]] = []
+
+        for attempt in range(DynHelpers.MAX_BATCH_GET_ATTEMPTS):
+            try:
+                response = DynHelpers.dyn_thread_resource().batch_get_item(
+                    RequestItems=request_items
+                )
+            except ClientError as err:
+                if (
+                    err.response["Error"]["Code"]
+                    not in DynHelpers.THROTTLING_ERROR_CODES
+                ):
+                    logger.error(
+                        "Couldn't batch get %s keys from table %s. Here's why: %s: %s",
+                        len(request_items[table_name]["Keys"]),
+                        table_name,
+                        err.response["Error"]["Code"],
+                        err.response["Error"]["Message"],
+                    )
+                    raise
+            else:
+                retrieved += response.get("Responses", {}).get(table_name, [])
+                request_items = response.get("UnprocessedKeys") or {}
+                if not request_items:
+                    return retrieved
+
+            if attempt == DynHelpers.MAX_BATCH_GET_ATTEMPTS - 1:
+                break
+            sleepy_time = DynHelpers._backoff_delay(attempt)
+            if not DynHelpers._has_time_for(sleepy_time, remaining_time_in_millis):
+                break
 
             logger.info(
-                "%s unprocessed keys returned. Sleep, then retry.",
-                len(batch_keys),
+                "%s unprocessed keys returned. Sleeping for %s seconds, then retry.",
+                len(request_items[table_name]["Keys"]),
+                sleepy_time,
             )
-            remaining_tries -= 1
-            if batch_keys and remaining_tries:
-                logger.info("Sleeping for %s seconds.", sleepy_time)
-                time.sleep(sleepy_time)
-                sleepy_time = min(sleepy_time * 2, 32)
+            time.sleep(sleepy_time)
 
-        return retrieved
+        raise DynBatchGetIncompleteError(table_name, request_items[table_name]["Keys"])
+
+    @staticmethod
+    def _key_identity(key: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(sorted(key.items()))
+
+    @staticmethod
+    def _backoff_delay(attempt: int) -> float:
+        # Full jitter keeps concurrent chunks from retrying in lockstep
+        return random.uniform(  # nosec
+            0,
+            min(
+                DynHelpers.BACKOFF_CAP_SECONDS,
+                DynHelpers.BACKOFF_BASE_SECONDS * 2**attempt,
+            ),
+        )
+
+    @staticmethod
+    def _has_time_for(
+        sleepy_time: float, remaining_time_in_millis: Optional[Callable[[], int]]
+    ) -> bool:
+        if remaining_time_in_millis is None:
+            return True
+        return (
+            remaining_time_in_millis() - DynHelpers.DEADLINE_SAFETY_MARGIN_MILLIS
+            > sleepy_time * 1000
+        )
 
     @staticmethod
     def dyn_batch_write(table_name: str, batch_items: List[Dict[str, Any]]) -> None:
@@ -166,6 +449,84 @@ class DynHelpers:
             logger.error(msg=f"Error while batch writing: {err}")
             raise
 
+    @staticmethod
+    def dyn_batch_write_items(
+        table_name: str,
+        items: List[Dict[str, Any]],
+        remaining_time_in_millis: Optional[Callable[[], int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Put any number of items into one table and return the items that could
+        not be written.
+
+        Items are split into legal BatchWriteItem chunks that run concurrently on
+        the shared worker pool. Unprocessed items are retried with jittered
+        exponential backoff until MAX_BATCH_WRITE_ATTEMPTS is reached or
+        remaining_time_in_millis leaves no room for another sleep. A chunk
+        throttled as a whole is retried the same way, while any other
+        ClientError is raised. Keys must be unique within items.
+        """
+        chunk_size = DynHelpers.MAX_ITEM_PER_BATCH_IN_BATCH_WRITE
+        worker_pool = DynHelpers.get_worker_pool()
+        futures = [
+            worker_pool.submit(
+                DynHelpers._batch_write_chunk,
+                table_name,
+                items[index : index + chunk_size],
+                remaining_time_in_millis,
+            )
+            for index in range(0, len(items), chunk_size)
+        ]
+        return [item for future in futures for item in future.result()]
+
+    @staticmethod
+    def _batch_write_chunk(
+        table_name: str,
+        items: List[Dict[str, Any]],
+        remaining_time_in_millis: Optional[Callable[[], int]],
+    ) -> List[Dict[str, Any]]:
+        write_requests = [{"PutRequest": {"Item": item}} for item in items]
+
+        for attempt in range(DynHelpers.MAX_BATCH_WRITE_ATTEMPTS):
+            try:
+                response = DynHelpers.dyn_thread_resource().batch_write_item(
+                    RequestItems={table_name: write_requests}
+                )
+            except ClientError as err:
+                if (
+                    err.response["Error"]["Code"]
+                    not in DynHelpers.THROTTLING_ERROR_CODES
+                ):
+                    logger.error(
+                        "Couldn't batch write %s items to table %s. Here's why: %s: %s",
+                        len(write_requests),
+                        table_name,
+                        err.response["Error"]["Code"],
+                        err.response["Error"]["Message"],
+                    )
+                    raise
+            else:
+                write_requests = response.get("UnprocessedItems", {}).get(
+                    table_name, []
+                )
+                if not write_requests:
+                    return []
+
+            if attempt == DynHelpers.MAX_BATCH_WRITE_ATTEMPTS - 1:
+                break
+            sleepy_time = DynHelpers._backoff_delay(attempt)
+            if not DynHelpers._has_time_for(sleepy_time, remaining_time_in_millis):
+                break
+
+            logger.info(
+                "%s items not written. Sleeping for %s seconds, then retry.",
+                len(write_requests),
+                sleepy_time,
+            )
+            time.sleep(sleepy_time)
+
+        return [write_request["PutRequest"]["Item"] for write_request in write_requests]
+
     @staticmethod
     def dyn_scan(
         *args: Any, table: Optional[str] = None, **kwargs: Any
@@ -193,6 +554,152 @@ class DynHelpers:
                 )
                 raise
 
+    @staticmethod
+    def dyn_parallel_scan(
+        *args: Any,
+        table: Optional[str] = None,
+        total_segments: int = DEFAULT_SCAN_SEGMENTS,
+        preserve_order: bool = False,
+        max_buffered_pages: int = MAX_BUFFERED_PAGES_PER_SEGMENT,
+        **kwargs: Any,
+    ) -> Generator[List[Dict[str, Any]], None, None]:
+        """
+        Scan a table as total_segments parallel segments, one thread per segment.
+
+        Pages are yielded as they arrive, with at most max_buffered_pages pages
+        buffered per segment. With preserve_order, every page of segment N is
+        yielded before any page of segment N+1.
+        """
+        scan_kwargs = {k: v for k, v in kwargs.items() if v}
+
+        logger.info(
+            "Running parallel dynamo scan on %s with %s segments",
+            table,
+            total_segments,
+            extra={"kwargs": scan_kwargs},
+        )
+
+        yield from DynHelpers._stream_from_workers(
+            [
+                partial(
+                    DynHelpers._scan_segment,
+                    table,
+                    segment,
+                    total_segments,
+                    scan_kwargs,
+                )
+                for segment in range(total_segments)
+            ],
+            preserve_order,
+            max_buffered_pages,
+        )
+
+    @staticmethod
+    def _stream_from_workers(
+        producers: List[Callable[[], Iterable[Any]]],
+        preserve_order: bool,
+        max_buffered_pages: int,
+    ) -> Generator[Any, None, None]:
+        """
+        Run each producer on its own thread and yield what they produce.
+
+        Producers block while the consumer is behind, so they run on a dedicated
+        executor rather than the shared worker pool, which a blocked producer
+        could otherwise starve. Without preserve_order the producers share one
+        queue holding up to max_buffered_pages values per producer. With
+        preserve_order each producer has its own queue of max_buffered_pages
+        values, and every value of producer N is yielded before any value of
+        producer N+1.
+        """
+        stop_event = threading.Event()
+        if preserve_order:
+            page_queues: List["queue.Queue[Any]"] = [
+                queue.Queue(maxsize=max_buffered_pages) for _ in producers
+            ]
+        else:
+            page_queues = [queue.Queue(maxsize=max_buffered_pages * len(producers))]
+
+        def enqueue(page_queue: "queue.Queue[Any]", value: Any) -> bool:
+            while not stop_event.is_set():
+                try:
+                    page_queue.put(
+                        value, timeout=DynHelpers.QUEUE_POLL_INTERVAL_SECONDS
+                    )
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def run_producer(index: int) -> None:
+            page_queue = page_queues[index if preserve_order else 0]
+            try:
+                for page in producers[index]():
+                    if not enqueue(page_queue, page):
+                        return
+                enqueue(page_queue, _ProducerDone(index))
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                enqueue(page_queue, _ProducerFailed(index, err))
+
+        if not producers:
+            return
+        producer_pool = ThreadPoolExecutor(
+            max_workers=len(producers), thread_name_prefix="dyn-helpers-producer"
+        )
+        for index in range(len(producers)):
+            producer_pool.submit(run_producer, index)
+
+        try:
+            remaining_producers = len(producers)
+            queue_index = 0
+            while remaining_producers:
+                result = page_queues[queue_index].get()
+                if isinstance(result, _ProducerFailed):
+                    raise result.error
+                if isinstance(result, _ProducerDone):
+                    remaining_producers -= 1
+                    if preserve_order:
+                        queue_index += 1
+                    continue
+                yield result
+        finally:
+            # Release any producers still blocked on a full queue if the consumer
+            # stops early or a producer fails
+            stop_event.set()
+            producer_pool.shutdown(wait=False)
+
+    @staticmethod
+    def _scan_segment(
+        table: Optional[str],
+        segment: int,
+        total_segments: int,
+        scan_kwargs: Dict[str, Any],
+    ) -> Generator[List[Dict[str, Any]], None, None]:
+        segment_kwargs = {
+            **scan_kwargs,
+            "Segment": segment,
+            "TotalSegments": total_segments,
+        }
+        while True:
+            try:
+                response = DynHelpers._client_request(
+                    "scan", TableName=table, **segment_kwargs
+                )
+            except ClientError as err:
+                logger.error(
+                    "Couldn't scan segment %s of %s. Here's why: %s: %s",
+                    segment,
+                    table,
+                    err.response["Error"]["Code"],
+                    err.response["Error"]["Message"],
+                )
+                raise
+
+            yield response.get("Items", [])
+
+            if not response.get("LastEvaluatedKey"):
+                return
+            segment_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
     @staticmethod
     def dyn_query(
         table_name: str,
@@ -201,32 +708,221 @@ class DynHelpers:
         projection_expression: Optional[str] = None,
         expression_attribute_names: Optional[Dict[str, str]] = None,
         expression_attribute_values: Optional[Dict[str, str]] = None,
+        limit: Optional[int] = None,
+        scan_index_forward: bool = True,
     ) -> Any:
+        function_kwargs: Dict[str, Any] = {}
+        if projection_expression and selection == "SPECIFIC_ATTRIBUTES":
+            function_kwargs["Select"] = selection
+        elif projection_expression:
+            function_kwargs["ProjectionExpression"] = projection_expression
+        if expression_attribute_names:
+            function_kwargs["ExpressionAttributeNames"] = expression_attribute_names
+
+        return list(
+            DynHelpers.dyn_query_items(
+                table_name,
+                key_condition_expression,
+                expression_attribute_values=expression_attribute_values,
+                limit=limit,
+                scan_index_forward=scan_index_forward,
+                **function_kwargs,
+            )
+        )
+
+    @staticmethod
+    def dyn_query_items(*args: Any, **kwargs: Any) -> Generator[Any, None, None]:
+        for page in DynHelpers.dyn_query_pages(*args, **kwargs):
+            yield from page.items
+
+    @staticmethod
+    def dyn_query_pages(
+        table_name: str,
+        key_condition_expression: Any,
+        expression_attribute_values: Optional[Dict[str, Any]] = None,
+        projection_attributes: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        scan_index_forward: bool = True,
+        cursor: Optional[str] = None,
+        **query_kwargs: Any,
+    ) -> Generator[DynQueryPage, None, None]:
+        """
+        Stream a query page by page, following LastEvaluatedKey.
+
+        Each page carries an opaque cursor that resumes the query after that
+        page when passed back as cursor. limit caps the total number of items
+        read and page_size the number read per request. projection_attributes
+        pushes a projection down to DynamoDB without the caller having to build
+        ExpressionAttributeNames. Remaining query_kwargs (IndexName,
+        FilterExpression, ConsistentRead, ...) are passed through.
+        """
+        yield from DynHelpers._query_pages(
+            DynHelpers.dyn_resource().Table(table_name).query,
+            table_name,
+            key_condition_expression,
+            expression_attribute_values,
+            projection_attributes,
+            limit,
+            page_size,
+            scan_index_forward,
+            cursor,
+            query_kwargs,
+        )
+
+    @staticmethod
+    def dyn_query_fan_out(
+        table_name: str,
+        partition_key_name: str,
+        partition_key_values: List[Any],
+        sort_key_condition: Optional[ConditionBase] = None,
+        projection_attributes: Optional[List[str]] = None,
+        limit_per_partition: Optional[int] = None,
+        preserve_order: bool = False,
+        max_buffered_pages: int = MAX_BUFFERED_PAGES_PER_SEGMENT,
+        **query_kwargs: Any,
+    ) -> Generator[List[Dict[str, Any]], None, None]:
+        """
+        Query many partitions of one table concurrently on the shared worker pool
+        and merge their pages into a single stream.
+
+        Duplicate partition keys are queried once. With preserve_order, all pages
+        of a partition are yielded before the next partition, in the order of
+        partition_key_values.
+        """
+
+        def query_partition(partition_key_value: Any) -> Iterable[Any]:
+            key_condition = Key(partition_key_name).eq(partition_key_value)
+            if sort_key_condition is not None:
+                key_condition = key_condition & sort_key_condition
+            for page in DynHelpers._query_pages(
+                partial(DynHelpers._client_request, "query", TableName=table_name),
+                table_name,
+                key_condition,
+                None,
+                projection_attributes,
+                limit_per_partition,
+                None,
+                True,
+                None,
+                query_kwargs,
+            ):
+                yield page.items
+
+        yield from DynHelpers._stream_from_workers(
+            [
+                partial(query_partition, partition_key_value)
+                for partition_key_value in dict.fromkeys(partition_key_values)
+            ],
+            preserve_order,
+            max_buffered_pages,
+        )
+
+    @staticmethod
+    def _query_pages(
+        query: Callable[..., Dict[str, Any]],
+        table_name: str,
+        key_condition_expression: Any,
+        expression_attribute_values: Optional[Dict[str, Any]],
+        projection_attributes: Optional[List[str]],
+        limit: Optional[int],
+        page_size: Optional[int],
+        scan_index_forward: bool,
+        cursor: Optional[str],
+        query_kwargs: Dict[str, Any],
+    ) -> Generator[DynQueryPage, None, None]:
         function_kwargs: Dict[str, Any] = {
-            "KeyConditionExpression": key_condition_expression
+            **query_kwargs,
+            "KeyConditionExpression": key_condition_expression,
+            "ScanIndexForward": scan_index_forward,
         }
-        try:
-            if projection_expression and selection == "SPECIFIC_ATTRIBUTES":
-                function_kwargs["Select"] = selection
-            elif projection_expression:
-                function_kwargs["ProjectionExpression"] = projection_expression
-            if expression_attribute_names:
-                function_kwargs["ExpressionAttributeNames"] = expression_attribute_names
-            if expression_attribute_values:
-                function_kwargs[
-                    "ExpressionAttributeValues"
-                ] = expression_attribute_values
-            response = (
-                DynHelpers.dyn_resource().Table(table_name).query(**function_kwargs)
+        if expression_attribute_values:
+            function_kwargs["ExpressionAttributeValues"] = expression_attribute_values
+        if projection_attributes:
+            projection_names = {
+                f"#proj{index}": attribute
+                for index, attribute in enumerate(projection_attributes)
+            }
+            function_kwargs["ProjectionExpression"] = ", ".join(projection_names)
+            function_kwargs["ExpressionAttributeNames"] = {
+                **function_kwargs.get("ExpressionAttributeNames", {}),
+                **projection_names,
+            }
+        if cursor:
+            function_kwargs["ExclusiveStartKey"] = decode_cursor(cursor)
+
+        remaining = limit
+        while remaining is None or remaining > 0:
+            request_limit = min(
+                (size for size in (page_size, remaining) if size is not None),
+                default=None,
             )
-        except ClientError as err:
-            logger.error(
-                "Couldn't query item %s from table %s. Here's why: %s: %s",
-                key_condition_expression,
-                table_name,
-                err.response["Error"]["Code"],
-                err.response["Error"]["Message"],
+            if request_limit is not None:
+                function_kwargs["Limit"] = request_limit
+
+            try:
+                response = query(**function_kwargs)
+            except ClientError as err:
+                logger.error(
+                    "Couldn't query item %s from table %s. Here's why: %s: %s",
+                    key_condition_expression,
+                    table_name,
+                    err.response["Error"]["Code"],
+                    err.response["Error"]["Message"],
+                )
+                raise
+
+            items = response.get("Items", [])
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if remaining is not None:
+                remaining -= len(items)
+
+            yield DynQueryPage(
+                items=items,
+                cursor=(
+                    encode_cursor(last_evaluated_key) if last_evaluated_key else None
+                ),
             )
-            raise
 
-        return response["Items"]
+            if not last_evaluated_key:
+                return
+            function_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+
+def encode_cursor(last_evaluated_key: Dict[str, Any]) -> str:
+    serializer = TypeSerializer()
+    typed_key = {}
+    for name, value in last_evaluated_key.items():
+        typed_value = serializer.serialize(value)
+        if "B" in typed_value:
+            typed_value = {"B": base64.b64encode(bytes(typed_value["B"])).decode()}
+        typed_key[name] = typed_value
+    return base64.urlsafe_b64encode(
+        json.dumps(typed_key, separators=(",", ":")).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    deserializer = TypeDeserializer()
+    try:
+        typed_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as err:
+        raise ValueError("Invalid query cursor") from err
+
+    last_evaluated_key = {}
+    for name, typed_value in typed_key.items():
+        if "B" in typed_value:
+            typed_value = {"B": base64.b64decode(typed_value["B"])}
+        last_evaluated_key[name] = deserializer.deserialize(typed_value)
+    return last_evaluated_key
+
+
+@dataclass(frozen=True)
+class _ProducerDone:
+    index: int
+
+
+@dataclass(frozen=True)
+class _ProducerFailed:
+    index: int
+    error: Exception
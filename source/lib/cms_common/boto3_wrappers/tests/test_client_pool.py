@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import os
+from types import SimpleNamespace
+from typing import Generator
+from unittest.mock import patch
+
+# Third Party Libraries
+import pytest
+
+# Connected Mobility Solution on AWS
+from ..client_pool import (
+    LAMBDA_INITIALIZATION_TYPE_ENV_VAR,
+    clear_clients,
+    get_client,
+    get_client_stats,
+    prewarm_clients,
+)
+
+
+@pytest.fixture(autouse=True)
+def fixture_clear_clients() -> Generator[None, None, None]:
+    clear_clients()
+    yield
+    clear_clients()
+
+
+def test_get_client_reuses_tuned_client() -> None:
+    client = get_client("dynamodb", region_name="us-east-1")
+
+    assert get_client("dynamodb", region_name="us-east-1") is client
+    assert get_client("dynamodb", region_name="us-west-2") is not client
+
+    config = client.meta.config
+    assert config.tcp_keepalive is True
+    assert config.retries["mode"] == "adaptive"
+    assert config.connect_timeout == 1
+    assert config.read_timeout == 5
+    assert config.user_agent_extra == os.environ["USER_AGENT_STRING"]
+
+    default_config = get_client("iot", region_name="us-east-1").meta.config
+    assert default_config.connect_timeout == 5
+    assert default_config.max_pool_connections == 25
+
+
+def test_prewarm_clients_only_during_lambda_init() -> None:
+    with patch.dict(os.environ, {}, clear=False):
+        os.environ.pop(LAMBDA_INITIALIZATION_TYPE_ENV_VAR, None)
+        prewarm_clients(["sns"], region_name="us-east-1")
+        assert not get_client_stats()
+
+        os.environ[LAMBDA_INITIALIZATION_TYPE_ENV_VAR] = "on-demand"
+        prewarm_clients(["sns"], region_name="us-east-1")
+
+    assert [stats.service_name for stats in get_client_stats().values()] == ["sns"]
+
+
+def test_prewarm_clients_swallows_errors() -> None:
+    with patch.dict(os.environ, {LAMBDA_INITIALIZATION_TYPE_ENV_VAR: "on-demand"}):
+        prewarm_clients(["not-a-service"], region_name="us-east-1")
+
+    assert not get_client_stats()
+
+
+def test_get_client_stats_reports_connection_reuse() -> None:
+    client = get_client("sns", region_name="us-east-1")
+    pool = SimpleNamespace(num_requests=10, num_connections=2)
+    with patch.object(
+        client._endpoint.http_session,  # pylint: disable=protected-access
+        "_manager",
+        SimpleNamespace(pools={"sns.us-east-1.amazonaws.com": pool}),
+    ):
+        stats = get_client_stats()[
+            ("sns", os.environ["USER_AGENT_STRING"], "us-east-1")
+        ]
+
+    assert stats.requests == 10
+    assert stats.new_connections == 2
+    assert stats.reused_connections == 8
@@ -3,7 +3,9 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
+from decimal import Decimal
 from typing import Any, Dict
+from unittest.mock import MagicMock
 
 # Third Party Libraries
 import pytest
@@ -11,9 +13,16 @@ from moto import mock_aws
 
 # AWS Libraries
 import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 
 # Connected Mobility Solution on AWS
-from ..dynamo_crud import DynHelpers
+from ..dynamo_crud import (
+    DynBatchGetIncompleteError,
+    DynHelpers,
+    decode_cursor,
+    encode_cursor,
+)
 
 
 @mock_aws
@@ -75,6 +84,118 @@ def test_dyn_batch_get(dynamodb_table: str) -> None:
     assert len(response[dynamodb_table]) == 2
 
 
+def test_dyn_batch_get_items(dynamodb_table: str) -> None:
+    dynamodb = boto3.resource("dynamodb")
+    with dynamodb.Table(dynamodb_table).batch_writer() as batch:
+        for index in range(3, 250):
+            batch.put_item(Item={"id": f"test_id_{index}", "test_val": str(index)})
+
+    keys = [{"id": f"test_id_{index}"} for index in range(1, 250)]
+    keys += [{"id": "test_id_1"}, {"id": "missing_id"}]
+    items = DynHelpers.dyn_batch_get_items(dynamodb_table, keys)
+
+    assert len(items) == len(keys)
+    assert [item["id"] for item in items[:249]] == [key["id"] for key in keys[:249]]
+    # One entry per requested key, duplicates as separate copies
+    assert items[249] == items[0]
+    assert items[249] is not items[0]
+    assert items[250] is None
+
+
+def test_dyn_batch_get_duplicate_keys(dynamodb_table: str) -> None:
+    keys = ["test_id_1", "test_id_2", "test_id_1"]
+    batch_keys = {dynamodb_table: {"Keys": [{"id": key} for key in keys]}}
+    response = DynHelpers.dyn_batch_get(batch_keys)
+    assert sorted(item["id"] for item in response[dynamodb_table]) == [
+        "test_id_1",
+        "test_id_2",
+    ]
+
+
+def test_dyn_batch_get_items_retries_unprocessed_keys(mocker: MagicMock) -> None:
+    key = {"id": "test_id_1"}
+    mocked_resource = MagicMock()
+    mocked_resource.batch_get_item.side_effect = [
+        {"Responses": {}, "UnprocessedKeys": {"test_table": {"Keys": [key]}}},
+        {"Responses": {"test_table": [{"id": "test_id_1"}]}, "UnprocessedKeys": {}},
+    ]
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocked_sleep = mocker.patch("time.sleep")
+
+    items = DynHelpers.dyn_batch_get_items("test_table", [key])
+
+    assert items == [{"id": "test_id_1"}]
+    assert mocked_resource.batch_get_item.call_count == 2
+    mocked_sleep.assert_called_once()
+
+
+def test_dyn_batch_get_items_respects_deadline(mocker: MagicMock) -> None:
+    key = {"id": "test_id_1"}
+    mocked_resource = MagicMock()
+    mocked_resource.batch_get_item.return_value = {
+        "Responses": {},
+        "UnprocessedKeys": {"test_table": {"Keys": [key]}},
+    }
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocked_sleep = mocker.patch("time.sleep")
+
+    with pytest.raises(DynBatchGetIncompleteError) as err:
+        DynHelpers.dyn_batch_get_items("test_table", [key], lambda: 100)
+
+    assert err.value.unprocessed_keys == [key]
+    mocked_sleep.assert_not_called()
+
+
+def test_dyn_batch_get_items_stops_after_last_attempt(mocker: MagicMock) -> None:
+    key = {"id": "test_id_1"}
+    mocked_resource = MagicMock()
+    mocked_resource.batch_get_item.return_value = {
+        "Responses": {},
+        "UnprocessedKeys": {"test_table": {"Keys": [key]}},
+    }
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocked_sleep = mocker.patch("time.sleep")
+
+    with pytest.raises(DynBatchGetIncompleteError) as err:
+        DynHelpers.dyn_batch_get_items("test_table", [key])
+
+    assert err.value.unprocessed_keys == [key]
+    assert (
+        mocked_resource.batch_get_item.call_count == DynHelpers.MAX_BATCH_GET_ATTEMPTS
+    )
+    assert mocked_sleep.call_count == DynHelpers.MAX_BATCH_GET_ATTEMPTS - 1
+
+
+def test_dyn_batch_get_items_retries_throttled_chunks(mocker: MagicMock) -> None:
+    key = {"id": "test_id_1"}
+    mocked_resource = MagicMock()
+    mocked_resource.batch_get_item.side_effect = [
+        ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+            "BatchGetItem",
+        ),
+        {"Responses": {"test_table": [key]}, "UnprocessedKeys": {}},
+    ]
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocker.patch("time.sleep")
+
+    assert DynHelpers.dyn_batch_get_items("test_table", [key]) == [key]
+    assert mocked_resource.batch_get_item.call_count == 2
+
+
+def test_dyn_batch_get_items_raises_client_errors(mocker: MagicMock) -> None:
+    mocked_resource = MagicMock()
+    mocked_resource.batch_get_item.side_effect = ClientError(
+        {"Error": {"Code": "ValidationException", "Message": "test"}},
+        "BatchGetItem",
+    )
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+
+    with pytest.raises(ClientError):
+        DynHelpers.dyn_batch_get_items("test_table", [{"id": "test_id_1"}])
+    mocked_resource.batch_get_item.assert_called_once()
+
+
 def test_dyn_scan(dynamodb_table: str) -> None:
     items = DynHelpers.dyn_scan(table=dynamodb_table, Limit=1)
     assert len(list(items)) == 2
@@ -108,6 +229,94 @@ def test_dyn_batch_write(dynamodb_table: str) -> None:
     assert response[dynamodb_table][1]["test_val"] == "test_val_4"
 
 
+def test_dyn_batch_write_items(dynamodb_table: str) -> None:
+    items = [{"id": f"test_write_{index}"} for index in range(60)]
+
+    assert not DynHelpers.dyn_batch_write_items(dynamodb_table, items)
+
+    written = DynHelpers.dyn_batch_get_items(
+        dynamodb_table, [{"id": item["id"]} for item in items]
+    )
+    assert written == items
+
+
+def test_dyn_batch_write_items_retries_unprocessed_items(mocker: MagicMock) -> None:
+    items = [{"id": "test_id_1"}, {"id": "test_id_2"}]
+    mocked_resource = MagicMock()
+    mocked_resource.batch_write_item.side_effect = [
+        {"UnprocessedItems": {"test_table": [{"PutRequest": {"Item": items[1]}}]}},
+        {"UnprocessedItems": {}},
+    ]
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocked_sleep = mocker.patch("time.sleep")
+
+    assert not DynHelpers.dyn_batch_write_items("test_table", items)
+    assert mocked_resource.batch_write_item.call_count == 2
+    mocked_sleep.assert_called_once()
+
+
+def test_dyn_batch_write_items_returns_unwritten_items(mocker: MagicMock) -> None:
+    items = [{"id": "test_id_1"}, {"id": "test_id_2"}]
+    mocked_resource = MagicMock()
+    mocked_resource.batch_write_item.return_value = {
+        "UnprocessedItems": {"test_table": [{"PutRequest": {"Item": items[1]}}]}
+    }
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocked_sleep = mocker.patch("time.sleep")
+
+    assert DynHelpers.dyn_batch_write_items("test_table", items, lambda: 100) == [
+        items[1]
+    ]
+    mocked_sleep.assert_not_called()
+
+
+def test_dyn_batch_write_items_stops_after_last_attempt(mocker: MagicMock) -> None:
+    items = [{"id": "test_id_1"}]
+    mocked_resource = MagicMock()
+    mocked_resource.batch_write_item.return_value = {
+        "UnprocessedItems": {"test_table": [{"PutRequest": {"Item": items[0]}}]}
+    }
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocked_sleep = mocker.patch("time.sleep")
+
+    assert DynHelpers.dyn_batch_write_items("test_table", items) == items
+    assert (
+        mocked_resource.batch_write_item.call_count
+        == DynHelpers.MAX_BATCH_WRITE_ATTEMPTS
+    )
+    assert mocked_sleep.call_count == DynHelpers.MAX_BATCH_WRITE_ATTEMPTS - 1
+
+
+def test_dyn_batch_write_items_retries_throttled_chunks(mocker: MagicMock) -> None:
+    items = [{"id": "test_id_1"}, {"id": "test_id_2"}]
+    mocked_resource = MagicMock()
+    mocked_resource.batch_write_item.side_effect = [
+        ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+            "BatchWriteItem",
+        ),
+        {"UnprocessedItems": {}},
+    ]
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+    mocker.patch("time.sleep")
+
+    assert not DynHelpers.dyn_batch_write_items("test_table", items)
+    assert mocked_resource.batch_write_item.call_count == 2
+
+
+def test_dyn_batch_write_items_raises_client_errors(mocker: MagicMock) -> None:
+    mocked_resource = MagicMock()
+    mocked_resource.batch_write_item.side_effect = ClientError(
+        {"Error": {"Code": "ValidationException", "Message": "test"}},
+        "BatchWriteItem",
+    )
+    mocker.patch.object(DynHelpers, "dyn_thread_resource", return_value=mocked_resource)
+
+    with pytest.raises(ClientError):
+        DynHelpers.dyn_batch_write_items("test_table", [{"id": "test_id_1"}])
+    mocked_resource.batch_write_item.assert_called_once()
+
+
 def test_dyn_batch_delete(dynamodb_table: str) -> None:
     items = [
         {
@@ -141,3 +350,163 @@ def test_dyn_query(dynamodb_table: str) -> None:
     assert len(response) == 1
     assert response[0]["id"] == "test_id_1"
     assert response[0]["test_val"] == "test_val_1"
+
+
+def test_get_all_parallel(dynamodb_table: str) -> None:
+    items = DynHelpers.get_all(table=dynamodb_table, total_segments=4, Limit=1)
+    assert sorted(item["id"] for item in items) == ["test_id_1", "test_id_2"]
+
+
+def test_dyn_parallel_scan_preserve_order(dynamodb_table: str) -> None:
+    dynamodb = boto3.resource("dynamodb")
+    for index in range(3, 30):
+        dynamodb.Table(dynamodb_table).put_item(
+            Item={"id": f"test_id_{index}", "test_val": f"test_val_{index}"}
+        )
+
+    segment_items = [
+        sorted(
+            item["id"]
+            for item in dynamodb.Table(dynamodb_table).scan(
+                Segment=segment, TotalSegments=3
+            )["Items"]
+        )
+        for segment in range(3)
+    ]
+    pages = DynHelpers.dyn_parallel_scan(
+        table=dynamodb_table,
+        total_segments=3,
+        preserve_order=True,
+        max_buffered_pages=1,
+        Limit=2,
+    )
+    items = [item["id"] for page in pages for item in page]
+
+    assert len(items) == 29
+    offset = 0
+    for expected in segment_items:
+        assert sorted(items[offset : offset + len(expected)]) == expected
+        offset += len(expected)
+
+
+def test_dyn_parallel_scan_early_close(dynamodb_table: str) -> None:
+    pages = DynHelpers.dyn_parallel_scan(
+        table=dynamodb_table, total_segments=2, max_buffered_pages=1, Limit=1
+    )
+    assert isinstance(next(pages), list)
+    pages.close()
+
+
+def test_dyn_parallel_scan_from_worker_pool(dynamodb_table: str) -> None:
+    # Scans started from every worker of the shared pool must not wait on it
+    worker_pool = DynHelpers.get_worker_pool()
+    futures = [
+        worker_pool.submit(
+            DynHelpers.get_all, table=dynamodb_table, total_segments=2, Limit=1
+        )
+        for _ in range(DynHelpers.MAX_WORKERS)
+    ]
+    for future in futures:
+        assert len(future.result(timeout=30)) == 2
+
+
+def test_dyn_parallel_scan_pooled_client(
+    dynamodb_table: str, mocker: MagicMock
+) -> None:
+    thread_resource = mocker.spy(DynHelpers, "dyn_thread_resource")
+    items = DynHelpers.get_all(
+        table=dynamodb_table,
+        total_segments=2,
+        FilterExpression="test_val = :test_val",
+        ExpressionAttributeValues={":test_val": "test_val_1"},
+        ProjectionExpression="id",
+    )
+    assert items == [{"id": "test_id_1"}]
+    thread_resource.assert_not_called()
+
+
+def test_dyn_parallel_scan_error(dynamodb_table: str) -> None:
+    with pytest.raises(ClientError):
+        list(DynHelpers.dyn_parallel_scan(table="missing_table", total_segments=2))
+
+
+@pytest.fixture(name="dynamodb_composite_table")
+def fixture_dynamodb_composite_table(dynamodb_table: str) -> str:
+    table_name = "test_composite_table"
+    dynamodb = boto3.resource("dynamodb")
+    dynamodb.create_table(
+        AttributeDefinitions=[
+            {"AttributeName": "vin", "AttributeType": "S"},
+            {"AttributeName": "seq", "AttributeType": "N"},
+        ],
+        TableName=table_name,
+        KeySchema=[
+            {"AttributeName": "vin", "KeyType": "HASH"},
+            {"AttributeName": "seq", "KeyType": "RANGE"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    with dynamodb.Table(table_name).batch_writer() as batch:
+        for vin in ("vin_a", "vin_b", "vin_c"):
+            for seq in range(10):
+                batch.put_item(Item={"vin": vin, "seq": seq, "val": f"{vin}_{seq}"})
+    return table_name
+
+
+def test_dyn_query_follows_pagination(dynamodb_composite_table: str) -> None:
+    items = DynHelpers.dyn_query(
+        table_name=dynamodb_composite_table,
+        key_condition_expression="vin=:vin",
+        expression_attribute_values={":vin": "vin_a"},
+        scan_index_forward=False,
+    )
+    assert [item["seq"] for item in items] == list(range(9, -1, -1))
+
+
+def test_dyn_query_pages_resume_from_cursor(dynamodb_composite_table: str) -> None:
+    query_kwargs: Dict[str, Any] = {
+        "table_name": dynamodb_composite_table,
+        "key_condition_expression": Key("vin").eq("vin_b"),
+        "projection_attributes": ["seq"],
+        "page_size": 3,
+    }
+    first_page = next(DynHelpers.dyn_query_pages(**query_kwargs))
+    assert [item["seq"] for item in first_page.items] == [0, 1, 2]
+    assert first_page.items[0] == {"seq": 0}
+    assert first_page.cursor
+
+    resumed = DynHelpers.dyn_query_pages(
+        **query_kwargs, cursor=first_page.cursor, limit=5
+    )
+    assert [item["seq"] for page in resumed for item in page.items] == [3, 4, 5, 6, 7]
+
+
+def test_dyn_query_fan_out(dynamodb_composite_table: str) -> None:
+    pages = DynHelpers.dyn_query_fan_out(
+        dynamodb_composite_table,
+        "vin",
+        ["vin_c", "vin_a", "vin_c", "vin_missing"],
+        sort_key_condition=Key("seq").lt(5),
+        preserve_order=True,
+        Limit=2,
+    )
+    items = [item["val"] for page in pages for item in page]
+    assert items == [f"vin_c_{seq}" for seq in range(5)] + [
+        f"vin_a_{seq}" for seq in range(5)
+    ]
+
+    # Without preserve_order the pages of all partitions are interleaved
+    pages = DynHelpers.dyn_query_fan_out(
+        dynamodb_composite_table, "vin", ["vin_a", "vin_b", "vin_a"], Limit=2
+    )
+    items = [item["val"] for page in pages for item in page]
+    assert sorted(items) == sorted(
+        f"{vin}_{seq}" for vin in ("vin_a", "vin_b") for seq in range(10)
+    )
+
+
+def test_query_cursor_round_trip() -> None:
+    key = {"vin": "vin_a", "seq": Decimal(4), "blob": b"bytes"}
+    assert decode_cursor(encode_cursor(key)) == key
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
@@ -3,4 +3,5 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Connected Mobility Solution on AWS
-from .ttl_cache import get_ttl_cache_check
+from .token_cache import TokenCache
+from .ttl_cache import TTLCache, TTLCacheInfo, config_ttl_cache, ttl_cache
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+from unittest.mock import patch
+
+# Connected Mobility Solution on AWS
+from ..token_cache import TokenCache
+
+
+def test_token_cache_entries_expire_at_their_timestamp() -> None:
+    token_cache: TokenCache[bool] = TokenCache(maxsize=2)
+    with patch("time.time", return_value=100):
+        token_cache.put("first", True, expires_at=150)
+        token_cache.put("second", True, expires_at=200)
+        token_cache.put("third", True, expires_at=200)
+        assert token_cache.get("first") is None  # Evicted as least recently used
+        assert token_cache.get("second") is True
+
+    with patch("time.time", return_value=200):
+        assert token_cache.get("second") is None
+    assert len(token_cache) == 1
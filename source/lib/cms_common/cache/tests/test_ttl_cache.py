@@ -3,20 +3,120 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
-from time import sleep
+from typing import Generator, List
+from unittest.mock import MagicMock
+
+# Third Party Libraries
+import pytest
 
 # Connected Mobility Solution on AWS
-from ..ttl_cache import get_ttl_cache_check
+from ..ttl_cache import ttl_cache
+
+
+class MockClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(mocker: MagicMock) -> Generator[MockClock, None, None]:
+    clock = MockClock()
+    mocker.patch("time.monotonic", clock.monotonic)
+    yield clock
+
+
+def test_ttl_cache_hit_and_expiry(clock: MockClock) -> None:
+    calls: List[str] = []
+
+    @ttl_cache(ttl_in_seconds=10)
+    def load(name: str) -> str:
+        calls.append(name)
+        return f"{name}-{len(calls)}"
+
+    assert load("a") == "a-1"
+    assert load("a") == "a-1"
+    clock.now += 11
+    assert load("a") == "a-2"
+
+    cache_info = load.cache_info()
+    assert (cache_info.hits, cache_info.misses, cache_info.expirations) == (1, 2, 1)
+
+
+def test_ttl_cache_lru_eviction(clock: MockClock) -> None:
+    @ttl_cache(ttl_in_seconds=10, maxsize=2)
+    def load(name: str) -> str:
+        return name
+
+    load("a")
+    load("b")
+    load("a")
+    load("c")
+
+    assert load.cache_info().evictions == 1
+    assert not load.cache_invalidate("b")
+    assert load.cache_invalidate("a")
+    assert load.cache_info().currsize == 1
+
+
+def test_ttl_cache_jitter(clock: MockClock, mocker: MagicMock) -> None:
+    mocker.patch("random.uniform", return_value=5)
+    load = ttl_cache(ttl_in_seconds=10, jitter_in_seconds=5)(MagicMock(return_value=1))
+
+    load()
+    clock.now += 14
+    load()
+    clock.now += 2
+    load()
+
+    assert load.cache_info().hits == 1
+    assert load.cache_info().misses == 2
+
+
+def test_ttl_cache_stale_while_revalidate(clock: MockClock, mocker: MagicMock) -> None:
+    mocked_thread = mocker.patch("threading.Thread")
+    values = iter(["first", "second"])
+    load = ttl_cache(ttl_in_seconds=10, stale_while_revalidate_in_seconds=5)(
+        lambda: next(values)
+    )
+
+    assert load() == "first"
+    clock.now += 12
+    assert load() == "first"
+    assert load() == "first"
+    mocked_thread.assert_called_once()
+
+    # Run the background refresh inline
+    refresh_kwargs = mocked_thread.call_args.kwargs
+    refresh_kwargs["target"](*refresh_kwargs["args"])
+    assert load() == "second"
+    assert load.cache_info().stale_hits == 2
+
+
+def test_ttl_cache_negative_caching(clock: MockClock) -> None:
+    load = MagicMock(side_effect=[ValueError("missing"), "found"])
+    cached_load = ttl_cache(
+        ttl_in_seconds=10,
+        negative_ttl_in_seconds=2,
+        negative_exceptions=(ValueError,),
+    )(load)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cached_load()
+    clock.now += 3
 
+    assert cached_load() == "found"
+    assert load.call_count == 2
+    assert cached_load.cache_info().negative_hits == 1
 
-def test_get_ttl_cache_check_hit() -> None:
-    ttl_cache_check_one = get_ttl_cache_check(ttl_in_seconds=5)
-    ttl_cache_check_two = get_ttl_cache_check(ttl_in_seconds=5)
-    assert ttl_cache_check_two - ttl_cache_check_one == 0
 
+def test_ttl_cache_clear(clock: MockClock) -> None:
+    load = ttl_cache()(MagicMock(return_value=1))
+    load(1, key="value")
+    load.cache_clear()
 
-def test_get_ttl_cache_check_miss() -> None:
-    ttl_cache_check_one = get_ttl_cache_check(ttl_in_seconds=2)
-    sleep(2)
-    ttl_cache_check_two = get_ttl_cache_check(ttl_in_seconds=2)
-    assert ttl_cache_check_two - ttl_cache_check_one == 1
+    assert load.cache_info().currsize == 0
+    assert load.cache_info().misses == 0
@@ -3,10 +3,228 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
+import random
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import update_wrapper
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+# AWS Libraries
+from aws_lambda_powertools import Logger
+
+logger = Logger()
 
 TEN_MINUTES_IN_SECONDS = 600
+ONE_MINUTE_IN_SECONDS = 60
+FIVE_SECONDS = 5
+DEFAULT_MAX_SIZE = 128
+
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class TTLCacheInfo:
+    hits: int
+    misses: int
+    stale_hits: int
+    negative_hits: int
+    evictions: int
+    expirations: int
+    currsize: int
+    maxsize: int
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expires_at: float
+    # Set when the entry caches a raised exception rather than a value
+    error: Optional[BaseException] = None
+    refreshing: bool = False
+
+
+class TTLCache(Generic[R]):
+    """
+    Thread safe LRU cache for a function where every entry expires after a TTL.
+
+    Unlike lru_cache combined with a TTL-bucket argument evaluated at import,
+    expiry is tracked per entry against the monotonic clock, so warm containers
+    pick up rotated values on schedule. Jitter spreads expiry of entries loaded
+    together so containers do not all refresh at once. Within the
+    stale-while-revalidate window after expiry the stale value is returned
+    while one background thread reloads it. Exceptions listed in
+    negative_exceptions are cached for negative_ttl_in_seconds and re-raised.
+    """
+
+    def __init__(
+        self,
+        function: Callable[..., R],
+        ttl_in_seconds: float,
+        maxsize: int,
+        jitter_in_seconds: float,
+        stale_while_revalidate_in_seconds: float,
+        negative_ttl_in_seconds: float,
+        negative_exceptions: Tuple[type[BaseException], ...],
+    ) -> None:
+        self._function = function
+        self._ttl_in_seconds = ttl_in_seconds
+        self._maxsize = maxsize
+        self._jitter_in_seconds = jitter_in_seconds
+        self._stale_while_revalidate_in_seconds = stale_while_revalidate_in_seconds
+        self._negative_ttl_in_seconds = negative_ttl_in_seconds
+        self._negative_exceptions = negative_exceptions
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._counters: Dict[str, int] = dict.fromkeys(
+            (
+                "hits",
+                "misses",
+                "stale_hits",
+                "negative_hits",
+                "evictions",
+                "expirations",
+            ),
+            0,
+        )
+        update_wrapper(self, function)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> R:
+        key = self._make_key(args, kwargs)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires_at:
+                self._entries.move_to_end(key)
+                if entry.error is not None:
+                    self._counters["negative_hits"] += 1
+                    raise entry.error
+                self._counters["hits"] += 1
+                return entry.value  # type: ignore[no-any-return]
+
+            if (
+                entry is not None
+                and entry.error is None
+                and now < entry.expires_at + self._stale_while_revalidate_in_seconds
+            ):
+                self._entries.move_to_end(key)
+                self._counters["stale_hits"] += 1
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    threading.Thread(
+                        target=self._refresh, args=(key, args, kwargs), daemon=True
+                    ).start()
+                return entry.value  # type: ignore[no-any-return]
+
+            if entry is not None:
+                self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+
+        return self._load(key, args, kwargs)
+
+    def cache_info(self) -> TTLCacheInfo:
+        with self._lock:
+            return TTLCacheInfo(
+                **self._counters, currsize=len(self._entries), maxsize=self._maxsize
+            )
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
+
+    def cache_invalidate(self, *args: Any, **kwargs: Any) -> bool:
+        with self._lock:
+            return self._entries.pop(self._make_key(args, kwargs), None) is not None
+
+    def _load(self, key: Hashable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> R:
+        try:
+            value = self._function(*args, **kwargs)
+        except self._negative_exceptions as err:
+            if self._negative_ttl_in_seconds > 0:
+                self._store(
+                    key,
+                    _CacheEntry(
+                        value=None,
+                        expires_at=time.monotonic() + self._negative_ttl_in_seconds,
+                        error=err,
+                    ),
+                )
+            raise
+
+        self._store(key, _CacheEntry(value=value, expires_at=self._next_expiry()))
+        return value
+
+    def _refresh(
+        self, key: Hashable, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> None:
+        try:
+            value = self._function(*args, **kwargs)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Keep serving the stale value until the window closes, then the next
+            # caller loads synchronously and sees the error
+            logger.warning(
+                "Background refresh of %s failed.",
+                getattr(self._function, "__qualname__", self._function),
+                exc_info=True,
+            )
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+            return
+
+        self._store(key, _CacheEntry(value=value, expires_at=self._next_expiry()))
+
+    def _store(self, key: Hashable, entry: _CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _next_expiry(self) -> float:
+        jitter = random.uniform(0, self._jitter_in_seconds)  # nosec
+        return time.monotonic() + self._ttl_in_seconds + jitter
+
+    @staticmethod
+    def _make_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+        return (args, tuple(sorted(kwargs.items())))
+
+
+def ttl_cache(
+    ttl_in_seconds: float = TEN_MINUTES_IN_SECONDS,
+    maxsize: int = DEFAULT_MAX_SIZE,
+    jitter_in_seconds: float = 0,
+    stale_while_revalidate_in_seconds: float = 0,
+    negative_ttl_in_seconds: float = 0,
+    negative_exceptions: Tuple[type[BaseException], ...] = (Exception,),
+) -> Callable[[Callable[..., R]], TTLCache[R]]:
+    def decorator(function: Callable[..., R]) -> TTLCache[R]:
+        return TTLCache(
+            function,
+            ttl_in_seconds=ttl_in_seconds,
+            maxsize=maxsize,
+            jitter_in_seconds=jitter_in_seconds,
+            stale_while_revalidate_in_seconds=stale_while_revalidate_in_seconds,
+            negative_ttl_in_seconds=negative_ttl_in_seconds,
+            negative_exceptions=negative_exceptions,
+        )
+
+    return decorator
 
 
-def get_ttl_cache_check(ttl_in_seconds: int = TEN_MINUTES_IN_SECONDS) -> int:
-    return round(time.time() / ttl_in_seconds)
+def config_ttl_cache(
+    maxsize: int = DEFAULT_MAX_SIZE,
+) -> Callable[[Callable[..., R]], TTLCache[R]]:
+    # Shared settings for caching SSM and Secrets Manager backed configuration
+    return ttl_cache(
+        ttl_in_seconds=TEN_MINUTES_IN_SECONDS,
+        maxsize=maxsize,
+        jitter_in_seconds=ONE_MINUTE_IN_SECONDS,
+        stale_while_revalidate_in_seconds=ONE_MINUTE_IN_SECONDS,
+        negative_ttl_in_seconds=FIVE_SECONDS,
+    )
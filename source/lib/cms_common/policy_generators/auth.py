@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+
+# AWS Libraries
+from aws_cdk import Stack, aws_iam
+from constructs import Construct
+
+# Connected Mobility Solution on AWS
+from ..config.resource_names import remove_leading_slash
+from ..config.ssm import resolve_ssm_parameter
+from ..resource_names.auth import AuthSetupResourceNames
+
+
+def generate_idp_config_read_policy_document(
+    self: Construct, identity_provider_id: str
+) -> aws_iam.PolicyDocument:
+    # Grants what cms_common.auth.auth_configs.get_idp_config needs to read the IdP config
+    auth_setup_resource_names = AuthSetupResourceNames.from_identity_provider_id(
+        identity_provider_id
+    )
+    return aws_iam.PolicyDocument(
+        statements=[
+            aws_iam.PolicyStatement(
+                effect=aws_iam.Effect.ALLOW,
+                actions=["secretsmanager:GetSecretValue"],
+                resources=[
+                    resolve_ssm_parameter(
+                        auth_setup_resource_names.idp_config_secret_arn_ssm_parameter
+                    )
+                ],
+            ),
+            aws_iam.PolicyStatement(
+                effect=aws_iam.Effect.ALLOW,
+                actions=["ssm:GetParameter"],
+                resources=[
+                    Stack.of(self).format_arn(
+                        service="ssm",
+                        resource="parameter",
+                        resource_name=remove_leading_slash(
+                            auth_setup_resource_names.idp_config_secret_arn_ssm_parameter
+                        ),  # Leading slash must not be present on SSM IAM permissions
+                    ),
+                ],
+            ),
+        ]
+    )
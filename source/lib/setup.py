@@ -49,6 +49,8 @@ setup(
     install_requires=[
         "aws-lambda-powertools[tracer,validation]>=3.3.0",
         "cattrs>=22.1.0",
+        "pyjwt[crypto]>=2.8.0",
+        "requests>=2.32.4",
         "toml>=0.10.2",
     ],
     name="cms_common",
@@ -3,23 +3,21 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
-import json
 import os
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict
+from typing import Any, Dict
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
-if TYPE_CHECKING:
-    # Third Party Libraries
-    from mypy_boto3_lambda import LambdaClient
-else:
-    LambdaClient = object
+# CMS Common Library
+from cms_common.auth.token_validation import (
+    MAX_AUTHORIZER_RESULT_TTL_IN_SECONDS,
+    get_authorizer_result_ttl_in_seconds,
+    get_resolver_context,
+    validate_token_from_environment,
+)
 
 tracer = Tracer()
 logger = Logger()
@@ -27,40 +25,35 @@ logger = Logger()
 AUTHORIZATION_HEADER_PREFIX = "Bearer"
 
 
-@lru_cache(maxsize=128)
-def get_lambda_client() -> LambdaClient:
-    return boto3.client(
-        "lambda", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
-
-
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
 def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
-    response = {
+    # ttlOverride lets AppSync cache the result for as long as the token stays valid,
+    # errors are not cached
+    response: Dict[str, Any] = {
         "isAuthorized": False,
+        "ttlOverride": 0,
     }
 
     try:
         token = get_token(event["authorizationToken"])
 
-        # Call token validation lambda
-        token_validation_response = get_lambda_client().invoke(
-            FunctionName=os.environ["TOKEN_VALIDATION_LAMBDA_ARN"],
-            InvocationType="RequestResponse",
-            Payload=json.dumps(
-                {
-                    "Token": token,
-                }
+        # Validated in-process, or by the token validation lambda in remote mode
+        token_validation_result = validate_token_from_environment(token)
+
+        response["isAuthorized"] = token_validation_result.validated
+        response["ttlOverride"] = get_authorizer_result_ttl_in_seconds(
+            token_validation_result,
+            max_ttl_in_seconds=int(
+                os.environ.get(
+                    "MAX_AUTHORIZER_RESULT_TTL_IN_SECONDS",
+                    MAX_AUTHORIZER_RESULT_TTL_IN_SECONDS,
+                )
             ),
         )
-
-        token_validation_response_payload = json.loads(
-            token_validation_response["Payload"].read().decode("utf-8")
-        )
-
-        response["isAuthorized"] = token_validation_response_payload["validated"]
-        logger.info(token_validation_response_payload["message"])
+        if token_validation_result.validated:
+            response["resolverContext"] = get_resolver_context(token_validation_result)
+        logger.info(token_validation_result.message)
 
     except (ValueError, ClientError, KeyError):
         logger.error("Error validating token", exc_info=True)
@@ -4,7 +4,8 @@
 
 # Standard Library
 import os
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Tuple
 
 # AWS Libraries
 from aws_lambda_powertools import Logger, Tracer
@@ -19,22 +20,60 @@ from .lib.sqs_record_schema import from_sqs_record_dict
 tracer = Tracer()
 logger = Logger()
 
+# Timestamps within a batch are spaced apart so that alerts for the same topic
+# keep distinct keys, BatchWriteItem rejects a request with duplicate keys
+TIMESTAMP_STEP_IN_SECONDS = 0.000001
+
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
-def handler(event: Dict[str, Any], context: LambdaContext) -> None:
-    try:
-        records = event["Records"]
-        for record in records:
+def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Write a batch of SQS alert records to the notifications table.
+
+    Returns the message ids of records that could not be parsed or written as
+    batchItemFailures, so SQS only redelivers those.
+    """
+    batch_item_failures: List[str] = []
+    items: List[Dict[str, Any]] = []
+    message_ids: Dict[Tuple[str, str], str] = {}
+    batch_timestamp = time.time()
+
+    for index, record in enumerate(event["Records"]):
+        try:
             sanitized_record = from_sqs_record_dict(record)
-            DynHelpers.put_item(
-                os.environ["NOTIFICATIONS_TABLE_NAME"],
-                item={
-                    "topic": f"{os.environ['SNS_TOPIC_PREFIX']}-{sanitized_record.body.message.alarm_type}-{sanitized_record.body.message.vin}",
-                    "message": sanitized_record.body.message.message,
-                    "read": False,
-                },
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.error(
+                f"Error encountered while processing message {record['messageId']}",
+                exc_info=True,
             )
-    except Exception as err:  # pylint: disable=broad-exception-caught
-        logger.error("Error encountered while processing message", exc_info=True)
-        raise err
+            batch_item_failures.append(record["messageId"])
+            continue
+
+        item = {
+            "topic": f"{os.environ['SNS_TOPIC_PREFIX']}-{sanitized_record.body.message.alarm_type}-{sanitized_record.body.message.vin}",
+            "timestamp": str(batch_timestamp + index * TIMESTAMP_STEP_IN_SECONDS),
+            "message": sanitized_record.body.message.message,
+            "read": False,
+            # Published as message attributes in the alarm type fan-out mode
+            "vin": sanitized_record.body.message.vin,
+            "alarm_type": sanitized_record.body.message.alarm_type,
+        }
+        items.append(item)
+        message_ids[(item["topic"], item["timestamp"])] = record["messageId"]
+
+    unwritten_items = DynHelpers.dyn_batch_write_items(
+        os.environ["NOTIFICATIONS_TABLE_NAME"],
+        items,
+        context.get_remaining_time_in_millis,
+    )
+    for item in unwritten_items:
+        message_id = message_ids[(item["topic"], item["timestamp"])]
+        logger.error(f"Could not write notification of message {message_id}")
+        batch_item_failures.append(message_id)
+
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_id} for message_id in batch_item_failures
+        ]
+    }
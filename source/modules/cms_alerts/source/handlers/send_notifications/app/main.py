@@ -4,14 +4,19 @@
 
 # Standard Library
 import os
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, cast
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
+from botocore.exceptions import ClientError
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
+from cms_common.cache.ttl_cache import TEN_MINUTES_IN_SECONDS, ttl_cache
 
 # Connected Mobility Solution on AWS
 from .lib.dynamo_stream_schema import from_ddb_stream_record
@@ -26,30 +31,258 @@ else:
 tracer = Tracer()
 logger = Logger()
 
+MAX_ENTRIES_PER_PUBLISH_BATCH = 10
+MAX_PUBLISH_WORKERS = 8
+MAX_CACHED_TOPICS = 1024
+
+# In the alarm type fan-out mode notifications are published to one topic per
+# alarm type, with the VIN as a message attribute that subscription filter
+# policies match on
+ALARM_TYPE_TOPIC_FAN_OUT_MODE = "ALARM_TYPE_TOPIC"
+
+
+class Notification(NamedTuple):
+    sequence_number: str
+    message: str
+    vin: Optional[str]
+
+
+class Topic(NamedTuple):
+    name: str
+    is_alarm_type_topic: bool = False
+    # Set for a per VIN topic left from the per VIN fan-out mode, whose name is
+    # then the name of its alarm type topic
+    legacy_vin: Optional[str] = None
+
+
+class LegacyTopicNotFoundError(Exception):
+    pass
+
+
+class FirstFailure:
+    """
+    Earliest record of the batch that could not be published, shared by the
+    threads publishing to each topic.
+    """
+
+    def __init__(self, sequence_numbers: List[str]) -> None:
+        self._positions = {
+            sequence_number: position
+            for position, sequence_number in enumerate(sequence_numbers)
+        }
+        self._lock = threading.Lock()
+        self.sequence_number: Optional[str] = None
+
+    def precedes(self, sequence_number: str) -> bool:
+        return (
+            self.sequence_number is not None
+            and self._positions[self.sequence_number] < self._positions[sequence_number]
+        )
+
+    def update(self, sequence_number: str) -> None:
+        with self._lock:
+            if (
+                self.sequence_number is None
+                or self._positions[sequence_number]
+                < self._positions[self.sequence_number]
+            ):
+                self.sequence_number = sequence_number
+
 
-@lru_cache(maxsize=128)
 def get_sns_client() -> SNSClient:
-    return boto3.client(
-        "sns", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
+    return cast(SNSClient, get_client("sns"))
+
+
+prewarm_clients(["sns"])
+
+
+def is_alarm_type_fan_out_enabled() -> bool:
+    return os.environ.get("SNS_FAN_OUT_MODE") == ALARM_TYPE_TOPIC_FAN_OUT_MODE
+
+
+@ttl_cache(maxsize=MAX_CACHED_TOPICS)
+def get_topic_arn(topic_name: str) -> str:
+    # Creating a topic is idempotent and returns the ARN of an existing one, so
+    # a warm container creates each topic once rather than once per message
+    return get_sns_client().create_topic(
+        Name=topic_name,
+        Tags=[{"Key": "AlertsUUID", "Value": os.environ["DEPLOYMENT_UUID"]}],
+    )["TopicArn"]
+
+
+@ttl_cache(maxsize=MAX_CACHED_TOPICS)
+def get_alarm_type_topic_arn(topic_name: str) -> str:
+    # Same attributes as when created by the user subscriptions function, SNS
+    # rejects creating an existing topic with different ones
+    return get_sns_client().create_topic(
+        Name=topic_name,
+        Tags=[{"Key": "AlertsUUID", "Value": os.environ["DEPLOYMENT_UUID"]}],
+        Attributes={"KmsMasterKeyId": os.environ["SNS_TOPIC_GENERAL_KEY_ID"]},
+    )["TopicArn"]
+
+
+@ttl_cache(
+    maxsize=MAX_CACHED_TOPICS,
+    negative_ttl_in_seconds=TEN_MINUTES_IN_SECONDS,
+    negative_exceptions=(LegacyTopicNotFoundError,),
+)
+def get_legacy_topic_arn(alarm_type_topic_name: str, vin: str) -> str:
+    # Per VIN topics are no longer created, but existing ones are published to
+    # until their subscriptions are migrated and they are deleted
+    topic_arn = f"{get_alarm_type_topic_arn(alarm_type_topic_name)}-{vin}"
+    sns_client = get_sns_client()
+    try:
+        sns_client.get_topic_attributes(TopicArn=topic_arn)
+    except sns_client.exceptions.NotFoundException as err:
+        raise LegacyTopicNotFoundError(topic_arn) from err
+    return topic_arn
+
+
+def resolve_topic_arn(topic: Topic) -> str:
+    if topic.legacy_vin is not None:
+        return get_legacy_topic_arn(topic.name, topic.legacy_vin)
+    if topic.is_alarm_type_topic:
+        return get_alarm_type_topic_arn(topic.name)
+    return get_topic_arn(topic.name)
+
+
+def invalidate_topic_arn(topic: Topic) -> None:
+    if topic.legacy_vin is not None:
+        get_legacy_topic_arn.cache_invalidate(topic.name, topic.legacy_vin)
+    elif topic.is_alarm_type_topic:
+        get_alarm_type_topic_arn.cache_invalidate(topic.name)
+    else:
+        get_topic_arn.cache_invalidate(topic.name)
+
+
+def get_topics(notification: Dict[str, Any]) -> List[Topic]:
+    # Notifications written before the alarm type fan-out mode carry no VIN
+    if not is_alarm_type_fan_out_enabled() or "vin" not in notification:
+        return [Topic(notification["topic"])]
+
+    alarm_type_topic_name = (
+        f"{os.environ['SNS_TOPIC_PREFIX']}-{notification['alarm_type']}"
     )
+    return [
+        Topic(alarm_type_topic_name, is_alarm_type_topic=True),
+        Topic(alarm_type_topic_name, legacy_vin=notification["vin"]),
+    ]
 
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
-def handler(event: Dict[str, Any], context: LambdaContext) -> None:
-    try:
-        for record in event["Records"]:
-            sanitized_record = from_ddb_stream_record(record)
-            notification = sanitized_record.dynamodb.new_image
-            topic = get_sns_client().create_topic(  # idempotent
-                Name=notification["topic"],
-                Tags=[{"Key": "AlertsUUID", "Value": os.environ["DEPLOYMENT_UUID"]}],
+def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Publish a batch of notification stream records to their SNS topics.
+
+    Records are grouped by topic and published with PublishBatch, one thread per
+    topic. In the alarm type fan-out mode a record is published to its alarm
+    type topic, and to its per VIN topic while that still exists. The stream is
+    retried from the first record that could not be published, so it is the
+    only one returned as batchItemFailures and no later record is published.
+    Records that cannot be read are logged and skipped, as no retry can
+    publish them.
+    """
+    sequence_numbers = [
+        record["dynamodb"]["SequenceNumber"] for record in event["Records"]
+    ]
+    notifications_by_topic: Dict[Topic, List[Notification]] = {}
+
+    for sequence_number, record in zip(sequence_numbers, event["Records"]):
+        try:
+            notification = from_ddb_stream_record(record).dynamodb.new_image
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.error(
+                f"Skipping unreadable notification record {sequence_number}",
+                exc_info=True,
             )
+            continue
+        for topic in get_topics(notification):
+            notifications_by_topic.setdefault(topic, []).append(
+                Notification(
+                    sequence_number, notification["message"], notification.get("vin")
+                )
+            )
+
+    first_failure = FirstFailure(sequence_numbers)
+    with ThreadPoolExecutor(max_workers=MAX_PUBLISH_WORKERS) as worker_pool:
+        # Consumed so that errors of the publishing threads are raised
+        list(
+            worker_pool.map(
+                partial(publish_notifications, first_failure=first_failure),
+                notifications_by_topic.keys(),
+                notifications_by_topic.values(),
+            )
+        )
 
-            get_sns_client().publish(
-                Message=notification["message"],
-                TopicArn=topic["TopicArn"],
+    if first_failure.sequence_number is None:
+        return {"batchItemFailures": []}
+    return {"batchItemFailures": [{"itemIdentifier": first_failure.sequence_number}]}
+
+
+def publish_notifications(
+    topic: Topic, notifications: List[Notification], first_failure: FirstFailure
+) -> None:
+    """
+    Publish the notifications of one topic in stream order, up to the first
+    notification that failed on any topic.
+    """
+    for index in range(0, len(notifications), MAX_ENTRIES_PER_PUBLISH_BATCH):
+        batch = [
+            notification
+            for notification in notifications[
+                index : index + MAX_ENTRIES_PER_PUBLISH_BATCH
+            ]
+            if not first_failure.precedes(notification.sequence_number)
+        ]
+        if not batch:
+            return
+        try:
+            failed_entries = publish_batch(topic, batch)
+        except LegacyTopicNotFoundError:
+            # Its subscriptions were migrated to the alarm type topic
+            return
+        except ClientError:
+            logger.error(
+                f"Error while trying to publish notifications to {topic.name}",
+                exc_info=True,
             )
-    except Exception as err:
-        logger.error(msg="Error while trying to publish notification", exc_info=True)
-        raise err
+            failed_entries = list(range(len(batch)))
+        if failed_entries:
+            first_failure.update(batch[min(failed_entries)].sequence_number)
+            return
+
+
+def get_publish_batch_entry(entry: int, notification: Notification) -> Dict[str, Any]:
+    publish_batch_entry: Dict[str, Any] = {
+        "Id": str(entry),
+        "Message": notification.message,
+    }
+    if notification.vin is not None:
+        publish_batch_entry["MessageAttributes"] = {
+            "vin": {"DataType": "String", "StringValue": notification.vin}
+        }
+    return publish_batch_entry
+
+
+def publish_batch(topic: Topic, batch: List[Notification]) -> List[int]:
+    entries: List[Any] = [
+        get_publish_batch_entry(entry, notification)
+        for entry, notification in enumerate(batch)
+    ]
+    try:
+        response = get_sns_client().publish_batch(
+            TopicArn=resolve_topic_arn(topic), PublishBatchRequestEntries=entries
+        )
+    except get_sns_client().exceptions.NotFoundException:
+        # The cached topic was deleted since, so it is resolved again
+        invalidate_topic_arn(topic)
+        response = get_sns_client().publish_batch(
+            TopicArn=resolve_topic_arn(topic), PublishBatchRequestEntries=entries
+        )
+
+    for failed_entry in response.get("Failed", []):
+        logger.error(
+            f"Could not publish notification to {topic.name}: {failed_entry.get('Message')}"
+        )
+    return [int(failed_entry["Id"]) for failed_entry in response.get("Failed", [])]
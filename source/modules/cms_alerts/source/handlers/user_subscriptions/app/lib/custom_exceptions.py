@@ -5,3 +5,7 @@
 
 class InvalidAlarmsError(Exception):
     pass
+
+
+class FanOutModeError(Exception):
+    pass
@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import json
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, cast
+
+# AWS Libraries
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client
+from cms_common.boto3_wrappers.dynamo_crud import DynHelpers
+
+# Connected Mobility Solution on AWS
+from .custom_exceptions import InvalidAlarmsError
+
+if TYPE_CHECKING:
+    # Third Party Libraries
+    from mypy_boto3_sns.client import SNSClient
+else:
+    SNSClient = object
+
+logger = Logger()
+
+# SNS calls in flight at once. Throttled calls are retried by the adaptive retry
+# mode of the shared client, which also slows the client down to the rate SNS
+# accepts.
+MAX_CONCURRENT_SUBSCRIPTION_CHANGES = 10
+
+# In the alarm type fan-out mode a user has one subscription per alarm type
+# topic, whose filter policy lists the subscribed VINs. SNS allows at most 150
+# values in a filter policy.
+ALARM_TYPE_TOPIC_FAN_OUT_MODE = "ALARM_TYPE_TOPIC"
+MAX_FILTER_POLICY_VINS = 150
+
+# Topic key, outcome and the subscription table write that records it
+SubscriptionWrite = Tuple[str, "SubscriptionOutcome", Dict[str, Any]]
+# Requested alarm and its current subscription, keyed by topic key
+SubscriptionChanges = Dict[str, Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]
+
+
+class SubscriptionOutcome(Enum):
+    SUBSCRIBED = "SUBSCRIBED"
+    UNSUBSCRIBED = "UNSUBSCRIBED"
+    UNCHANGED = "UNCHANGED"
+    FAILED = "FAILED"
+
+
+def get_sns_client() -> SNSClient:
+    return cast(SNSClient, get_client("sns"))
+
+
+def is_alarm_type_fan_out_enabled() -> bool:
+    return os.environ.get("SNS_FAN_OUT_MODE") == ALARM_TYPE_TOPIC_FAN_OUT_MODE
+
+
+def get_topic_key(alarm: Dict[str, Any]) -> str:
+    # Names the per VIN topic of the alarm, and keys its subscription item in
+    # either fan-out mode
+    return f"{os.environ['SNS_TOPIC_PREFIX']}-{alarm['alarm_type']}-{alarm['vin']}"
+
+
+def get_alarm_type_topic_name(alarm_type: str) -> str:
+    return f"{os.environ['SNS_TOPIC_PREFIX']}-{alarm_type}"
+
+
+def is_per_vin_subscription(subscription: Dict[str, Any]) -> bool:
+    # The topic name is the sixth field of a subscription ARN
+    return subscription.get("subscription_arn", "").split(":")[5:6] == [
+        subscription["topic_key"]
+    ]
+
+
+def reconcile_subscriptions(
+    email: str,
+    alarms: List[Dict[str, Any]],
+    current_subscriptions: Dict[str, Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Bring the email subscriptions of a user in line with the requested alarms.
+
+    Only alarms whose email_enabled flag differs from the current subscriptions
+    keyed by topic key cause SNS calls, which run concurrently, per alarm in the
+    per VIN fan-out mode and per alarm type in the alarm type fan-out mode. The
+    subscription table is written in batches as the SNS calls complete. Returns
+    the outcome of every requested alarm, in request order.
+    """
+    desired_subscriptions = {get_topic_key(alarm): alarm for alarm in alarms}
+    outcomes = {
+        topic_key: get_alarm_outcome(alarm, SubscriptionOutcome.UNCHANGED)
+        for topic_key, alarm in desired_subscriptions.items()
+    }
+    changes: SubscriptionChanges = {
+        topic_key: (alarm, current_subscriptions.get(topic_key))
+        for topic_key, alarm in desired_subscriptions.items()
+        if alarm["email_enabled"] != (topic_key in current_subscriptions)
+    }
+
+    pending_writes: List[SubscriptionWrite] = []
+    with ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_SUBSCRIPTION_CHANGES
+    ) as worker_pool:
+        futures: Dict[Future[List[SubscriptionWrite]], List[str]] = {}
+        if is_alarm_type_fan_out_enabled():
+            for alarm_type in {alarm["alarm_type"] for alarm, _ in changes.values()}:
+                alarm_type_changes = {
+                    topic_key: change
+                    for topic_key, change in changes.items()
+                    if change[0]["alarm_type"] == alarm_type
+                }
+                alarm_type_subscriptions = [
+                    subscription
+                    for subscription in current_subscriptions.values()
+                    if subscription["alarm_type"] == alarm_type
+                ]
+                future = worker_pool.submit(
+                    apply_alarm_type_subscription_changes,
+                    email,
+                    alarm_type,
+                    alarm_type_changes,
+                    alarm_type_subscriptions,
+                )
+                futures[future] = list(alarm_type_changes)
+        else:
+            for topic_key, (alarm, current) in changes.items():
+                future = worker_pool.submit(
+                    apply_subscription_change, email, topic_key, alarm, current
+                )
+                futures[future] = [topic_key]
+
+        for future in as_completed(futures):
+            try:
+                pending_writes.extend(future.result())
+            except (ClientError, InvalidAlarmsError) as err:
+                logger.error(
+                    f"Could not update subscriptions to {futures[future]}",
+                    exc_info=True,
+                )
+                error = (
+                    err.response["Error"]["Message"]
+                    if isinstance(err, ClientError)
+                    else str(err)
+                )
+                for topic_key in futures[future]:
+                    outcomes[topic_key] = get_alarm_outcome(
+                        desired_subscriptions[topic_key],
+                        SubscriptionOutcome.FAILED,
+                        error,
+                    )
+                continue
+
+            while len(pending_writes) >= DynHelpers.MAX_ITEM_PER_BATCH_IN_BATCH_WRITE:
+                write_subscriptions(
+                    pending_writes[: DynHelpers.MAX_ITEM_PER_BATCH_IN_BATCH_WRITE],
+                    desired_subscriptions,
+                    outcomes,
+                )
+                pending_writes = pending_writes[
+                    DynHelpers.MAX_ITEM_PER_BATCH_IN_BATCH_WRITE :
+                ]
+
+    write_subscriptions(pending_writes, desired_subscriptions, outcomes)
+    return list(outcomes.values())
+
+
+def apply_subscription_change(
+    email: str,
+    topic_key: str,
+    alarm: Dict[str, Any],
+    current_subscription: Optional[Dict[str, Any]],
+) -> List[SubscriptionWrite]:
+    if current_subscription is None:
+        subscription_arn = get_sns_client().subscribe(
+            TopicArn=create_topic(topic_key),
+            Protocol="email",
+            Endpoint=email,
+            ReturnSubscriptionArn=True,
+        )["SubscriptionArn"]
+        return [
+            (
+                topic_key,
+                SubscriptionOutcome.SUBSCRIBED,
+                get_subscription_put(email, alarm, topic_key, subscription_arn),
+            )
+        ]
+
+    unsubscribe(current_subscription["subscription_arn"])
+    return [
+        (
+            topic_key,
+            SubscriptionOutcome.UNSUBSCRIBED,
+            get_subscription_delete(email, topic_key),
+        )
+    ]
+
+
+def apply_alarm_type_subscription_changes(
+    email: str,
+    alarm_type: str,
+    changes: SubscriptionChanges,
+    subscriptions: List[Dict[str, Any]],
+) -> List[SubscriptionWrite]:
+    """
+    Apply the changes to the subscriptions of one alarm type.
+
+    VINs are added to or removed from the filter policy of the alarm type topic
+    subscription, which is created with the first VIN and removed with the
+    last. Per VIN subscriptions not migrated yet are unsubscribed directly.
+    """
+    alarm_type_subscriptions = [
+        subscription
+        for subscription in subscriptions
+        if not is_per_vin_subscription(subscription)
+    ]
+    subscription_arn = (
+        alarm_type_subscriptions[0]["subscription_arn"]
+        if alarm_type_subscriptions
+        else None
+    )
+    vins = {subscription["vin"] for subscription in alarm_type_subscriptions}
+
+    updated_vins = set(vins)
+    per_vin_subscription_arns: List[str] = []
+    subscribed_alarms: Dict[str, Dict[str, Any]] = {}
+    writes: List[SubscriptionWrite] = []
+    for topic_key, (alarm, current) in changes.items():
+        if current is None:
+            subscribed_alarms[topic_key] = alarm
+            updated_vins.add(alarm["vin"])
+            continue
+
+        if is_per_vin_subscription(current):
+            per_vin_subscription_arns.append(current["subscription_arn"])
+        else:
+            updated_vins.discard(alarm["vin"])
+            if current.get("legacy_subscription_arn"):
+                per_vin_subscription_arns.append(current["legacy_subscription_arn"])
+        writes.append(
+            (
+                topic_key,
+                SubscriptionOutcome.UNSUBSCRIBED,
+                get_subscription_delete(email, topic_key),
+            )
+        )
+
+    subscription_arn = update_alarm_type_subscription(
+        email, alarm_type, subscription_arn, vins, updated_vins
+    )
+    for per_vin_subscription_arn in per_vin_subscription_arns:
+        unsubscribe(per_vin_subscription_arn)
+
+    return writes + [
+        (
+            topic_key,
+            SubscriptionOutcome.SUBSCRIBED,
+            get_subscription_put(email, alarm, topic_key, subscription_arn),
+        )
+        for topic_key, alarm in subscribed_alarms.items()
+    ]
+
+
+def update_alarm_type_subscription(
+    email: str,
+    alarm_type: str,
+    subscription_arn: Optional[str],
+    current_vins: Set[str],
+    vins: Set[str],
+) -> Optional[str]:
+    # Returns the subscription ARN, None once no VIN is left
+    if vins == current_vins:
+        return subscription_arn
+    if len(vins) > MAX_FILTER_POLICY_VINS:
+        raise InvalidAlarmsError(
+            f"At most {MAX_FILTER_POLICY_VINS} vehicles can be subscribed to per alarm type"
+        )
+
+    if not vins:
+        if subscription_arn is not None:
+            unsubscribe(subscription_arn)
+        return None
+
+    filter_policy = json.dumps({"vin": sorted(vins)})
+    if subscription_arn is None:
+        return get_sns_client().subscribe(
+            TopicArn=create_topic(get_alarm_type_topic_name(alarm_type)),
+            Protocol="email",
+            Endpoint=email,
+            Attributes={"FilterPolicy": filter_policy},
+            ReturnSubscriptionArn=True,
+        )["SubscriptionArn"]
+
+    get_sns_client().set_subscription_attributes(
+        SubscriptionArn=subscription_arn,
+        AttributeName="FilterPolicy",
+        AttributeValue=filter_policy,
+    )
+    return subscription_arn
+
+
+def migrate_subscriptions(
+    email: str, current_subscriptions: Dict[str, Dict[str, Any]]
+) -> None:
+    """
+    Move the per VIN topic subscriptions of a user to alarm type topics.
+
+    The VINs of per VIN subscriptions are added to the filter policy of the
+    alarm type subscription and the per VIN subscriptions are removed in the
+    same step, so no alert reaches the user through both. A new alarm type
+    subscription has to be confirmed before the user receives alerts again.
+    Items left with a legacy_subscription_arn by earlier runs are cleaned up
+    as well. Safe to run repeatedly until no per VIN subscription is left.
+    """
+    writes: List[Dict[str, Any]] = []
+    for alarm_type in {
+        subscription["alarm_type"] for subscription in current_subscriptions.values()
+    }:
+        writes.extend(
+            migrate_alarm_type_subscriptions(
+                email,
+                alarm_type,
+                [
+                    subscription
+                    for subscription in current_subscriptions.values()
+                    if subscription["alarm_type"] == alarm_type
+                ],
+            )
+        )
+
+    for index in range(0, len(writes), DynHelpers.MAX_ITEM_PER_BATCH_IN_BATCH_WRITE):
+        DynHelpers.dyn_batch_write(
+            os.environ["USER_EMAIL_SUBSCRIPTIONS_TABLE"],
+            writes[index : index + DynHelpers.MAX_ITEM_PER_BATCH_IN_BATCH_WRITE],
+        )
+
+
+def migrate_alarm_type_subscriptions(
+    email: str, alarm_type: str, subscriptions: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    per_vin_subscriptions = [
+        subscription
+        for subscription in subscriptions
+        if is_per_vin_subscription(subscription)
+    ]
+    alarm_type_subscriptions = [
+        subscription
+        for subscription in subscriptions
+        if not is_per_vin_subscription(subscription)
+    ]
+    if not per_vin_subscriptions and not any(
+        subscription.get("legacy_subscription_arn")
+        for subscription in alarm_type_subscriptions
+    ):
+        return []
+
+    subscription_arn = (
+        alarm_type_subscriptions[0]["subscription_arn"]
+        if alarm_type_subscriptions
+        else None
+    )
+    if per_vin_subscriptions:
+        vins = {subscription["vin"] for subscription in alarm_type_subscriptions}
+        subscription_arn = update_alarm_type_subscription(
+            email,
+            alarm_type,
+            subscription_arn,
+            vins,
+            vins.union(subscription["vin"] for subscription in per_vin_subscriptions),
+        )
+        alarm_type_subscriptions += [
+            {
+                **subscription,
+                "subscription_arn": subscription_arn,
+                "legacy_subscription_arn": subscription["subscription_arn"],
+            }
+            for subscription in per_vin_subscriptions
+        ]
+
+    writes: List[Dict[str, Any]] = []
+    for subscription in alarm_type_subscriptions:
+        if not subscription.get("legacy_subscription_arn"):
+            continue
+        unsubscribe(subscription["legacy_subscription_arn"])
+        writes.append(
+            get_subscription_put(
+                email,
+                subscription,
+                subscription["topic_key"],
+                subscription["subscription_arn"],
+            )
+        )
+    return writes
+
+
+def create_topic(topic_name: str) -> str:
+    return get_sns_client().create_topic(
+        Name=topic_name,
+        Tags=[{"Key": "AlertsUUID", "Value": os.environ["DEPLOYMENT_UUID"]}],
+        Attributes={"KmsMasterKeyId": os.environ["SNS_TOPIC_GENERAL_KEY_ID"]},
+    )["TopicArn"]
+
+
+def unsubscribe(subscription_arn: str) -> None:
+    if not subscription_arn:
+        return
+    try:
+        get_sns_client().unsubscribe(SubscriptionArn=subscription_arn)
+    except get_sns_client().exceptions.NotFoundException:
+        logger.info(f"Subscription {subscription_arn} was already removed")
+
+
+def get_subscription_put(
+    email: str,
+    alarm: Dict[str, Any],
+    topic_key: str,
+    subscription_arn: Optional[str],
+) -> Dict[str, Any]:
+    item = {
+        "email": email,
+        "subscription_arn": subscription_arn,
+        "vin": alarm["vin"],
+        "alarm_type": alarm["alarm_type"],
+        "topic_key": topic_key,
+    }
+    return {"operation": "PUT", "item": item}
+
+
+def get_subscription_delete(email: str, topic_key: str) -> Dict[str, Any]:
+    return {"operation": "DELETE", "key": {"email": email, "topic_key": topic_key}}
+
+
+def write_subscriptions(
+    writes: List[SubscriptionWrite],
+    desired_subscriptions: Dict[str, Dict[str, Any]],
+    outcomes: Dict[str, Dict[str, Any]],
+) -> None:
+    if not writes:
+        return
+
+    try:
+        DynHelpers.dyn_batch_write(
+            os.environ["USER_EMAIL_SUBSCRIPTIONS_TABLE"],
+            [batch_item for _, _, batch_item in writes],
+        )
+    except Exception:  # pylint: disable=broad-exception-caught
+        # dyn_batch_write logs the error
+        for topic_key, _, _ in writes:
+            outcomes[topic_key] = get_alarm_outcome(
+                desired_subscriptions[topic_key],
+                SubscriptionOutcome.FAILED,
+                "Could not record the subscription change",
+            )
+        return
+
+    for topic_key, outcome, _ in writes:
+        outcomes[topic_key] = get_alarm_outcome(
+            desired_subscriptions[topic_key], outcome
+        )
+
+
+def get_alarm_outcome(
+    alarm: Dict[str, Any],
+    outcome: SubscriptionOutcome,
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    return {
+        "vin": alarm["vin"],
+        "alarm_type": alarm["alarm_type"],
+        "outcome": outcome.value,
+        "error": error,
+    }
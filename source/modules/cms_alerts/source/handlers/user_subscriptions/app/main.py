@@ -4,38 +4,38 @@
 
 # Standard Library
 import os
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Union
 
 # Third Party Libraries
 import humps
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
+from botocore.exceptions import ClientError
 
 # CMS Common Library
+from cms_common.boto3_wrappers.client_pool import prewarm_clients
 from cms_common.boto3_wrappers.dynamo_crud import DynHelpers
 
-if TYPE_CHECKING:
-    # Third Party Libraries
-    from mypy_boto3_sns.client import SNSClient
-    from mypy_boto3_sns.type_defs import CreateTopicResponseTypeDef
-else:
-    SNSClient = object
-    CreateTopicResponseTypeDef = Dict[str, Any]
+# Connected Mobility Solution on AWS
+from .lib.custom_exceptions import FanOutModeError, InvalidAlarmsError
+from .lib.subscription_reconciler import (
+    MAX_CONCURRENT_SUBSCRIPTION_CHANGES,
+    is_alarm_type_fan_out_enabled,
+    is_per_vin_subscription,
+    migrate_subscriptions,
+    reconcile_subscriptions,
+)
 
 tracer = Tracer()
 logger = Logger()
 
+# Users migrated per invocation of migrateUserSubscriptions
+MIGRATION_BATCH_SIZE = 100
 
-@lru_cache(maxsize=128)
-def get_sns_client() -> SNSClient:
-    return boto3.client(
-        "sns", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+prewarm_clients(["sns"])
 
 
 @logger.inject_lambda_context
@@ -46,6 +46,8 @@ def handler(
     operations = {
         "getUserSubscriptions": get_user_subscriptions,
         "updateUserSubscriptions": update_user_subscriptions,
+        # Not part of the API, invoked directly to migrate subscriptions
+        "migrateUserSubscriptions": migrate_user_subscriptions,
     }
     try:
         arguments = humps.decamelize(event["arguments"])
@@ -66,71 +68,79 @@ def handler(
 
 
 @tracer.capture_method
-def update_user_subscriptions(arguments: Dict[str, Any]) -> bool:
+def update_user_subscriptions(arguments: Dict[str, Any]) -> Dict[str, Any]:
     email = arguments["email"]
-    alarms = arguments["alarms"]
 
     # get current user subscriptions with subscription arns
     user_subscriptions = get_user_subscriptions_with_subscription_arns(email)
-
-    # create dictionaries for fast look up
-    new_subscriptions = {
-        f"{os.environ['SNS_TOPIC_PREFIX']}-{alarm['alarm_type']}-{alarm['vin']}": alarm
-        for alarm in alarms
-    }
-    old_subscriptions = {
+    current_subscriptions = {
         alarm["topic_key"]: alarm for alarm in user_subscriptions["alarms"]
     }
 
-    # empty updated items list
-    update_batches: List[List[Dict[str, Any]]] = [[]]
+    alarm_outcomes = reconcile_subscriptions(
+        email, arguments["alarms"], current_subscriptions
+    )
 
-    for topic_name in new_subscriptions:
-        new_subscription = new_subscriptions[topic_name]
-        old_subscription = old_subscriptions.get(topic_name, None)
+    return humps.camelize({"email": email, "alarms": alarm_outcomes})
 
-        topic_arn = get_sns_client().create_topic(
-            Name=f"{os.environ['SNS_TOPIC_PREFIX']}-{new_subscription['alarm_type']}-{new_subscription['vin']}",
-            Tags=[{"Key": "AlertsUUID", "Value": os.environ["DEPLOYMENT_UUID"]}],
-            Attributes={"KmsMasterKeyId": os.environ["SNS_TOPIC_GENERAL_KEY_ID"]},
-        )["TopicArn"]
 
-        item = update_subscriptions_and_return_updated_item(
-            email, new_subscription, old_subscription, topic_arn
+@tracer.capture_method
+def migrate_user_subscriptions(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move a batch of users from per VIN topics to alarm type topics.
+
+    Per VIN subscriptions are replaced right away, users receive alerts again
+    once they confirm a new alarm type subscription. Invoked repeatedly until
+    no user is left to migrate.
+    """
+    if not is_alarm_type_fan_out_enabled():
+        raise FanOutModeError(
+            "Subscriptions can only be migrated in the ALARM_TYPE_TOPIC fan-out mode"
         )
 
-        # add item to update_batches if item is not None
-        if item:
-            # if the last list in update_batche is not at max capacity then
-            if len(update_batches[-1]) < DynHelpers.MAX_ITEM_PER_BATCH_IN_BATCH_WRITE:
-                # append the new item to the last list
-                update_batches[-1].append(item)
-            else:
-                # create a new list and add this item
-                update_batches.append([item])
-
-    # for each list in updated_items we batch write them to dynamodb
-    for batch in update_batches:
-        if len(batch) > 0:
-            DynHelpers.dyn_batch_write(
-                os.environ["USER_EMAIL_SUBSCRIPTIONS_TABLE"], batch
+    emails = list(
+        dict.fromkeys(
+            item["email"]
+            for item in DynHelpers.get_all(
+                table=os.environ["USER_EMAIL_SUBSCRIPTIONS_TABLE"],
+                ProjectionExpression="email, topic_key, subscription_arn, legacy_subscription_arn",
             )
-
-    return True
+            if is_per_vin_subscription(item) or item.get("legacy_subscription_arn")
+        )
+    )
+    batch = emails[: arguments.get("max_users", MIGRATION_BATCH_SIZE)]
+
+    failed_users = 0
+    with ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_SUBSCRIPTION_CHANGES
+    ) as worker_pool:
+        futures = {worker_pool.submit(migrate_user, email): email for email in batch}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except (ClientError, InvalidAlarmsError):
+                logger.error(
+                    f"Could not migrate subscriptions of {futures[future]}",
+                    exc_info=True,
+                )
+                failed_users += 1
+
+    return humps.camelize(
+        {
+            "users_to_migrate": len(emails),
+            "processed_users": len(batch) - failed_users,
+            "failed_users": failed_users,
+        }
+    )
 
 
 @tracer.capture_method
 def get_user_subscriptions(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    user_subscription_items = DynHelpers.dyn_query(
+    user_subscription_items = DynHelpers.dyn_query_items(
         table_name=os.environ["USER_EMAIL_SUBSCRIPTIONS_TABLE"],
         key_condition_expression="email=:email",
-        projection_expression="#E, #V, #A",
-        expression_attribute_names={
-            "#E": "email",
-            "#V": "vin",
-            "#A": "alarm_type",
-        },
         expression_attribute_values={":email": arguments["email"]},
+        projection_attributes=["email", "vin", "alarm_type"],
     )
 
     alarms = list(
@@ -149,10 +159,17 @@ def get_user_subscriptions(arguments: Dict[str, Any]) -> Dict[str, Any]:
 # -------------------- Additional Helper Functions -----------------------------
 @tracer.capture_method
 def get_user_subscriptions_with_subscription_arns(email: str) -> Dict[str, Any]:
-    user_subscription_items = DynHelpers.dyn_query(
+    user_subscription_items = DynHelpers.dyn_query_items(
         table_name=os.environ["USER_EMAIL_SUBSCRIPTIONS_TABLE"],
         key_condition_expression="email=:email",
         expression_attribute_values={":email": email},
+        projection_attributes=[
+            "vin",
+            "alarm_type",
+            "subscription_arn",
+            "topic_key",
+            "legacy_subscription_arn",
+        ],
     )
     alarms = list(
         map(
@@ -161,6 +178,12 @@ def get_user_subscriptions_with_subscription_arns(email: str) -> Dict[str, Any]:
                 "alarm_type": item["alarm_type"],
                 "subscription_arn": item.get("subscription_arn", ""),
                 "topic_key": item["topic_key"],
+                # Per VIN subscription kept while migrating to an alarm type topic
+                **(
+                    {"legacy_subscription_arn": item["legacy_subscription_arn"]}
+                    if item.get("legacy_subscription_arn")
+                    else {}
+                ),
             },
             user_subscription_items,
         ),
@@ -169,53 +192,8 @@ def get_user_subscriptions_with_subscription_arns(email: str) -> Dict[str, Any]:
     return {"email": email, "alarms": alarms}
 
 
-@tracer.capture_method
-def update_subscriptions_and_return_updated_item(
-    email: str,
-    new_subscription: Dict[str, Any],
-    old_subscription: Optional[Dict[str, Any]],
-    topic_arn: str,
-) -> Optional[Dict[str, Any]]:
-    topic_key = f"{os.environ['SNS_TOPIC_PREFIX']}-{new_subscription['alarm_type']}-{new_subscription['vin']}"
-    # now we check if the new alarm is trying to enable or disable email notifcations
-    item = None
-    if (
-        old_subscription is None and new_subscription["email_enabled"]
-    ):  # old alarm does not exist and user wants to subscribe
-        # to enable it we subscribe to it and add its subscription_arn to updated alarm
-        subscription_arn = get_sns_client().subscribe(
-            TopicArn=topic_arn,
-            Protocol="email",
-            Endpoint=email,
-            ReturnSubscriptionArn=True,
-        )["SubscriptionArn"]
-
-        # this is the new item to be written to dynamodb
-        item = {
-            "operation": "PUT",
-            "item": {
-                "email": email,
-                "subscription_arn": subscription_arn,
-                "vin": new_subscription["vin"],
-                "alarm_type": new_subscription["alarm_type"],
-                "topic_key": topic_key,
-            },
-        }
-    elif (
-        old_subscription and not new_subscription["email_enabled"]
-    ):  # old alarm exists and user wants to subscribe
-        # to disable it we look at the old alarm object and using that subscription arn we unsubscribe
-        get_sns_client().unsubscribe(
-            SubscriptionArn=old_subscription["subscription_arn"]
-        )
-
-        # this is the new item to be written to dynamodb
-        item = {
-            "operation": "DELETE",
-            "key": {
-                "email": email,
-                "topic_key": topic_key,
-            },
-        }
-
-    return item
+def migrate_user(email: str) -> None:
+    user_subscriptions = get_user_subscriptions_with_subscription_arns(email)
+    migrate_subscriptions(
+        email, {alarm["topic_key"]: alarm for alarm in user_subscriptions["alarms"]}
+    )
@@ -121,6 +121,7 @@ class CmsAlertsConstruct(Construct):
             solution_config_inputs=solution_config_inputs,
             dependency_layer=lambda_dependencies_construct.dependency_layer,
             token_validation_lambda_arn=module_inputs_construct.token_validation_lambda_arn,
+            identity_provider_id=module_inputs_construct.identity_provider_id,
             vpc_construct=vpc_construct,
         )
 
@@ -132,6 +133,7 @@ class CmsAlertsConstruct(Construct):
             dependency_layer=lambda_dependencies_construct.dependency_layer,
             deployment_uuid=deployment_uuid,
             sns_topic_prefix=module_inputs_construct.sns_topic_prefix,
+            sns_fan_out_mode=module_inputs_construct.sns_fan_out_mode,
             vpc_construct=vpc_construct,
         )
 
@@ -144,6 +146,7 @@ class CmsAlertsConstruct(Construct):
             deployment_uuid=deployment_uuid,
             user_subscription_topic_general_key_id=user_subscriptions_construct.user_subscription_topic_general_key.key_id,
             sns_topic_prefix=module_inputs_construct.sns_topic_prefix,
+            sns_fan_out_mode=module_inputs_construct.sns_fan_out_mode,
             vpc_construct=vpc_construct,
         )
 
@@ -71,6 +71,7 @@ class IncomingAlertsConstruct(Construct):
                                 effect=aws_iam.Effect.ALLOW,
                                 actions=[
                                     "dynamodb:PutItem",
+                                    "dynamodb:BatchWriteItem",
                                 ],
                                 resources=[
                                     Stack.of(self).format_arn(
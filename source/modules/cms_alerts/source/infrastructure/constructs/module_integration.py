@@ -14,6 +14,7 @@ from cms_common.config.resource_names import ResourceName, ResourcePrefix
 from cms_common.config.ssm import resolve_ssm_parameter
 from cms_common.config.stack_inputs import SolutionConfigInputs
 from cms_common.constructs.app_unique_id import AppUniqueId
+from cms_common.constructs.identity_provider_config import IdentityProviderConfig
 from cms_common.constructs.vpc_construct import create_vpc_config, get_vpc_name
 from cms_common.resource_names.auth import AuthResourceNames
 
@@ -24,6 +25,10 @@ class ModuleInputsConstruct(Construct):
 
         self.app_unique_id = AppUniqueId.create_cfn_parameter(Stack.of(self))
 
+        self.identity_provider_id = IdentityProviderConfig.get_identity_provider_id(
+            scope=self, app_unique_id=self.app_unique_id
+        )
+
         self.sns_topic_prefix = CfnParameter(
             Stack.of(self),
             "SnsTopicPrefix",
@@ -34,6 +39,17 @@ class ModuleInputsConstruct(Construct):
             default="CMS",
         ).value_as_string
 
+        self.sns_fan_out_mode = CfnParameter(
+            Stack.of(self),
+            "SnsFanOutMode",
+            type="String",
+            description="PER_VIN_TOPIC creates an SNS topic per alarm type and vehicle. "
+            "ALARM_TYPE_TOPIC publishes to one topic per alarm type, whose email "
+            "subscriptions filter on the vehicle.",
+            allowed_values=["PER_VIN_TOPIC", "ALARM_TYPE_TOPIC"],
+            default="PER_VIN_TOPIC",
+        ).value_as_string
+
         self.vpc_config = create_vpc_config(
             vpc_name=get_vpc_name(self, app_unique_id=self.app_unique_id)
         )
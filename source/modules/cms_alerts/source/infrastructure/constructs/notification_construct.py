@@ -30,6 +30,9 @@ from cms_common.policy_generators.cloudwatch import (
 from cms_common.policy_generators.ec2_vpc import generate_ec2_vpc_policy
 from cms_common.policy_generators.kms import generate_kms_policy_statement_from_key_id
 
+NOTIFICATIONS_BATCH_SIZE = 100
+NOTIFICATIONS_MAX_BATCHING_WINDOW_SECONDS = 1
+
 
 class NotificationConstruct(Construct):
     def __init__(
@@ -42,6 +45,7 @@ class NotificationConstruct(Construct):
         deployment_uuid: str,
         user_subscription_topic_general_key_id: str,
         sns_topic_prefix: str,
+        sns_fan_out_mode: str,
         vpc_construct: VpcConstruct,
         **kwargs: Any,
     ) -> None:
@@ -97,6 +101,7 @@ class NotificationConstruct(Construct):
                             effect=aws_iam.Effect.ALLOW,
                             actions=[
                                 "sns:CreateTopic",
+                                "sns:GetTopicAttributes",
                                 "sns:Publish",
                                 "sns:TagResource",
                             ],
@@ -169,6 +174,9 @@ class NotificationConstruct(Construct):
             environment={
                 "USER_AGENT_STRING": solution_config_inputs.get_user_agent_string(),
                 "DEPLOYMENT_UUID": deployment_uuid,
+                "SNS_TOPIC_PREFIX": sns_topic_prefix,
+                "SNS_TOPIC_GENERAL_KEY_ID": user_subscription_topic_general_key_id,
+                "SNS_FAN_OUT_MODE": sns_fan_out_mode,
             },
             handler="app.main.handler",
             runtime=aws_lambda.Runtime.PYTHON_3_12,
@@ -194,7 +202,11 @@ class NotificationConstruct(Construct):
             target=self.send_notifications_lambda,
             event_source_arn=self.notifications_table.table_stream_arn,
             starting_position=aws_lambda.StartingPosition.TRIM_HORIZON,
-            batch_size=1,
+            batch_size=NOTIFICATIONS_BATCH_SIZE,
+            max_batching_window=Duration.seconds(
+                NOTIFICATIONS_MAX_BATCHING_WINDOW_SECONDS
+            ),
+            report_batch_item_failures=True,
             retry_attempts=3,
             on_failure=aws_lambda_destinations.SqsDestination(queue=dead_letter_queue),  # type: ignore[arg-type]
         )
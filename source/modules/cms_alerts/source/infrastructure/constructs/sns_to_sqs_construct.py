@@ -27,6 +27,9 @@ from cms_common.config.stack_inputs import SolutionConfigInputs
 # Connected Mobility Solution on AWS
 from .incoming_alerts_construct import IncomingAlertsConstruct
 
+ALERTS_BATCH_SIZE = 500
+ALERTS_MAX_BATCHING_WINDOW_SECONDS = 1
+
 
 class SnsToSqsToLambdaConstruct(Construct):
     def __init__(
@@ -80,8 +83,10 @@ class SnsToSqsToLambdaConstruct(Construct):
             encryption=aws_sqs.QueueEncryption.KMS,
             encryption_master_key=sqs_queue_key,
             visibility_timeout=Duration.seconds(31),
+            # Only the messages of a batch reported as failed are redelivered, so
+            # a message gets a few attempts before it is moved to the DLQ
             dead_letter_queue=aws_sqs.DeadLetterQueue(
-                max_receive_count=1, queue=dead_letter_queue
+                max_receive_count=3, queue=dead_letter_queue
             ),
             enforce_ssl=True,
         )
@@ -122,6 +127,10 @@ class SnsToSqsToLambdaConstruct(Construct):
             existing_lambda_obj=incoming_alerts_construct.alerts_lambda,
             existing_queue_obj=self.sqs_queue,
             sqs_event_source_props=aws_lambda_event_sources.SqsEventSourceProps(
-                batch_size=1,
+                batch_size=ALERTS_BATCH_SIZE,
+                max_batching_window=Duration.seconds(
+                    ALERTS_MAX_BATCHING_WINDOW_SECONDS
+                ),
+                report_batch_item_failures=True,
             ),
         )
@@ -40,6 +40,7 @@ class UserSubscriptionsConstruct(Construct):
         dependency_layer: aws_lambda.LayerVersion,
         deployment_uuid: str,
         sns_topic_prefix: str,
+        sns_fan_out_mode: str,
         vpc_construct: VpcConstruct,
         **kwargs: Any,
     ) -> None:
@@ -98,6 +99,7 @@ class UserSubscriptionsConstruct(Construct):
                 "SNS_TOPIC_PREFIX": sns_topic_prefix,
                 "SNS_TOPIC_GENERAL_KEY_ID": self.user_subscription_topic_general_key.key_id,
                 "DEPLOYMENT_UUID": deployment_uuid,
+                "SNS_FAN_OUT_MODE": sns_fan_out_mode,
             },
             handler="app.main.handler",
             runtime=aws_lambda.Runtime.PYTHON_3_12,
@@ -116,6 +118,8 @@ class UserSubscriptionsConstruct(Construct):
                                     "sns:Unsubscribe",
                                     "sns:CreateTopic",
                                     "sns:TagResource",
+                                    "sns:GetSubscriptionAttributes",
+                                    "sns:SetSubscriptionAttributes",
                                 ],
                                 resources=[
                                     Stack.of(self).format_arn(
@@ -138,6 +142,7 @@ class UserSubscriptionsConstruct(Construct):
                                     "dynamodb:GetItem",
                                     "dynamodb:DeleteItem",
                                     "dynamodb:Query",
+                                    "dynamodb:Scan",
                                     "dynamodb:BatchWriteItem",
                                 ],
                                 resources=[
@@ -26,6 +26,9 @@ def fixture_context() -> LambdaContext:
             self.aws_request_id = "52fdfc07-2182-154f-163f-5f0f9a621d72"
             self.log_stream_name = "TestLogStream"
 
+        def get_remaining_time_in_millis(self) -> int:
+            return 30000
+
     return cast(LambdaContext, MockLambdaContext())
 
 
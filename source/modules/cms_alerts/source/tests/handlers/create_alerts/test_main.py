@@ -4,10 +4,16 @@
 
 # Standard Library
 # mypy: disable-error-code=misc
+import os
 from typing import Any, Dict
 from unittest import mock
 
+# Third Party Libraries
+import pytest
+from moto import mock_aws
+
 # AWS Libraries
+import boto3
 import botocore
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
@@ -20,7 +26,7 @@ def test_alerts_handler_success(
 ) -> None:
     mocker.patch("botocore.client.BaseClient._make_api_call", return_value={})
 
-    main.handler(alerts_event, context)
+    assert main.handler(alerts_event, context) == {"batchItemFailures": []}
 
 
 def test_alerts_handler_failure(
@@ -30,14 +36,40 @@ def test_alerts_handler_failure(
         "botocore.client.BaseClient._make_api_call",
         side_effect=botocore.exceptions.ClientError(
             error_response={"Error": {"Code": "test", "Message": "test"}},
-            operation_name="put_item",
+            operation_name="batch_write_item",
         ),
     )
 
-    with mock.patch("botocore.client.BaseClient._make_api_call") as mock_logger:
-        try:
-            main.handler(alerts_event, context)
-        except botocore.exceptions.ClientError:
-            mock_logger.assert_called_with(
-                "Error encountered while processing message test"
-            )
+    with pytest.raises(botocore.exceptions.ClientError):
+        main.handler(alerts_event, context)
+
+
+@mock_aws
+def test_alerts_handler_reports_poisoned_messages(
+    alerts_event: Dict[str, Any], context: LambdaContext
+) -> None:
+    boto3.client("dynamodb").create_table(
+        TableName=os.environ["NOTIFICATIONS_TABLE_NAME"],
+        KeySchema=[
+            {"AttributeName": "topic", "KeyType": "HASH"},
+            {"AttributeName": "timestamp", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "topic", "AttributeType": "S"},
+            {"AttributeName": "timestamp", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    # Alerts for the same vehicle in one batch, and a message without a body
+    valid_record = alerts_event["Records"][0]
+    alerts_event["Records"] = [
+        {**valid_record, "messageId": f"test-msg-id-{index}"} for index in range(60)
+    ] + [{**valid_record, "messageId": "test-poisoned-msg-id", "body": "{}"}]
+
+    assert main.handler(alerts_event, context) == {
+        "batchItemFailures": [{"itemIdentifier": "test-poisoned-msg-id"}]
+    }
+    notifications = boto3.client("dynamodb").scan(
+        TableName=os.environ["NOTIFICATIONS_TABLE_NAME"]
+    )["Items"]
+    assert len(notifications) == 60
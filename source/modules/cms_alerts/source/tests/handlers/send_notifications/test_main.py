@@ -4,6 +4,7 @@
 
 # Standard Library
 # mypy: disable-error-code=misc
+import os
 from typing import Any, Dict
 from unittest import mock
 
@@ -40,14 +41,165 @@ def test_notifications_handler_failure(
         "botocore.client.BaseClient._make_api_call",
         side_effect=botocore.exceptions.ClientError(
             error_response={"Error": {"Code": "test", "Message": "test"}},
-            operation_name="publish",
+            operation_name="publish_batch",
         ),
     )
 
-    with mock.patch("botocore.client.BaseClient._make_api_call") as mock_logger:
-        try:
-            main.handler(notifications_event, context)
-        except botocore.exceptions.ClientError:
-            mock_logger.assert_called_with(
-                "Error encountered while publishing notification test"
-            )
+    assert main.handler(notifications_event, context) == {
+        "batchItemFailures": [{"itemIdentifier": "123"}]
+    }
+
+
+def test_notifications_handler_publishes_batches_by_topic(
+    notifications_event: Dict[str, Any], context: LambdaContext, mocker: mock.MagicMock
+) -> None:
+    main.get_topic_arn.cache_clear()
+    sns_client = mocker.patch.object(main, "get_sns_client").return_value
+    sns_client.create_topic.side_effect = lambda Name, Tags: {"TopicArn": f"arn:{Name}"}
+    # The second notification of each batch is rejected by SNS, a batch cut
+    # short by the failure of the other topic may not have one
+    sns_client.publish_batch.side_effect = (
+        lambda TopicArn, PublishBatchRequestEntries: {
+            "Successful": [],
+            "Failed": [
+                {"Id": entry["Id"], "Code": "test", "SenderFault": False}
+                for entry in PublishBatchRequestEntries[1:2]
+            ],
+        }
+    )
+    record = notifications_event["Records"][0]
+    notifications_event["Records"] = [
+        {
+            **record,
+            "dynamodb": {
+                **record["dynamodb"],
+                "NewImage": {
+                    "topic": {"S": f"test-topic-{index % 2}"},
+                    "message": {"S": "test notification"},
+                },
+                "SequenceNumber": str(index),
+            },
+        }
+        for index in range(30)
+    ]
+
+    # The stream is retried from the first failure only
+    assert main.handler(notifications_event, context) == {
+        "batchItemFailures": [{"itemIdentifier": "2"}]
+    }
+    # Each topic is created once, and stops at its first failed batch rather
+    # than publishing notifications that are retried
+    assert sns_client.create_topic.call_count == 2
+    assert sns_client.publish_batch.call_count == 2
+
+
+def test_notifications_handler_skips_unreadable_records(
+    notifications_event: Dict[str, Any], context: LambdaContext, mocker: mock.MagicMock
+) -> None:
+    main.get_topic_arn.cache_clear()
+    sns_client = mocker.patch.object(main, "get_sns_client").return_value
+    sns_client.create_topic.side_effect = lambda Name, Tags: {"TopicArn": f"arn:{Name}"}
+    sns_client.publish_batch.return_value = {"Successful": [], "Failed": []}
+    record = notifications_event["Records"][0]
+    notifications_event["Records"] = [
+        {
+            **record,
+            "dynamodb": {
+                **record["dynamodb"],
+                "NewImage": {
+                    "topic": {"S": "test-topic"},
+                    "message": {"S": "test notification"},
+                },
+                "SequenceNumber": "1",
+            },
+        },
+        {**record, "dynamodb": {"SequenceNumber": "2"}},
+    ]
+
+    assert main.handler(notifications_event, context) == {"batchItemFailures": []}
+    sns_client.publish_batch.assert_called_once()
+
+
+def test_notifications_handler_alarm_type_fan_out(
+    notifications_event: Dict[str, Any], context: LambdaContext, mocker: mock.MagicMock
+) -> None:
+    mocker.patch.dict(os.environ, {"SNS_FAN_OUT_MODE": "ALARM_TYPE_TOPIC"})
+    main.get_alarm_type_topic_arn.cache_clear()
+    main.get_legacy_topic_arn.cache_clear()
+    sns_client = mocker.patch.object(main, "get_sns_client").return_value
+    sns_client.exceptions.NotFoundException = type(
+        "NotFoundException", (Exception,), {}
+    )
+    sns_client.create_topic.side_effect = lambda Name, Tags, Attributes: {
+        "TopicArn": f"arn:{Name}"
+    }
+
+    # Only the per VIN topic of test-vin0 is left
+    def get_topic_attributes(TopicArn: str) -> Dict[str, Any]:
+        if TopicArn != "arn:test-topic-prefix-test-alarm-type-test-vin0":
+            raise sns_client.exceptions.NotFoundException()
+        return {"Attributes": {}}
+
+    sns_client.get_topic_attributes.side_effect = get_topic_attributes
+    sns_client.publish_batch.return_value = {"Successful": [], "Failed": []}
+    record = notifications_event["Records"][0]
+    notifications_event["Records"] = [
+        {
+            **record,
+            "dynamodb": {
+                **record["dynamodb"],
+                "NewImage": {
+                    "topic": {
+                        "S": f"test-topic-prefix-test-alarm-type-test-vin{index}"
+                    },
+                    "message": {"S": "test notification"},
+                    "vin": {"S": f"test-vin{index}"},
+                    "alarm_type": {"S": "test-alarm-type"},
+                },
+                "SequenceNumber": str(index),
+            },
+        }
+        for index in range(3)
+    ]
+
+    assert main.handler(notifications_event, context) == {"batchItemFailures": []}
+    # One batch to the alarm type topic and one to the remaining per VIN topic
+    assert {
+        call.kwargs["TopicArn"]: len(call.kwargs["PublishBatchRequestEntries"])
+        for call in sns_client.publish_batch.call_args_list
+    } == {
+        "arn:test-topic-prefix-test-alarm-type": 3,
+        "arn:test-topic-prefix-test-alarm-type-test-vin0": 1,
+    }
+    alarm_type_call = next(
+        call
+        for call in sns_client.publish_batch.call_args_list
+        if call.kwargs["TopicArn"] == "arn:test-topic-prefix-test-alarm-type"
+    )
+    assert alarm_type_call.kwargs["PublishBatchRequestEntries"][1] == {
+        "Id": "1",
+        "Message": "test notification",
+        "MessageAttributes": {
+            "vin": {"DataType": "String", "StringValue": "test-vin1"}
+        },
+    }
+
+
+def test_publish_notifications_stops_after_first_failure(
+    mocker: mock.MagicMock,
+) -> None:
+    mocked_publish_batch = mocker.patch.object(
+        main, "publish_batch", side_effect=[[3], []]
+    )
+    notifications = [
+        main.Notification(str(index), "test notification", "test-vin")
+        for index in range(15)
+    ]
+    first_failure = main.FirstFailure([str(index) for index in range(15)])
+    # Another topic failed on a later notification
+    first_failure.update("12")
+
+    main.publish_notifications(main.Topic("test-topic"), notifications, first_failure)
+
+    assert first_failure.sequence_number == "3"
+    mocked_publish_batch.assert_called_once()
@@ -4,10 +4,16 @@
 
 # Standard Library
 # mypy: disable-error-code=misc
+import json
+import os
 from typing import Any, Dict
 from unittest import mock
 
+# Third Party Libraries
+import pytest
+
 # AWS Libraries
+import botocore
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
 # CMS Common Library
@@ -15,6 +21,8 @@ from cms_common.boto3_wrappers.dynamo_crud import DynHelpers
 
 # Connected Mobility Solution on AWS
 from ....handlers.user_subscriptions.app import main
+from ....handlers.user_subscriptions.app.lib import subscription_reconciler
+from ....handlers.user_subscriptions.app.lib.custom_exceptions import FanOutModeError
 
 
 def test_get_user_subscriptions(
@@ -22,7 +30,7 @@ def test_get_user_subscriptions(
 ) -> None:
     mock_dyn_query_object = mocker.patch.object(
         DynHelpers,
-        "dyn_query",
+        "dyn_query_items",
         return_value=[
             {
                 "email": "test-email",
@@ -62,7 +70,7 @@ def test_get_user_subscriptions_with_subscription_arns(
 ) -> None:
     mock_dyn_query_object = mocker.patch.object(
         DynHelpers,
-        "dyn_query",
+        "dyn_query_items",
         return_value=[
             {
                 "email": "test-email",
@@ -151,7 +159,279 @@ def test_update_user_subscriptions(
     mock_boto_client_object.assert_called()
     mock_get_user_subscriptions_with_subscription_arns_object.assert_called_once()
 
-    assert response is True
+    assert response == {
+        "email": "test-email",
+        "alarms": [
+            {
+                "vin": "test-vin",
+                "alarmType": "test-alarm-type",
+                "outcome": "SUBSCRIBED",
+                "error": None,
+            },
+            {
+                "vin": "test-vin1",
+                "alarmType": "test-alarm-type1",
+                "outcome": "SUBSCRIBED",
+                "error": None,
+            },
+        ],
+    }
+
+
+def test_update_user_subscriptions_only_calls_sns_for_changes(
+    mocker: mock.MagicMock
+) -> None:
+    mock_dyn_batch_write_object = mocker.patch.object(DynHelpers, "dyn_batch_write")
+    sns_client = mocker.patch.object(
+        subscription_reconciler, "get_sns_client"
+    ).return_value
+    sns_client.exceptions.NotFoundException = type(
+        "NotFoundException", (Exception,), {}
+    )
+    sns_client.create_topic.return_value = {"TopicArn": "test-topic-arn"}
+    sns_client.subscribe.side_effect = [
+        botocore.exceptions.ClientError(
+            error_response={"Error": {"Code": "Throttling", "Message": "test"}},
+            operation_name="Subscribe",
+        ),
+    ]
+    mocker.patch.object(
+        main,
+        "get_user_subscriptions_with_subscription_arns",
+        return_value={
+            "email": "test-email",
+            "alarms": [
+                {
+                    "vin": vin,
+                    "alarm_type": "test-alarm-type",
+                    "subscription_arn": f"test-subscription-arn-{vin}",
+                    "topic_key": f"test-topic-prefix-test-alarm-type-{vin}",
+                }
+                for vin in ("test-vin", "test-vin1")
+            ],
+        },
+    )
+
+    response = main.update_user_subscriptions(
+        {
+            "email": "test-email",
+            "alarms": [
+                {"vin": vin, "alarm_type": "test-alarm-type", "email_enabled": enabled}
+                for vin, enabled in (
+                    ("test-vin", True),
+                    ("test-vin1", False),
+                    ("test-vin2", True),
+                )
+            ],
+        }
+    )
+
+    assert [alarm["outcome"] for alarm in response["alarms"]] == [
+        "UNCHANGED",
+        "UNSUBSCRIBED",
+        "FAILED",
+    ]
+    assert response["alarms"][2]["error"] == "test"
+    sns_client.unsubscribe.assert_called_once_with(
+        SubscriptionArn="test-subscription-arn-test-vin1"
+    )
+    mock_dyn_batch_write_object.assert_called_once_with(
+        "test-user-email-subscriptions-table",
+        [
+            {
+                "operation": "DELETE",
+                "key": {
+                    "email": "test-email",
+                    "topic_key": "test-topic-prefix-test-alarm-type-test-vin1",
+                },
+            }
+        ],
+    )
+
+
+def test_update_user_subscriptions_alarm_type_fan_out(mocker: mock.MagicMock) -> None:
+    mocker.patch.dict(os.environ, {"SNS_FAN_OUT_MODE": "ALARM_TYPE_TOPIC"})
+    mock_dyn_batch_write_object = mocker.patch.object(DynHelpers, "dyn_batch_write")
+    sns_client = mocker.patch.object(
+        subscription_reconciler, "get_sns_client"
+    ).return_value
+    sns_client.exceptions.NotFoundException = type(
+        "NotFoundException", (Exception,), {}
+    )
+    alarm_type_subscription_arn = (
+        "arn:aws:sns:us-east-1:123456789012:test-topic-prefix-test-alarm-type:id"
+    )
+    per_vin_subscription_arn = (
+        "arn:aws:sns:us-east-1:123456789012:"
+        "test-topic-prefix-test-alarm-type-test-vin2:id"
+    )
+    mocker.patch.object(
+        main,
+        "get_user_subscriptions_with_subscription_arns",
+        return_value={
+            "email": "test-email",
+            "alarms": [
+                {
+                    "vin": "test-vin",
+                    "alarm_type": "test-alarm-type",
+                    "subscription_arn": alarm_type_subscription_arn,
+                    "topic_key": "test-topic-prefix-test-alarm-type-test-vin",
+                },
+                {
+                    "vin": "test-vin2",
+                    "alarm_type": "test-alarm-type",
+                    "subscription_arn": per_vin_subscription_arn,
+                    "topic_key": "test-topic-prefix-test-alarm-type-test-vin2",
+                },
+            ],
+        },
+    )
+
+    response = main.update_user_subscriptions(
+        {
+            "email": "test-email",
+            "alarms": [
+                {"vin": vin, "alarm_type": "test-alarm-type", "email_enabled": enabled}
+                for vin, enabled in (
+                    ("test-vin", True),
+                    ("test-vin1", True),
+                    ("test-vin2", False),
+                )
+            ],
+        }
+    )
+
+    assert [alarm["outcome"] for alarm in response["alarms"]] == [
+        "UNCHANGED",
+        "SUBSCRIBED",
+        "UNSUBSCRIBED",
+    ]
+    # The new VIN is added to the filter policy of the alarm type subscription
+    # and the per VIN subscription not migrated yet is removed
+    sns_client.subscribe.assert_not_called()
+    sns_client.set_subscription_attributes.assert_called_once_with(
+        SubscriptionArn=alarm_type_subscription_arn,
+        AttributeName="FilterPolicy",
+        AttributeValue=json.dumps({"vin": ["test-vin", "test-vin1"]}),
+    )
+    sns_client.unsubscribe.assert_called_once_with(
+        SubscriptionArn=per_vin_subscription_arn
+    )
+    assert mock_dyn_batch_write_object.call_args.args[1] == [
+        {
+            "operation": "DELETE",
+            "key": {
+                "email": "test-email",
+                "topic_key": "test-topic-prefix-test-alarm-type-test-vin2",
+            },
+        },
+        {
+            "operation": "PUT",
+            "item": {
+                "email": "test-email",
+                "subscription_arn": alarm_type_subscription_arn,
+                "vin": "test-vin1",
+                "alarm_type": "test-alarm-type",
+                "topic_key": "test-topic-prefix-test-alarm-type-test-vin1",
+            },
+        },
+    ]
+
+
+def test_update_user_subscriptions_alarm_type_fan_out_vin_limit(
+    mocker: mock.MagicMock,
+) -> None:
+    mocker.patch.dict(os.environ, {"SNS_FAN_OUT_MODE": "ALARM_TYPE_TOPIC"})
+    mock_dyn_batch_write_object = mocker.patch.object(DynHelpers, "dyn_batch_write")
+    sns_client = mocker.patch.object(
+        subscription_reconciler, "get_sns_client"
+    ).return_value
+    mocker.patch.object(
+        main,
+        "get_user_subscriptions_with_subscription_arns",
+        return_value={"email": "test-email", "alarms": []},
+    )
+
+    response = main.update_user_subscriptions(
+        {
+            "email": "test-email",
+            "alarms": [
+                {
+                    "vin": f"test-vin{index}",
+                    "alarm_type": "test-alarm-type",
+                    "email_enabled": True,
+                }
+                for index in range(subscription_reconciler.MAX_FILTER_POLICY_VINS + 1)
+            ],
+        }
+    )
+
+    assert {alarm["outcome"] for alarm in response["alarms"]} == {"FAILED"}
+    sns_client.subscribe.assert_not_called()
+    mock_dyn_batch_write_object.assert_not_called()
+
+
+def test_migrate_user_subscriptions(mocker: mock.MagicMock) -> None:
+    mocker.patch.dict(os.environ, {"SNS_FAN_OUT_MODE": "ALARM_TYPE_TOPIC"})
+    mocker.patch.object(
+        DynHelpers,
+        "get_all",
+        return_value=[
+            {
+                "email": "test-email",
+                "subscription_arn": "arn:aws:sns:us-east-1:123456789012:"
+                "test-topic-prefix-test-alarm-type-test-vin:id",
+                "topic_key": "test-topic-prefix-test-alarm-type-test-vin",
+            }
+        ],
+    )
+    mocker.patch.object(
+        DynHelpers,
+        "dyn_query_items",
+        return_value=[
+            {
+                "email": "test-email",
+                "vin": "test-vin",
+                "alarm_type": "test-alarm-type",
+                "subscription_arn": "arn:aws:sns:us-east-1:123456789012:"
+                "test-topic-prefix-test-alarm-type-test-vin:id",
+                "topic_key": "test-topic-prefix-test-alarm-type-test-vin",
+            }
+        ],
+    )
+    mock_dyn_batch_write_object = mocker.patch.object(DynHelpers, "dyn_batch_write")
+    sns_client = mocker.patch.object(
+        subscription_reconciler, "get_sns_client"
+    ).return_value
+    sns_client.exceptions.NotFoundException = type(
+        "NotFoundException", (Exception,), {}
+    )
+    sns_client.create_topic.return_value = {"TopicArn": "test-topic-arn"}
+    sns_client.subscribe.return_value = {"SubscriptionArn": "test-subscription-arn"}
+
+    response = main.migrate_user_subscriptions({})
+
+    assert response == {"usersToMigrate": 1, "processedUsers": 1, "failedUsers": 0}
+    sns_client.subscribe.assert_called_once_with(
+        TopicArn="test-topic-arn",
+        Protocol="email",
+        Endpoint="test-email",
+        Attributes={"FilterPolicy": json.dumps({"vin": ["test-vin"]})},
+        ReturnSubscriptionArn=True,
+    )
+    item = mock_dyn_batch_write_object.call_args.args[1][0]["item"]
+    assert item["subscription_arn"] == "test-subscription-arn"
+    # Removed in the same step, so no alert is delivered through both
+    sns_client.unsubscribe.assert_called_once_with(
+        SubscriptionArn="arn:aws:sns:us-east-1:123456789012:"
+        "test-topic-prefix-test-alarm-type-test-vin:id"
+    )
+    assert "legacy_subscription_arn" not in item
+
+
+def test_migrate_user_subscriptions_per_vin_fan_out() -> None:
+    with pytest.raises(FanOutModeError):
+        main.migrate_user_subscriptions({})
 
 
 def test_user_subscriptions_handler(
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import os
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, cast
+
+# AWS Libraries
+from boto3.dynamodb.types import TypeDeserializer
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client
+
+if TYPE_CHECKING:
+    # Third Party Libraries
+    from mypy_boto3_dynamodb import DynamoDBClient
+else:
+    DynamoDBClient = object
+
+# Items are written by the cms_connect_store latest_state function, one per VIN
+# with an attribute per lower case VSS signal path holding {value, timestamp}
+VIN_ATTRIBUTE = "vin"
+
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_GET_ATTEMPTS = 3
+# Beyond this many signals the projection expression could exceed its 4 KB
+# limit, so the whole item is read instead
+MAX_PROJECTED_SIGNALS = 200
+
+deserializer = TypeDeserializer()
+
+
+def get_dynamodb_client() -> DynamoDBClient:
+    return cast(DynamoDBClient, get_client("dynamodb"))
+
+
+def is_latest_state_enabled() -> bool:
+    return bool(os.environ.get("LATEST_STATE_TABLE_NAME"))
+
+
+def get_selected_signals(selection_set: List[str]) -> List[Tuple[str, ...]]:
+    # Converts selection/set/path/value into the GraphQL path of the signal
+    return [
+        tuple(selection_path[: -len("/value")].split("/"))
+        for selection_path in selection_set
+        if selection_path.endswith("/value")
+    ]
+
+
+def get_latest_states(
+    vins: List[str], selection_set: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the latest state of the selected signals of each vehicle.
+
+    Returns GraphQL objects keyed by VIN. VINs without a latest state item are
+    left out, so the caller can fall back to the telemetry table for them.
+    """
+    signal_paths = get_selected_signals(selection_set)
+    signal_attributes = {path: ".".join(path).lower() for path in signal_paths}
+
+    keys_and_attributes: Dict[str, Any] = {}
+    if len(signal_attributes) <= MAX_PROJECTED_SIGNALS:
+        attribute_names = {"#vin": VIN_ATTRIBUTE}
+        attribute_names.update(
+            {
+                f"#s{index}": attribute
+                for index, attribute in enumerate(signal_attributes.values())
+            }
+        )
+        keys_and_attributes["ProjectionExpression"] = ", ".join(attribute_names)
+        keys_and_attributes["ExpressionAttributeNames"] = attribute_names
+
+    latest_states: Dict[str, Dict[str, Any]] = {}
+    unique_vins = list(dict.fromkeys(vins))
+    for index in range(0, len(unique_vins), MAX_BATCH_GET_KEYS):
+        for item in batch_get_items(
+            unique_vins[index : index + MAX_BATCH_GET_KEYS], keys_and_attributes
+        ):
+            latest_states[item[VIN_ATTRIBUTE]] = item_to_graphql(
+                item, signal_attributes
+            )
+    return latest_states
+
+
+def batch_get_items(
+    vins: List[str], keys_and_attributes: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    table_name = os.environ["LATEST_STATE_TABLE_NAME"]
+    request_items: Dict[str, Any] = {
+        table_name: {
+            "Keys": [{VIN_ATTRIBUTE: {"S": vin}} for vin in vins],
+            **keys_and_attributes,
+        }
+    }
+
+    items: List[Dict[str, Any]] = []
+    for _ in range(MAX_BATCH_GET_ATTEMPTS):
+        response = get_dynamodb_client().batch_get_item(RequestItems=request_items)
+        items.extend(
+            {
+                attribute: deserializer.deserialize(value)
+                for attribute, value in item.items()
+            }
+            for item in response["Responses"].get(table_name, [])
+        )
+        request_items = response.get("UnprocessedKeys") or {}  # type: ignore[assignment]
+        if not request_items:
+            break
+    # Any keys still unprocessed are treated as misses and read from Athena
+    return items
+
+
+def item_to_graphql(
+    item: Dict[str, Any], signal_attributes: Dict[Tuple[str, ...], str]
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for path, attribute in signal_attributes.items():
+        if attribute not in item:
+            continue
+        current = result
+        for key in path:
+            current = current.setdefault(key, {})
+        current["value"] = to_graphql_value(item[attribute]["value"])
+    return result
+
+
+def to_graphql_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, list):
+        return [to_graphql_value(item) for item in value]
+    return value
@@ -3,14 +3,20 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
+import base64
+import binascii
 import os
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Any, Callable, Dict, List
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # Connected Mobility Solution on AWS
+from .athena_exceptions import AthenaQueryError
 from .validators import (
     validate_query_selection_string,
+    validate_query_signal_path,
     validate_query_table_name,
     validate_query_vin_input,
 )
@@ -21,11 +27,74 @@ class AthenaQuery:
     query_string_builder: Callable[[List[str], str, Dict[str, Any]], str]
     max_time_in_seconds: int
     multiple_results: bool
+    # Shapes the processed rows into the GraphQL response when set
+    result_builder: Optional[
+        Callable[[List[Dict[str, Any]], Dict[str, Any]], Dict[str, Any]]
+    ] = None
+    # Builds one query for a BatchInvoke batch from the union of its selection
+    # sets and the batch_key_argument value of every event
+    batch_query_string_builder: Optional[Callable[[List[str], str, List[str]], str]] = (
+        None
+    )
+    batch_key_argument: Optional[str] = None
+    # Argument holding the VIN when the field can be answered from the latest
+    # state store, with the telemetry table as the fallback
+    latest_state_key_argument: Optional[str] = None
+    # Runs against the partition projected Parquet table. Its builders must
+    # constrain the vin partition, which can only be matched by value.
+    partition_projected: bool = False
+    # Run for the keys this query finds no rows for, such as vehicles whose
+    # telemetry predates the partition projected table
+    fallback: Optional["AthenaQuery"] = None
 
 
 class QueryType(Enum):
     GET_VEHICLE = "getVehicle"
     LIST_VEHICLES = "listVehicles"
+    LIST_VEHICLES_PAGE = "listVehiclesPage"
+    GET_VEHICLE_SIGNAL_HISTORY = "getVehicleSignalHistory"
+    GET_FLEET_SIGNAL_AGGREGATE = "getFleetSignalAggregate"
+
+
+class TimeBucket(Enum):
+    HOUR = "HOUR"
+    DAY = "DAY"
+
+
+# Fields of the VehiclePage GraphQL type
+PAGE_ITEMS_FIELD = "items"
+PAGE_NEXT_TOKEN_FIELD = "nextToken"
+
+# Column selected on every keyset page so the next cursor is known even when
+# the VIN is not part of the requested selection set
+CURSOR_COLUMN = "cursor"
+
+# Column selected on batch queries to scatter rows back to the batch events
+BATCH_KEY_COLUMN = "batchKey"
+
+# Partition columns of the Parquet table, matching the
+# Parquet/<vin>/<day of year>_<year>/<hour>/ prefix Firehose writes in UTC
+VIN_PARTITION = "vin"
+# The VIN of the JSON table, nested in the vehicleidentification struct
+VIN_COLUMN = "vehicleidentification.vin"
+DAY_PARTITION = "day"
+HOUR_PARTITION = "hour"
+DAY_PARTITION_FORMAT = "%j_%Y"
+HOUR_PARTITION_FORMAT = "%H"
+# Upper bound on the days a time range predicate lists
+MAX_PARTITION_DAYS = 366
+
+# Rows are timed by the hour their data arrived in, which is read from the day
+# and hour partitions so bucketing never has to open a file
+TIME_BUCKET_EXPRESSIONS: Dict[str, str] = {
+    TimeBucket.HOUR.value: f"date_parse(\"{DAY_PARTITION}\" || ' ' || \"{HOUR_PARTITION}\", '%j_%Y %H')",
+    TimeBucket.DAY.value: f"date_parse(\"{DAY_PARTITION}\", '%j_%Y')",
+}
+
+# Fields of the SignalHistory GraphQL type
+HISTORY_PATH_FIELD = "path"
+HISTORY_BUCKET_FIELD = "bucket"
+HISTORY_BUCKETS_FIELD = "buckets"
 
 
 def get_selection_string(selection_set_list: List[str]) -> str:
@@ -46,20 +115,179 @@ def get_selection_string(selection_set_list: List[str]) -> str:
     return ", ".join(selection_strings)
 
 
+def encode_cursor(vin: str) -> str:
+    return base64.urlsafe_b64encode(vin.encode("utf-8")).decode("utf-8")
+
+
+def decode_cursor(cursor: str) -> str:
+    # The cursor is opaque to clients, so anything that does not decode to a
+    # valid VIN is rejected before it reaches the query string
+    try:
+        vin = base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+    except (binascii.Error, UnicodeError) as err:
+        raise AthenaQueryError("after cursor is invalid") from err
+
+    validate_query_vin_input(vin)
+    return vin
+
+
+def get_vin_predicate(vins: List[str], vin_column: str) -> str:
+    for vin in vins:
+        validate_query_vin_input(vin)
+
+    if len(vins) == 1:
+        return f"{vin_column} = '{vins[0]}'"
+    vin_list = ", ".join(f"'{vin}'" for vin in vins)
+    return f"{vin_column} IN ({vin_list})"
+
+
+def get_vin_partition_predicate(vins: List[str]) -> str:
+    return get_vin_predicate(vins, f'"{VIN_PARTITION}"')
+
+
+def get_time_partition_predicate(start: datetime, end: datetime) -> str:
+    """
+    Restrict the day and hour partitions to the hours overlapping start to end.
+
+    Partition values are formatted strings, so the range is spelled out as the
+    first and last day with their bounding hours and the whole days in between.
+    """
+    start = start.astimezone(timezone.utc)
+    end = end.astimezone(timezone.utc)
+    if end < start:
+        raise AthenaQueryError("time range ends before it starts")
+
+    days = [
+        start.date() + timedelta(days=day)
+        for day in range((end.date() - start.date()).days + 1)
+    ]
+    if len(days) > MAX_PARTITION_DAYS:
+        raise AthenaQueryError(f"time range spans more than {MAX_PARTITION_DAYS} days")
+
+    start_day = start.strftime(DAY_PARTITION_FORMAT)
+    end_day = end.strftime(DAY_PARTITION_FORMAT)
+    start_hour = start.strftime(HOUR_PARTITION_FORMAT)
+    end_hour = end.strftime(HOUR_PARTITION_FORMAT)
+
+    if len(days) == 1:
+        return (
+            f"\"{DAY_PARTITION}\" = '{start_day}' "
+            f"AND \"{HOUR_PARTITION}\" BETWEEN '{start_hour}' AND '{end_hour}'"
+        )
+
+    predicates = [
+        f"(\"{DAY_PARTITION}\" = '{start_day}' AND \"{HOUR_PARTITION}\" >= '{start_hour}')"
+    ]
+    if len(days) > 2:
+        day_list = ", ".join(
+            f"'{day.strftime(DAY_PARTITION_FORMAT)}'" for day in days[1:-1]
+        )
+        predicates.append(f'"{DAY_PARTITION}" IN ({day_list})')
+    predicates.append(
+        f"(\"{DAY_PARTITION}\" = '{end_day}' AND \"{HOUR_PARTITION}\" <= '{end_hour}')"
+    )
+    return f"({' OR '.join(predicates)})"
+
+
+def parse_time_argument(value: str) -> datetime:
+    try:
+        parsed_value = datetime.fromisoformat(value)
+    except (TypeError, ValueError) as err:
+        raise AthenaQueryError("time argument is not an ISO 8601 date time") from err
+    if parsed_value.tzinfo is None:
+        parsed_value = parsed_value.replace(tzinfo=timezone.utc)
+    return parsed_value.astimezone(timezone.utc)
+
+
+def get_time_range(arguments: Dict[str, Any]) -> Tuple[datetime, datetime, str]:
+    start = parse_time_argument(arguments["from"])
+    end = parse_time_argument(arguments["to"])
+    bucket = arguments.get("bucket") or TimeBucket.HOUR.value
+    if bucket not in TIME_BUCKET_EXPRESSIONS:
+        raise AthenaQueryError("bucket must be HOUR or DAY")
+
+    # Every bucket is a row of the result, which is bound by the record limit
+    if bucket == TimeBucket.HOUR.value:
+        bucket_count = (
+            end.replace(minute=0, second=0, microsecond=0)
+            - start.replace(minute=0, second=0, microsecond=0)
+        ) // timedelta(hours=1) + 1
+    else:
+        bucket_count = (end.date() - start.date()).days + 1
+    if bucket_count > int(os.environ["RECORD_LIMIT"]):
+        raise AthenaQueryError(
+            f"time range spans more than {os.environ['RECORD_LIMIT']} buckets"
+        )
+
+    return start, end, bucket
+
+
+def get_page_limit(arguments: Dict[str, Any]) -> int:
+    record_limit = int(os.environ["RECORD_LIMIT"])
+    limit = arguments.get("limit")
+    return record_limit if limit is None else min(max(int(limit), 1), record_limit)
+
+
 # Query Builders
 def build_get_vehicle_query(
-    selection_set: List[str], glue_table: str, arguments: Dict[str, Any]
+    selection_set: List[str],
+    glue_table: str,
+    arguments: Dict[str, Any],
+    vin_column: str = f'"{VIN_PARTITION}"',
 ) -> str:
     selection_string = get_selection_string(selection_set)
 
     validate_query_selection_string(selection_string)
     validate_query_table_name(glue_table)
-    validate_query_vin_input(arguments["vin"])
+    vin_predicate = get_vin_predicate([arguments["vin"]], vin_column)
+
+    query_string = (
+        f'SELECT {selection_string} FROM "{glue_table}" WHERE {vin_predicate} LIMIT 1'
+    )
+    return query_string
+
+
+def build_get_vehicles_batch_query(
+    selection_set: List[str],
+    glue_table: str,
+    vins: List[str],
+    vin_column: str = f'"{VIN_PARTITION}"',
+) -> str:
+    selection_string = ", ".join(
+        filter(
+            None,
+            [
+                get_selection_string(selection_set),
+                f'"vehicleidentification"."vin" as "{BATCH_KEY_COLUMN}"',
+            ],
+        )
+    )
+
+    validate_query_selection_string(selection_string)
+    validate_query_table_name(glue_table)
+    vin_predicate = get_vin_predicate(vins, vin_column)
 
-    query_string = f"SELECT {selection_string} FROM \"{glue_table}\" WHERE vehicleidentification.vin = '{arguments['vin']}' LIMIT 1"
+    # Keeps the single row per VIN that LIMIT 1 gives an unbatched getVehicle
+    query_string = (
+        f"SELECT {selection_string} FROM ("
+        f'SELECT *, row_number() OVER (PARTITION BY {vin_column}) AS batch_row FROM "{glue_table}" '
+        f"WHERE {vin_predicate}"
+        ") WHERE batch_row = 1"
+    )
     return query_string
 
 
+def split_batch_results(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # Results may be shared with the result cache, so they are copied rather
+    # than having the batch key column popped
+    return {
+        result[BATCH_KEY_COLUMN]["value"]: {
+            field: value for field, value in result.items() if field != BATCH_KEY_COLUMN
+        }
+        for result in results
+    }
+
+
 def build_list_vehicles_query(
     selection_set: List[str], glue_table: str, arguments: Dict[str, Any]
 ) -> str:
@@ -74,16 +302,166 @@ def build_list_vehicles_query(
     return query_string
 
 
+def build_list_vehicles_page_query(
+    selection_set: List[str], glue_table: str, arguments: Dict[str, Any]
+) -> str:
+    # Keyset pagination: seeking past the last VIN of the previous page costs
+    # the same at any depth, unlike OFFSET which sorts and skips every row
+    # before the page
+    item_selection_set = [
+        selection_path[len(PAGE_ITEMS_FIELD) + 1 :]
+        for selection_path in selection_set
+        if selection_path.startswith(f"{PAGE_ITEMS_FIELD}/")
+    ]
+    selection_string = ", ".join(
+        filter(
+            None,
+            [
+                get_selection_string(item_selection_set),
+                f'"vehicleidentification"."vin" as "{CURSOR_COLUMN}"',
+            ],
+        )
+    )
+    # One row past the page tells whether there is a next page
+    row_limit = get_page_limit(arguments) + 1
+
+    validate_query_selection_string(selection_string)
+    validate_query_table_name(glue_table)
+
+    where_clause = "WHERE vehicleidentification.vin IS NOT NULL"
+    if arguments.get("after"):
+        after_vin = decode_cursor(arguments["after"])
+        where_clause += f" AND vehicleidentification.vin > '{after_vin}'"
+
+    query_string = f'SELECT {selection_string} FROM "{glue_table}" {where_clause} ORDER BY vehicleidentification.vin LIMIT {row_limit}'
+    return query_string
+
+
+def build_signal_aggregate_query(
+    glue_table: str, vins: List[str], arguments: Dict[str, Any]
+) -> str:
+    # The aggregation runs in Athena over only the partitions of the VINs and
+    # hours in range, so a response holds one row per bucket instead of every
+    # message in the time range
+    validate_query_signal_path(arguments["path"])
+    validate_query_table_name(glue_table)
+    start, end, bucket = get_time_range(arguments)
+    vin_predicate = get_vin_partition_predicate(vins)
+    time_predicate = get_time_partition_predicate(start, end)
+
+    signal = ".".join(f'"{part}"' for part in arguments["path"].split("."))
+    query_string = (
+        f'SELECT {TIME_BUCKET_EXPRESSIONS[bucket]} AS "time", '
+        f'count(*) AS "count", count(DISTINCT "{VIN_PARTITION}") AS "vehicleCount", '
+        f'avg({signal}) AS "average", min({signal}) AS "minimum", max({signal}) AS "maximum" '
+        f'FROM "{glue_table}" '
+        f"WHERE {vin_predicate} AND {time_predicate} AND {signal} IS NOT NULL "
+        "GROUP BY 1 ORDER BY 1"
+    )
+    return query_string
+
+
+def build_vehicle_signal_history_query(
+    selection_set: List[str], glue_table: str, arguments: Dict[str, Any]
+) -> str:
+    return build_signal_aggregate_query(glue_table, [arguments["vin"]], arguments)
+
+
+def build_fleet_signal_aggregate_query(
+    selection_set: List[str], glue_table: str, arguments: Dict[str, Any]
+) -> str:
+    vins = list(dict.fromkeys(arguments["vins"]))
+    if not vins:
+        raise AthenaQueryError("vins must name at least one vehicle")
+    if len(vins) > int(os.environ["RECORD_LIMIT"]):
+        raise AthenaQueryError(
+            f"vins can not name more than {os.environ['RECORD_LIMIT']} vehicles"
+        )
+    return build_signal_aggregate_query(glue_table, vins, arguments)
+
+
+def build_signal_history(
+    results: List[Dict[str, Any]], arguments: Dict[str, Any]
+) -> Dict[str, Any]:
+    # Aggregate columns are plain scalars in the SignalBucket GraphQL type
+    return {
+        HISTORY_PATH_FIELD: arguments["path"],
+        HISTORY_BUCKET_FIELD: arguments.get("bucket") or TimeBucket.HOUR.value,
+        HISTORY_BUCKETS_FIELD: [
+            {field: cell["value"] for field, cell in result.items()}
+            for result in results
+        ],
+    }
+
+
+def build_vehicle_page(
+    results: List[Dict[str, Any]], arguments: Dict[str, Any]
+) -> Dict[str, Any]:
+    limit = get_page_limit(arguments)
+    # Results may be shared with the result cache, so they are copied rather
+    # than having the cursor column popped
+    items = [
+        {field: value for field, value in result.items() if field != CURSOR_COLUMN}
+        for result in results[:limit]
+    ]
+
+    return {
+        PAGE_ITEMS_FIELD: items,
+        PAGE_NEXT_TOKEN_FIELD: (
+            encode_cursor(results[limit - 1][CURSOR_COLUMN]["value"])
+            if len(results) > limit
+            else None
+        ),
+    }
+
+
 # Query Handlers
 QUERY_TYPE_HANDLER: Dict[str, AthenaQuery] = {
     QueryType.GET_VEHICLE.value: AthenaQuery(
         query_string_builder=build_get_vehicle_query,
         max_time_in_seconds=30,
         multiple_results=False,
+        batch_query_string_builder=build_get_vehicles_batch_query,
+        batch_key_argument="vin",
+        latest_state_key_argument="vin",
+        partition_projected=True,
+        # Telemetry written before the Parquet table, or under the object
+        # names it used before, is only reachable through the JSON table
+        fallback=AthenaQuery(
+            query_string_builder=partial(
+                build_get_vehicle_query, vin_column=VIN_COLUMN
+            ),
+            max_time_in_seconds=30,
+            multiple_results=False,
+            batch_query_string_builder=partial(
+                build_get_vehicles_batch_query, vin_column=VIN_COLUMN
+            ),
+            batch_key_argument="vin",
+        ),
     ),
     QueryType.LIST_VEHICLES.value: AthenaQuery(
         query_string_builder=build_list_vehicles_query,
         max_time_in_seconds=60,
         multiple_results=True,
     ),
+    QueryType.LIST_VEHICLES_PAGE.value: AthenaQuery(
+        query_string_builder=build_list_vehicles_page_query,
+        max_time_in_seconds=60,
+        multiple_results=True,
+        result_builder=build_vehicle_page,
+    ),
+    QueryType.GET_VEHICLE_SIGNAL_HISTORY.value: AthenaQuery(
+        query_string_builder=build_vehicle_signal_history_query,
+        max_time_in_seconds=60,
+        multiple_results=True,
+        result_builder=build_signal_history,
+        partition_projected=True,
+    ),
+    QueryType.GET_FLEET_SIGNAL_AGGREGATE.value: AthenaQuery(
+        query_string_builder=build_fleet_signal_aggregate_query,
+        max_time_in_seconds=60,
+        multiple_results=True,
+        result_builder=build_signal_history,
+        partition_projected=True,
+    ),
 }
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import hashlib
+import os
+import time
+import uuid
+from typing import TYPE_CHECKING, Callable, Optional, Tuple, cast
+
+# AWS Libraries
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client
+
+if TYPE_CHECKING:
+    # Third Party Libraries
+    from mypy_boto3_dynamodb import DynamoDBClient
+else:
+    DynamoDBClient = object
+
+logger = Logger()
+
+QUERY_KEY_ATTRIBUTE = "query_key"
+QUERY_EXECUTION_ID_ATTRIBUTE = "query_execution_id"
+OWNER_ATTRIBUTE = "owner"
+# Epoch seconds, also the TTL attribute of the table. TTL deletes lazily, so
+# every read and condition checks it as well.
+EXPIRES_AT_ATTRIBUTE = "expires_at"
+
+# How long a lease without a query execution blocks other callers before it
+# is taken over, covers a caller that failed between leasing and starting
+PENDING_LEASE_SECONDS = 5
+LEASE_POLL_INTERVAL_SECONDS = 0.1
+
+
+def get_dynamodb_client() -> DynamoDBClient:
+    return cast(DynamoDBClient, get_client("dynamodb"))
+
+
+def is_query_lease_enabled() -> bool:
+    return bool(os.environ.get("QUERY_LEASE_TABLE_NAME"))
+
+
+def get_query_key(query_string: str, database: str, workgroup: str) -> str:
+    return hashlib.sha256(
+        "\n".join([workgroup, database, query_string]).encode("utf-8")
+    ).hexdigest()
+
+
+def start_or_join_query_execution(
+    query_key: str,
+    start_query_execution: Callable[[], str],
+    lease_time_in_seconds: int,
+) -> Tuple[str, bool]:
+    """
+    Start a query execution or join the execution of an identical query.
+
+    The first caller leases the query key, starts the query and records its
+    execution id on the lease, which is kept until the execution finishes and
+    is released, at most for lease_time_in_seconds.
+    Concurrent callers with the same key return that execution id instead of
+    starting their own. Returns the execution id and whether it was started
+    by this caller. Lease store errors fall back to starting the query.
+    """
+    wait_deadline = time.monotonic() + lease_time_in_seconds
+    owner = uuid.uuid4().hex
+    leased = False
+    try:
+        while time.monotonic() < wait_deadline:
+            if acquire_query_lease(query_key, owner):
+                leased = True
+                break
+
+            query_execution_id = get_leased_query_execution_id(query_key)
+            if query_execution_id is not None:
+                logger.info(f"Joining in-flight query execution {query_execution_id}")
+                return query_execution_id, False
+            # Another caller is starting the query
+            time.sleep(LEASE_POLL_INTERVAL_SECONDS)
+    except ClientError:
+        logger.warning("Query lease store failed, starting query.", exc_info=True)
+
+    query_execution_id = start_query_execution()
+    if leased:
+        try:
+            record_query_execution(
+                query_key, owner, query_execution_id, lease_time_in_seconds
+            )
+        except ClientError:
+            logger.warning("Could not record query execution.", exc_info=True)
+    return query_execution_id, True
+
+
+def acquire_query_lease(query_key: str, owner: str) -> bool:
+    now = int(time.time())
+    dynamodb_client = get_dynamodb_client()
+    try:
+        dynamodb_client.put_item(
+            TableName=os.environ["QUERY_LEASE_TABLE_NAME"],
+            Item={
+                QUERY_KEY_ATTRIBUTE: {"S": query_key},
+                OWNER_ATTRIBUTE: {"S": owner},
+                EXPIRES_AT_ATTRIBUTE: {"N": str(now + PENDING_LEASE_SECONDS)},
+            },
+            # Expired leases, pending or not, are taken over
+            ConditionExpression="attribute_not_exists(#query_key) OR #expires_at < :now",
+            ExpressionAttributeNames={
+                "#query_key": QUERY_KEY_ATTRIBUTE,
+                "#expires_at": EXPIRES_AT_ATTRIBUTE,
+            },
+            ExpressionAttributeValues={":now": {"N": str(now)}},
+        )
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def record_query_execution(
+    query_key: str, owner: str, query_execution_id: str, lease_time_in_seconds: int
+) -> None:
+    dynamodb_client = get_dynamodb_client()
+    try:
+        dynamodb_client.update_item(
+            TableName=os.environ["QUERY_LEASE_TABLE_NAME"],
+            Key={QUERY_KEY_ATTRIBUTE: {"S": query_key}},
+            UpdateExpression="SET #query_execution_id = :query_execution_id, #expires_at = :expires_at",
+            # The lease was taken over if starting the query outlasted it
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={
+                "#query_execution_id": QUERY_EXECUTION_ID_ATTRIBUTE,
+                "#expires_at": EXPIRES_AT_ATTRIBUTE,
+                "#owner": OWNER_ATTRIBUTE,
+            },
+            ExpressionAttributeValues={
+                ":query_execution_id": {"S": query_execution_id},
+                ":expires_at": {"N": str(int(time.time()) + lease_time_in_seconds)},
+                ":owner": {"S": owner},
+            },
+        )
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Lease of query execution {query_execution_id} was taken over")
+
+
+def get_leased_query_execution_id(query_key: str) -> Optional[str]:
+    item = (
+        get_dynamodb_client()
+        .get_item(
+            TableName=os.environ["QUERY_LEASE_TABLE_NAME"],
+            Key={QUERY_KEY_ATTRIBUTE: {"S": query_key}},
+            ConsistentRead=True,
+        )
+        .get("Item")
+    )
+    if (
+        item is None
+        or QUERY_EXECUTION_ID_ATTRIBUTE not in item
+        or int(item[EXPIRES_AT_ATTRIBUTE]["N"]) < int(time.time())
+    ):
+        return None
+    return item[QUERY_EXECUTION_ID_ATTRIBUTE]["S"]
+
+
+def release_query_lease(query_key: str, query_execution_id: str) -> None:
+    # Called when the leased execution finished, so the next caller starts a
+    # new query rather than joining the finished one
+    dynamodb_client = get_dynamodb_client()
+    try:
+        dynamodb_client.delete_item(
+            TableName=os.environ["QUERY_LEASE_TABLE_NAME"],
+            Key={QUERY_KEY_ATTRIBUTE: {"S": query_key}},
+            ConditionExpression="#query_execution_id = :query_execution_id",
+            ExpressionAttributeNames={
+                "#query_execution_id": QUERY_EXECUTION_ID_ATTRIBUTE
+            },
+            ExpressionAttributeValues={
+                ":query_execution_id": {"S": query_execution_id}
+            },
+        )
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        pass
+    except ClientError:
+        logger.warning("Could not release query lease.", exc_info=True)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+from typing import Any, Dict
+
+# AWS Libraries
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+
+# Metrics are written to the function log in CloudWatch embedded metric format
+# and flushed once per invocation, with the resolved GraphQL field as the
+# QueryType dimension. The namespace is read from POWERTOOLS_METRICS_NAMESPACE.
+metrics = Metrics()
+
+QUERY_TYPE_DIMENSION = "QueryType"
+
+# Athena query execution statistics and the metric each one is reported as
+QUERY_EXECUTION_STATISTICS = {
+    "QueryQueueTimeInMillis": "AthenaQueueTime",
+    "EngineExecutionTimeInMillis": "AthenaEngineExecutionTime",
+    "ServiceProcessingTimeInMillis": "AthenaServiceProcessingTime",
+    "TotalExecutionTimeInMillis": "AthenaTotalExecutionTime",
+}
+
+
+def add_query_type_dimension(query_type: str) -> None:
+    metrics.add_dimension(name=QUERY_TYPE_DIMENSION, value=query_type)
+
+
+def add_query_execution_metrics(
+    query_execution: Dict[str, Any], poll_time_in_millis: float
+) -> None:
+    statistics = query_execution.get("Statistics", {})
+    metrics.add_metric(
+        name="AthenaDataScanned",
+        unit=MetricUnit.Bytes,
+        value=statistics.get("DataScannedInBytes", 0),
+    )
+    for statistic, metric_name in QUERY_EXECUTION_STATISTICS.items():
+        if statistic in statistics:
+            metrics.add_metric(
+                name=metric_name,
+                unit=MetricUnit.Milliseconds,
+                value=statistics[statistic],
+            )
+    metrics.add_metric(
+        name="AthenaPollTime", unit=MetricUnit.Milliseconds, value=poll_time_in_millis
+    )
+    metrics.add_metric(
+        name="AthenaResultReused",
+        unit=MetricUnit.Count,
+        value=int(
+            statistics.get("ResultReuseInformation", {}).get(
+                "ReusedPreviousResult", False
+            )
+        ),
+    )
+
+
+def add_result_metrics(row_count: int, transform_time_in_millis: float) -> None:
+    metrics.add_metric(name="ResultRows", unit=MetricUnit.Count, value=row_count)
+    metrics.add_metric(
+        name="ResultTransformTime",
+        unit=MetricUnit.Milliseconds,
+        value=transform_time_in_millis,
+    )
+
+
+def add_cache_metrics(result_cache_hit: bool) -> None:
+    metrics.add_metric(
+        name="ResultCacheHit", unit=MetricUnit.Count, value=int(result_cache_hit)
+    )
+    metrics.add_metric(
+        name="ResultCacheMiss", unit=MetricUnit.Count, value=int(not result_cache_hit)
+    )
+
+
+def add_latest_state_metrics(hit_count: int, miss_count: int) -> None:
+    metrics.add_metric(name="LatestStateHit", unit=MetricUnit.Count, value=hit_count)
+    metrics.add_metric(name="LatestStateMiss", unit=MetricUnit.Count, value=miss_count)
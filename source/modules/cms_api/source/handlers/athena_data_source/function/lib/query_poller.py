@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import statistics
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+# AWS Libraries
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+FINISHED_QUERY_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+# Expected execution time of a query type without any history
+DEFAULT_EXPECTED_EXECUTION_TIME_IN_SECONDS = 1.0
+EXECUTION_TIME_HISTORY_SIZE = 50
+MIN_POLL_INTERVAL_IN_SECONDS = 0.05
+MAX_POLL_INTERVAL_IN_SECONDS = 2.0
+# Left to the function to cancel the query and return before it times out
+DEADLINE_MARGIN_IN_SECONDS = 1.0
+
+# Recent execution times by query type, kept for the life of the container
+execution_times: Dict[str, Deque[float]] = defaultdict(
+    lambda: deque(maxlen=EXECUTION_TIME_HISTORY_SIZE)
+)
+
+
+class QueryInvocation:
+    """Query type and deadline of the function invocation being handled."""
+
+    query_type: Optional[str] = None
+    deadline: Optional[float] = None
+
+    @classmethod
+    def start(cls, context: LambdaContext) -> None:
+        cls.query_type = None
+        cls.deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000
+
+    @classmethod
+    def set_query_type(cls, query_type: str) -> None:
+        cls.query_type = query_type
+
+
+def get_expected_execution_time(query_type: Optional[str]) -> float:
+    history = execution_times.get(query_type or "")
+    if not history:
+        return DEFAULT_EXPECTED_EXECUTION_TIME_IN_SECONDS
+    return statistics.median(history)
+
+
+def record_execution_time(
+    query_type: Optional[str], query_execution: Dict[str, Any], elapsed: float
+) -> None:
+    if query_type is None or query_execution["Status"]["State"] != "SUCCEEDED":
+        return
+    total_execution_time_in_millis = query_execution.get("Statistics", {}).get(
+        "TotalExecutionTimeInMillis"
+    )
+    execution_times[query_type].append(
+        elapsed
+        if total_execution_time_in_millis is None
+        else total_execution_time_in_millis / 1000
+    )
+
+
+def get_poll_delay(elapsed: float, expected: float) -> float:
+    # Before the expected completion each check halves the time left to it, so
+    # checks tighten around it. After it the delay grows with the overrun.
+    if elapsed < expected:
+        delay = (expected - elapsed) / 2
+    else:
+        delay = (elapsed - expected) / 2
+    return min(max(delay, MIN_POLL_INTERVAL_IN_SECONDS), MAX_POLL_INTERVAL_IN_SECONDS)
+
+
+def wait_for_query_execution(
+    query_execution_id: str,
+    max_time_in_seconds: int,
+    get_query_execution: Callable[[str], Dict[str, Any]],
+    stop_query_execution: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Poll a query execution until it finishes or runs out of time.
+
+    Checks are scheduled around the median execution time of the query type
+    of the invocation. The time available is max_time_in_seconds, cut short
+    to leave DEADLINE_MARGIN_IN_SECONDS before the function deadline. When
+    it runs out stop_query_execution is called, if given, so the query does
+    not keep running after the function gave up on it. The last state read
+    is returned either way.
+    """
+    start = time.monotonic()
+    deadline = start + max_time_in_seconds
+    if QueryInvocation.deadline is not None:
+        deadline = min(deadline, QueryInvocation.deadline - DEADLINE_MARGIN_IN_SECONDS)
+    expected = get_expected_execution_time(QueryInvocation.query_type)
+
+    while True:
+        now = time.monotonic()
+        delay = get_poll_delay(now - start, expected)
+        if now + delay > deadline:
+            delay = max(deadline - now, 0)
+        time.sleep(delay)
+
+        query_execution = get_query_execution(query_execution_id)
+        elapsed = time.monotonic() - start
+        if query_execution["Status"]["State"] in FINISHED_QUERY_STATES:
+            record_execution_time(QueryInvocation.query_type, query_execution, elapsed)
+            return query_execution
+        if time.monotonic() >= deadline:
+            if stop_query_execution is not None:
+                stop_query_execution(query_execution_id)
+            return query_execution
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import os
+import re
+from typing import TYPE_CHECKING, Optional, cast
+
+# AWS Libraries
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client
+from cms_common.cache.ttl_cache import ONE_MINUTE_IN_SECONDS, ttl_cache
+
+if TYPE_CHECKING:
+    # Third Party Libraries
+    from mypy_boto3_glue import GlueClient
+else:
+    GlueClient = object
+
+logger = Logger()
+
+DEFAULT_RESULT_REUSE_MAX_AGE_IN_MINUTES = 5
+MAX_CACHED_RESULTS = 256
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def get_result_reuse_max_age_in_minutes() -> int:
+    # Zero disables both the in-container cache and Athena result reuse
+    return max(
+        int(
+            os.environ.get(
+                "RESULT_REUSE_MAX_AGE_IN_MINUTES",
+                DEFAULT_RESULT_REUSE_MAX_AGE_IN_MINUTES,
+            )
+        ),
+        0,
+    )
+
+
+def normalize_query(query_string: str) -> str:
+    # Queries differing only in whitespace or a trailing semicolon share a key
+    return WHITESPACE_PATTERN.sub(" ", query_string).strip().rstrip(";").rstrip()
+
+
+def get_versioned_query(query_string: str, table_version: str) -> str:
+    # Athena only reuses results for an identical query string, so the table
+    # version is embedded to stop results being reused across schema changes
+    return f"/* table_version={table_version} */ {normalize_query(query_string)}"
+
+
+def get_glue_client() -> GlueClient:
+    return cast(GlueClient, get_client("glue"))
+
+
+@ttl_cache(ttl_in_seconds=ONE_MINUTE_IN_SECONDS)
+def _get_table_version(database_name: str, table_name: str) -> str:
+    table = get_glue_client().get_table(DatabaseName=database_name, Name=table_name)[
+        "Table"
+    ]
+    return table.get("VersionId") or table["UpdateTime"].isoformat()
+
+
+def get_table_version(database_name: str, table_name: str) -> Optional[str]:
+    try:
+        return _get_table_version(database_name, table_name)
+    except (ClientError, KeyError):
+        # Without a version a cached result could outlive a schema change, so
+        # the caller runs the query uncached instead of failing the request
+        logger.warning(
+            "Could not get version of table %s.%s, skipping result cache.",
+            database_name,
+            table_name,
+            exc_info=True,
+        )
+        return None
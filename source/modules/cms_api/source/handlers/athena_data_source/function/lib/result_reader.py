@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import csv
+import io
+import re
+from contextlib import closing
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, cast
+
+# AWS Libraries
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client
+
+if TYPE_CHECKING:
+    # Third Party Libraries
+    from mypy_boto3_athena import AthenaClient
+    from mypy_boto3_s3 import S3Client
+else:
+    AthenaClient = object
+    S3Client = object
+
+logger = Logger()
+
+# Largest page GetQueryResults returns
+MAX_GET_QUERY_RESULTS_PAGE_SIZE = 1000
+
+S3_OUTPUT_LOCATION_PATTERN = re.compile(r"^s3://(?P<bucket>[^/]+)/(?P<key>.+\.csv)$")
+
+
+def get_athena_client() -> AthenaClient:
+    return cast(AthenaClient, get_client("athena"))
+
+
+def get_s3_client() -> S3Client:
+    return cast(S3Client, get_client("s3"))
+
+
+def read_query_results(
+    query_execution: Dict[str, Any],
+    max_rows: Optional[int] = None,
+    stream_results: bool = False,
+) -> Dict[str, Any]:
+    """
+    Read up to max_rows rows, including the header row, of a succeeded query.
+
+    The result has the shape of a GetQueryResults response. When stream_results
+    is set the CSV output object of the query is streamed from S3, so the rows
+    are not bound by the GetQueryResults page size or its JSON overhead. Reading
+    falls back to paginating GetQueryResults when the output cannot be streamed.
+    """
+    query_execution_id = query_execution["QueryExecutionId"]
+    output_location = query_execution.get("ResultConfiguration", {}).get(
+        "OutputLocation", ""
+    )
+    output_location_match = S3_OUTPUT_LOCATION_PATTERN.match(output_location)
+
+    if stream_results and output_location_match:
+        try:
+            return read_query_results_from_s3(
+                query_execution_id=query_execution_id,
+                bucket=output_location_match["bucket"],
+                key=output_location_match["key"],
+                max_rows=max_rows,
+            )
+        except (ClientError, csv.Error, UnicodeDecodeError):
+            logger.warning(
+                "Could not stream results of query %s from %s, paginating instead.",
+                query_execution_id,
+                output_location,
+                exc_info=True,
+            )
+
+    return read_query_results_paginated(
+        query_execution_id=query_execution_id, max_rows=max_rows
+    )
+
+
+def read_query_results_from_s3(
+    query_execution_id: str, bucket: str, key: str, max_rows: Optional[int] = None
+) -> Dict[str, Any]:
+    # A single row page is the cheapest way to get the typed column metadata,
+    # the rows themselves come from the CSV object
+    column_info = get_athena_client().get_query_results(
+        QueryExecutionId=query_execution_id, MaxResults=1
+    )["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]
+
+    body = get_s3_client().get_object(Bucket=bucket, Key=key)["Body"]
+    with closing(body):
+        rows = list(islice(iter_csv_rows(body, len(column_info)), max_rows))
+
+    return {
+        "ResultSet": {
+            "Rows": rows,
+            "ResultSetMetadata": {"ColumnInfo": column_info},
+        }
+    }
+
+
+def iter_csv_rows(stream: io.IOBase, column_count: int) -> Iterator[Dict[str, Any]]:
+    # Rows are parsed as the body streams in, so reading stops downloading as
+    # soon as enough rows are read. Athena writes NULL as an empty field, which
+    # like GetQueryResults is returned without a VarCharValue.
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))  # type: ignore[type-var]
+    for record in reader:
+        if len(record) != column_count:
+            raise csv.Error(
+                f"Expected {column_count} columns but row {reader.line_num} has {len(record)}"
+            )
+        yield {"Data": [{"VarCharValue": value} if value else {} for value in record]}
+
+
+def read_query_results_paginated(
+    query_execution_id: str, max_rows: Optional[int] = None
+) -> Dict[str, Any]:
+    rows: List[Dict[str, Any]] = []
+    column_info: List[Dict[str, Any]] = []
+    request: Dict[str, Any] = {"QueryExecutionId": query_execution_id}
+
+    while max_rows is None or len(rows) < max_rows:
+        remaining_rows = MAX_GET_QUERY_RESULTS_PAGE_SIZE
+        if max_rows is not None:
+            remaining_rows = min(max_rows - len(rows), remaining_rows)
+
+        page = get_athena_client().get_query_results(
+            **request, MaxResults=remaining_rows
+        )
+        column_info = page["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]  # type: ignore[assignment]
+        rows.extend(page["ResultSet"]["Rows"])  # type: ignore[arg-type]
+
+        if "NextToken" not in page:
+            break
+        request["NextToken"] = page["NextToken"]
+
+    return {
+        "ResultSet": {
+            "Rows": rows,
+            "ResultSetMetadata": {"ColumnInfo": column_info},
+        }
+    }
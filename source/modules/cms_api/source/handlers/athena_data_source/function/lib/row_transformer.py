@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+ValueConverter = Callable[[str], Any]
+RowTransformer = Callable[[Sequence[Dict[str, Any]]], Dict[str, Any]]
+
+# (column name, Athena column type) for every column of a result set
+ColumnSet = Tuple[Tuple[str, str], ...]
+
+ROOT_NODE = 0
+MAX_COMPILED_TRANSFORMERS = 64
+
+
+def to_boolean(value: str) -> bool:
+    return value == "true"
+
+
+def to_timestamp(value: str) -> str:
+    # Athena timestamps have no zone and are stored in UTC. GraphQL exposes them
+    # as ISO 8601 strings, anything that does not parse is passed through as is.
+    try:
+        parsed_value = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed_value.tzinfo is None:
+        parsed_value = parsed_value.replace(tzinfo=timezone.utc)
+    return parsed_value.isoformat()
+
+
+TYPE_CONVERTERS: Dict[str, ValueConverter] = {
+    "boolean": to_boolean,
+    "tinyint": int,
+    "smallint": int,
+    "integer": int,
+    "bigint": int,
+    "float": float,
+    "real": float,
+    "double": float,
+    "decimal": float,
+    "timestamp": to_timestamp,
+}
+
+
+def get_value_converter(column_type: str) -> Optional[ValueConverter]:
+    # Parameterized types such as decimal(10,2) convert like their base type.
+    # None means the value is kept as the string Athena returned.
+    return TYPE_CONVERTERS.get(column_type.split("(", 1)[0].strip().lower())
+
+
+def get_column_set(column_info: Sequence[Dict[str, Any]]) -> ColumnSet:
+    return tuple(
+        (column["Name"], column.get("Type", "varchar")) for column in column_info
+    )
+
+
+@lru_cache(maxsize=MAX_COMPILED_TRANSFORMERS)
+def compile_row_transformer(column_set: ColumnSet) -> RowTransformer:
+    """
+    Compile a transformer from a row of Athena cells to a nested GraphQL object.
+
+    Column names are the dot separated path of a field, for example
+    vehicleIdentification.vin. The path tree is resolved once per column set
+    into a flat list of links between numbered nodes and a flat list of value
+    setters, so transforming a row only creates its dicts and converts its
+    cells.
+    """
+    node_ids: Dict[Tuple[str, ...], int] = {(): ROOT_NODE}
+    links: List[Tuple[int, str, int]] = []
+    setters: List[Tuple[int, int, Optional[ValueConverter]]] = []
+
+    for column_index, (column_name, column_type) in enumerate(column_set):
+        parent_id = ROOT_NODE
+        path: Tuple[str, ...] = ()
+        for key in column_name.split("."):
+            path = (*path, key)
+            if path not in node_ids:
+                node_ids[path] = len(node_ids)
+                links.append((parent_id, key, node_ids[path]))
+            parent_id = node_ids[path]
+        setters.append((column_index, parent_id, get_value_converter(column_type)))
+
+    node_count = len(node_ids)
+
+    def transform_row(cells: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        nodes: List[Dict[str, Any]] = [{} for _ in range(node_count)]
+        for parent_id, key, child_id in links:
+            nodes[parent_id][key] = nodes[child_id]
+        for column_index, node_id, converter in setters:
+            value = cells[column_index].get("VarCharValue")
+            if value is not None and converter is not None:
+                value = converter(value)
+            nodes[node_id]["value"] = value
+        return nodes[ROOT_NODE]
+
+    return transform_row
@@ -29,3 +29,8 @@ def validate_query_table_name(value: str) -> None:
 def validate_query_vin_input(value: str) -> None:
     if bool(re.match(r"^[A-Za-z0-9]+$", str(value))) is False:
         raise AthenaQueryError("vin input contained invalid characters")
+
+
+def validate_query_signal_path(value: str) -> None:
+    if bool(re.match(r"^\w+(\.\w+)*\Z", str(value))) is False:
+        raise AthenaQueryError("signal path contained invalid characters")
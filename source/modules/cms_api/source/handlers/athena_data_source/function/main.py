@@ -4,24 +4,50 @@
 
 # Standard Library
 import os
-from collections import defaultdict
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict, List, Union
-
-# Third Party Libraries
-from backoff import fibo, on_predicate
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union, cast
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
+from cms_common.cache.ttl_cache import ttl_cache
+
 # Connected Mobility Solution on AWS
 from .lib.athena_exceptions import AthenaQueryError
+from .lib.latest_state import get_latest_states, is_latest_state_enabled
 from .lib.operational_metrics import write_metric
-from .lib.query_config import QUERY_TYPE_HANDLER
+from .lib.query_config import QUERY_TYPE_HANDLER, AthenaQuery, split_batch_results
+from .lib.query_lease import (
+    get_query_key,
+    is_query_lease_enabled,
+    release_query_lease,
+    start_or_join_query_execution,
+)
+from .lib.query_metrics import (
+    add_cache_metrics,
+    add_latest_state_metrics,
+    add_query_execution_metrics,
+    add_query_type_dimension,
+    add_result_metrics,
+    metrics,
+)
+from .lib.query_poller import (
+    FINISHED_QUERY_STATES,
+    QueryInvocation,
+    wait_for_query_execution,
+)
+from .lib.result_cache import (
+    MAX_CACHED_RESULTS,
+    get_result_reuse_max_age_in_minutes,
+    get_table_version,
+    get_versioned_query,
+)
+from .lib.result_reader import read_query_results
+from .lib.row_transformer import compile_row_transformer, get_column_set
 
 if TYPE_CHECKING:
     # Third Party Libraries
@@ -33,56 +59,27 @@ tracer = Tracer()
 logger = Logger()
 
 
-@lru_cache(maxsize=128)
 def get_athena_client() -> AthenaClient:
-    return boto3.client(
-        "athena", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+    return cast(AthenaClient, get_client("athena"))
+
+
+prewarm_clients(["athena", "dynamodb", "glue", "s3"])
+
+RESULT_REUSE_MAX_AGE_IN_MINUTES = get_result_reuse_max_age_in_minutes()
 
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@metrics.log_metrics
 def handler(  # pylint: disable=inconsistent-return-statements
-    event: Dict[str, Any], context: LambdaContext
-) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    event: Union[Dict[str, Any], List[Dict[str, Any]]], context: LambdaContext
+) -> Union[List[Any], Dict[str, Any]]:
+    QueryInvocation.start(context)
     try:
-        query_type = event["info"]["fieldName"]
-        selection_set_list = event["selectionSetList"]
-        arguments = event["arguments"]
-
-        if os.environ["REPORT_METRICS_ENABLED"] == "Yes":
-            try:
-                write_metric(
-                    metric_data={
-                        "Type": "CMSApiAppSyncRequest",
-                        "Request": event["info"]["fieldName"],
-                        "RequestType": event["info"]["parentTypeName"],
-                    },
-                )
-            # Catch all exceptions here so that publishing metrics will never break API functionality
-            except Exception:  # pylint: disable=broad-exception-caught
-                logger.error("Failed to write operational metrics", exc_info=True)
-
-        # Builds query based on query type
-        query = QUERY_TYPE_HANDLER[query_type]
-        query_string = query.query_string_builder(
-            selection_set_list,
-            os.environ["GLUE_TABLE_NAME"],
-            arguments,
-        )
-
-        # Executes query and waits for successful status
-        logger.info(f"Executing Query: {query_string}")
-        results = execute_query(
-            query_string=query_string,
-            query_execution_context={"Database": os.environ["GLUE_DATABASE_NAME"]},
-            workgroup=os.environ["ATHENA_WORKGROUP"],
-            max_time_in_seconds=query.max_time_in_seconds,
-        )
-
-        # Processes results into json format consumable by AppSync
-        results_json = results_to_json(results)
-        return results_json if query.multiple_results else results_json[0]
+        # AppSync BatchInvoke passes a list of resolver events
+        if isinstance(event, list):
+            return handle_batch(event)
+        return handle_request(event)
 
     except AthenaQueryError as err:
         logger.error(f"Error while running Athena query: {err}")
@@ -97,21 +94,270 @@ def handler(  # pylint: disable=inconsistent-return-statements
         raise err
 
 
-def poll_query_status(
-    query_execution_id: str, max_time_in_seconds: int
+def handle_request(event: Dict[str, Any]) -> Union[List[Any], Dict[str, Any]]:
+    query_type = event["info"]["fieldName"]
+    selection_set_list = event["selectionSetList"]
+    arguments = event["arguments"]
+
+    add_query_type_dimension(query_type)
+    QueryInvocation.set_query_type(query_type)
+    write_request_metric(event)
+
+    # Builds query based on query type
+    query = QUERY_TYPE_HANDLER[query_type]
+    query_string = query.query_string_builder(
+        selection_set_list,
+        get_glue_table(query),
+        arguments,
+    )
+
+    if query.latest_state_key_argument is not None and is_latest_state_enabled():
+        key = arguments[query.latest_state_key_argument]
+        latest_states = get_latest_states([key], selection_set_list)
+        add_latest_state_metrics(
+            hit_count=len(latest_states), miss_count=1 - len(latest_states)
+        )
+        if key in latest_states:
+            return latest_states[key]
+
+    results_json = get_results_json(query_string, query)
+    if not results_json and query.fallback is not None:
+        results_json = get_results_json(
+            query.fallback.query_string_builder(
+                selection_set_list,
+                get_glue_table(query.fallback),
+                arguments,
+            ),
+            query.fallback,
+        )
+    if query.result_builder is not None:
+        return query.result_builder(results_json, arguments)
+    return results_json if query.multiple_results else results_json[0]
+
+
+def handle_batch(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Every event of a batch resolves the same field. The batch is answered
+    # with one Athena query over the union of the selection sets, and its rows
+    # are scattered back to the events by their batch key.
+    if not events:
+        return []
+
+    query_type = events[0]["info"]["fieldName"]
+    query = QUERY_TYPE_HANDLER[query_type]
+    if query.batch_query_string_builder is None or query.batch_key_argument is None:
+        return [get_batch_item(handle_request, event) for event in events]
+
+    add_query_type_dimension(query_type)
+    QueryInvocation.set_query_type(query_type)
+    write_request_metric(events[0])
+
+    batch_items: List[Optional[Dict[str, Any]]] = [None] * len(events)
+    batch_keys: List[str] = []
+    for index, event in enumerate(events):
+        try:
+            # Validates the arguments of each event on its own, so one invalid
+            # event fails only its own field
+            query.query_string_builder(
+                event["selectionSetList"],
+                get_glue_table(query),
+                event["arguments"],
+            )
+        except AthenaQueryError as err:
+            batch_items[index] = get_batch_error(err)
+            continue
+        batch_keys.append(event["arguments"][query.batch_key_argument])
+
+    selection_set = list(
+        dict.fromkeys(
+            selection_path
+            for event in events
+            for selection_path in event["selectionSetList"]
+        )
+    )
+    batch_keys = list(dict.fromkeys(batch_keys))
+
+    results_by_key: Dict[str, Dict[str, Any]] = {}
+    if (
+        batch_keys
+        and query.latest_state_key_argument is not None
+        and is_latest_state_enabled()
+    ):
+        results_by_key = get_latest_states(batch_keys, selection_set)
+        add_latest_state_metrics(
+            hit_count=len(results_by_key),
+            miss_count=len(batch_keys) - len(results_by_key),
+        )
+
+    # Keys a query finds no rows for are looked up with its fallback
+    batch_query: Optional[AthenaQuery] = query
+    while (
+        batch_query is not None and batch_query.batch_query_string_builder is not None
+    ):
+        missing_batch_keys = [key for key in batch_keys if key not in results_by_key]
+        if not missing_batch_keys:
+            break
+        query_string = batch_query.batch_query_string_builder(
+            selection_set,
+            get_glue_table(batch_query),
+            missing_batch_keys,
+        )
+        results_by_key.update(
+            split_batch_results(get_results_json(query_string, batch_query))
+        )
+        batch_query = batch_query.fallback
+
+    return [
+        batch_item
+        or {"data": results_by_key.get(event["arguments"][query.batch_key_argument])}
+        for event, batch_item in zip(events, batch_items)
+    ]
+
+
+def get_batch_item(
+    request_handler: Callable[[Dict[str, Any]], Any], event: Dict[str, Any]
 ) -> Dict[str, Any]:
-    @on_predicate(
-        fibo,
-        lambda status: status["State"] not in ("SUCCEEDED", "FAILED", "CANCELLED"),
-        max_time=max_time_in_seconds,
+    try:
+        return {"data": request_handler(event)}
+    except AthenaQueryError as err:
+        return get_batch_error(err)
+
+
+def get_batch_error(err: Exception) -> Dict[str, Any]:
+    # Read by the batch response mapping template to fail only this field
+    logger.error(f"Error while resolving batch item: {err}")
+    return {"errorMessage": str(err), "errorType": type(err).__name__}
+
+
+def write_request_metric(event: Dict[str, Any]) -> None:
+    if os.environ["REPORT_METRICS_ENABLED"] == "Yes":
+        try:
+            write_metric(
+                metric_data={
+                    "Type": "CMSApiAppSyncRequest",
+                    "Request": event["info"]["fieldName"],
+                    "RequestType": event["info"]["parentTypeName"],
+                },
+            )
+        # Catch all exceptions here so that publishing metrics will never break API functionality
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to write operational metrics", exc_info=True)
+
+
+def get_glue_table(query: AthenaQuery) -> str:
+    # Queries that name their VINs read the partition projected Parquet table,
+    # the others scan the table over the raw JSON data
+    if query.partition_projected:
+        return os.environ["GLUE_PARQUET_TABLE_NAME"]
+    return os.environ["GLUE_TABLE_NAME"]
+
+
+def get_results_json(query_string: str, query: AthenaQuery) -> List[Dict[str, Any]]:
+    table_version = (
+        get_table_version(os.environ["GLUE_DATABASE_NAME"], get_glue_table(query))
+        if RESULT_REUSE_MAX_AGE_IN_MINUTES
+        else None
+    )
+
+    if table_version is None:
+        return run_query(
+            query_string=query_string,
+            database=os.environ["GLUE_DATABASE_NAME"],
+            workgroup=os.environ["ATHENA_WORKGROUP"],
+            max_time_in_seconds=query.max_time_in_seconds,
+            stream_results=query.multiple_results,
+        )
+
+    cache_misses = run_cached_query.cache_info().misses
+    results_json = run_cached_query(
+        query_string=get_versioned_query(query_string, table_version),
+        database=os.environ["GLUE_DATABASE_NAME"],
+        workgroup=os.environ["ATHENA_WORKGROUP"],
+        max_time_in_seconds=query.max_time_in_seconds,
+        result_reuse_max_age_in_minutes=RESULT_REUSE_MAX_AGE_IN_MINUTES,
+        stream_results=query.multiple_results,
+    )
+    add_cache_metrics(
+        result_cache_hit=run_cached_query.cache_info().misses == cache_misses
+    )
+    return results_json
+
+
+def run_query(
+    query_string: str,
+    database: str,
+    workgroup: str,
+    max_time_in_seconds: int,
+    result_reuse_max_age_in_minutes: Optional[int] = None,
+    stream_results: bool = False,
+) -> List[Dict[str, Any]]:
+    # Executes query and waits for successful status
+    logger.info(f"Executing Query: {query_string}")
+    results = execute_query(
+        query_string=query_string,
+        query_execution_context={"Database": database},
+        workgroup=workgroup,
+        max_time_in_seconds=max_time_in_seconds,
+        result_reuse_max_age_in_minutes=result_reuse_max_age_in_minutes,
+        stream_results=stream_results,
+    )
+
+    # Processes results into json format consumable by AppSync
+    transform_start = time.perf_counter()
+    results_json = results_to_json(results)
+    add_result_metrics(
+        row_count=len(results_json),
+        transform_time_in_millis=(time.perf_counter() - transform_start) * 1000,
     )
-    def _get_query_status(query_execution_id: str) -> Dict[str, Any]:
+    return results_json
+
+
+# In-container tier in front of Athena result reuse. Keys are the normalized,
+# table versioned query string so both tiers are invalidated together.
+run_cached_query = ttl_cache(
+    ttl_in_seconds=RESULT_REUSE_MAX_AGE_IN_MINUTES * 60,
+    maxsize=MAX_CACHED_RESULTS,
+    negative_exceptions=(),
+)(run_query)
+
+
+def poll_query_execution(
+    query_execution_id: str, max_time_in_seconds: int, started: bool = True
+) -> Dict[str, Any]:
+    def get_query_execution(query_execution_id: str) -> Dict[str, Any]:
         response = get_athena_client().get_query_execution(
             QueryExecutionId=query_execution_id
         )
-        return response["QueryExecution"]["Status"]  # type: ignore[return-value]
+        return response["QueryExecution"]  # type: ignore[return-value]
+
+    def stop_query_execution(query_execution_id: str) -> None:
+        logger.warning(f"Cancelling query execution {query_execution_id}")
+        get_athena_client().stop_query_execution(QueryExecutionId=query_execution_id)
+
+    # Only a query started by this invocation is cancelled, a joined one may
+    # still be awaited by its other callers
+    return wait_for_query_execution(
+        query_execution_id,
+        max_time_in_seconds,
+        get_query_execution,
+        stop_query_execution if started else None,
+    )
+
 
-    return _get_query_status(query_execution_id)
+def poll_and_measure_query_execution(
+    query_execution_id: str, max_time_in_seconds: int, started: bool = True
+) -> Dict[str, Any]:
+    poll_start = time.perf_counter()
+    query_execution = poll_query_execution(
+        query_execution_id, max_time_in_seconds, started
+    )
+    poll_time_in_millis = (time.perf_counter() - poll_start) * 1000
+    logger.info(
+        f"Waited {poll_time_in_millis:.0f} ms for query execution {query_execution_id}"
+    )
+    add_query_execution_metrics(
+        query_execution, poll_time_in_millis=poll_time_in_millis
+    )
+    return query_execution
 
 
 def execute_query(
@@ -119,22 +365,71 @@ def execute_query(
     query_execution_context: Dict[str, Any],
     workgroup: str,
     max_time_in_seconds: int,
+    result_reuse_max_age_in_minutes: Optional[int] = None,
+    stream_results: bool = False,
 ) -> Dict[str, Any]:
-    query_execution_id = get_athena_client().start_query_execution(
-        QueryString=query_string,
-        QueryExecutionContext=query_execution_context,  # type: ignore[arg-type]
-        WorkGroup=workgroup,
-    )["QueryExecutionId"]
-    query_status = poll_query_status(query_execution_id, max_time_in_seconds)
+    start_query_execution_kwargs: Dict[str, Any] = {}
+    if result_reuse_max_age_in_minutes:
+        start_query_execution_kwargs["ResultReuseConfiguration"] = {
+            "ResultReuseByAgeConfiguration": {
+                "Enabled": True,
+                "MaxAgeInMinutes": result_reuse_max_age_in_minutes,
+            }
+        }
+
+    def start_query_execution() -> str:
+        return get_athena_client().start_query_execution(
+            QueryString=query_string,
+            QueryExecutionContext=query_execution_context,  # type: ignore[arg-type]
+            WorkGroup=workgroup,
+            **start_query_execution_kwargs,
+        )["QueryExecutionId"]
+
+    # Joining an execution reuses its results, so it only applies to queries
+    # that accept reused results
+    if is_query_lease_enabled() and result_reuse_max_age_in_minutes:
+        # Identical queries running in other containers are joined rather than
+        # started again. A finished execution releases its lease, so later
+        # callers do not read its results past their reuse age, and a failed
+        # joined execution is started or joined once more.
+        query_key = get_query_key(
+            query_string, query_execution_context["Database"], workgroup
+        )
+        for _ in range(2):
+            query_execution_id, started = start_or_join_query_execution(
+                query_key, start_query_execution, max_time_in_seconds
+            )
+            query_execution = poll_and_measure_query_execution(
+                query_execution_id, max_time_in_seconds, started
+            )
+            query_state = query_execution["Status"]["State"]
+            # A joined execution that outlasted this caller is left running and
+            # leased for its other callers
+            if query_state in FINISHED_QUERY_STATES or started:
+                release_query_lease(query_key, query_execution_id)
+            if query_state in ("FAILED", "CANCELLED") and not started:
+                continue
+            break
+    else:
+        query_execution = poll_and_measure_query_execution(
+            start_query_execution(), max_time_in_seconds
+        )
+
+    query_status = query_execution["Status"]
     if query_status["State"] != "SUCCEEDED":
-        logger.error(query_status["StateChangeReason"])
+        logger.error(
+            query_status.get("StateChangeReason", "Query execution ran out of time")
+        )
         raise AthenaQueryError(
             f"Query execution failed with status {query_status['State']}"
         )
-    results = get_athena_client().get_query_results(
-        QueryExecutionId=query_execution_id, MaxResults=int(os.environ["RECORD_LIMIT"])
+    return read_query_results(
+        query_execution,
+        # The first row holds the column names and keyset pages read one row
+        # past the page to find the next cursor
+        max_rows=int(os.environ["RECORD_LIMIT"]) + 2,
+        stream_results=stream_results,
     )
-    return results  # type: ignore[return-value]
 
 
 def results_to_json(unprocessed_results: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -145,22 +440,5 @@ def results_to_json(unprocessed_results: Dict[str, Any]) -> List[Dict[str, Any]]
     # Data rows. Skips the first row as it contains column names.
     rows = unprocessed_results["ResultSet"]["Rows"][1:]
 
-    # Nested defaultdict whose children are defaultdicts.
-    def nested() -> Dict[str, Any]:
-        return defaultdict(nested)
-
-    result = []
-    # Iterate over each row represents a flattened json.
-    for row in rows:
-        result_json = nested()
-        # Iterate over each column and to get the json path for that column value.
-        for i, column in enumerate(column_list):
-            current = result_json
-            json_path = column["Name"].split(".")
-            # Iterate over the json path to build the json object.
-            for key in json_path:
-                current = current[key]
-            current["value"] = row["Data"][i]["VarCharValue"]
-        result.append(result_json)
-
-    return result
+    transform_row = compile_row_transformer(get_column_set(column_list))
+    return [transform_row(row["Data"]) for row in rows]
@@ -118,6 +118,7 @@ class CmsAPIConstruct(Construct):
             solution_config_inputs=solution_config_inputs,
             dependency_layer=dependency_layer_construct.dependency_layer,
             token_validation_lambda_arn=module_inputs_construct.token_validation.lambda_arn,
+            identity_provider_id=module_inputs_construct.identity_provider_id,
             vpc_construct=vpc_construct,
         )
 
@@ -150,11 +151,13 @@ class CmsAPIConstruct(Construct):
             glue_schema_arn=module_inputs_construct.glue.schema_arn,
             glue_database_name=module_inputs_construct.glue.database_name,
             glue_table_name=module_inputs_construct.glue.table_name,
+            glue_parquet_table_name=module_inputs_construct.glue.parquet_table_name,
             dependency_layer=dependency_layer_construct.dependency_layer,
             metrics_url=module_inputs_construct.operational_metrics.metrics_url,
             report_metrics_enabled=module_inputs_construct.operational_metrics.report_metrics_enabled,
             deployment_uuid=module_inputs_construct.operational_metrics.deployment_uuid,
             vpc_construct=vpc_construct,
+            latest_state=module_inputs_construct.latest_state,
         )
 
         # Athena Data Source
@@ -14,8 +14,10 @@ from aws_cdk import (
     Stack,
     aws_appsync,
     aws_athena,
+    aws_dynamodb,
     aws_ec2,
     aws_iam,
+    aws_kms,
     aws_lambda,
 )
 from constructs import Construct
@@ -31,7 +33,9 @@ from cms_common.policy_generators.cloudwatch import (
 from cms_common.policy_generators.ec2_vpc import generate_ec2_vpc_policy
 
 # Connected Mobility Solution on AWS
-from .module_integration import ModuleInputsConstruct
+from .module_integration import LatestStateInputs, ModuleInputsConstruct
+
+MAX_GET_VEHICLE_BATCH_SIZE = 25
 
 
 @dataclass(frozen=True)
@@ -42,11 +46,13 @@ class AppSyncAthenaDataSourceConstructInputs:
     glue_database_name: str
     glue_schema_arn: str
     glue_table_name: str
+    glue_parquet_table_name: str
     dependency_layer: aws_lambda.LayerVersion
     metrics_url: str
     report_metrics_enabled: str
     deployment_uuid: str
     vpc_construct: VpcConstruct
+    latest_state: LatestStateInputs
 
 
 class AppSyncAthenaDataSourceConstruct(Construct):
@@ -86,10 +92,36 @@ class AppSyncAthenaDataSourceConstruct(Construct):
                     ),
                 ),
                 enforce_work_group_configuration=True,
+                # Query result reuse is only available on engine version 3
+                engine_version=aws_athena.CfnWorkGroup.EngineVersionProperty(
+                    selected_engine_version="Athena engine version 3",
+                ),
             ),
             tags=[CfnTag(key="GrafanaDataSource", value="true")],
         )
 
+        # Leases of in-flight queries by query hash, so concurrent identical
+        # queries from different containers share one Athena execution
+        self.query_lease_table_key = aws_kms.Key(
+            self,
+            "query-lease-table-key",
+            enable_key_rotation=True,
+        )
+
+        self.query_lease_table = aws_dynamodb.Table(
+            self,
+            "query-lease-table",
+            partition_key=aws_dynamodb.Attribute(
+                name="query_key",
+                type=aws_dynamodb.AttributeType.STRING,
+            ),
+            billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+            encryption=aws_dynamodb.TableEncryption.CUSTOMER_MANAGED,
+            encryption_key=self.query_lease_table_key,
+            point_in_time_recovery=True,
+            time_to_live_attribute="expires_at",
+        )
+
         athena_data_source_lambda_name = ResourceName.hyphen_separated(
             prefix=ResourcePrefix.hyphen_separated(
                 app_unique_id=module_inputs.app_unique_id,
@@ -167,6 +199,12 @@ class AppSyncAthenaDataSourceConstruct(Construct):
                                     arn_format=ArnFormat.SLASH_RESOURCE_NAME,
                                     resource_name=f"{app_sync_athena_data_source_construct_inputs.glue_database_name}/{app_sync_athena_data_source_construct_inputs.glue_table_name}",
                                 ),
+                                Stack.of(self).format_arn(
+                                    service="glue",
+                                    resource="table",
+                                    arn_format=ArnFormat.SLASH_RESOURCE_NAME,
+                                    resource_name=f"{app_sync_athena_data_source_construct_inputs.glue_database_name}/{app_sync_athena_data_source_construct_inputs.glue_parquet_table_name}",
+                                ),
                             ],
                         ),
                     ]
@@ -179,6 +217,7 @@ class AppSyncAthenaDataSourceConstruct(Construct):
                                 "athena:StartQueryExecution",
                                 "athena:GetQueryExecution",
                                 "athena:GetQueryResults",
+                                "athena:StopQueryExecution",
                             ],
                             resources=[
                                 Stack.of(self).format_arn(
@@ -191,6 +230,43 @@ class AppSyncAthenaDataSourceConstruct(Construct):
                         )
                     ]
                 ),
+                "latest-state-policy": aws_iam.PolicyDocument(
+                    statements=[
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=["dynamodb:GetItem", "dynamodb:BatchGetItem"],
+                            resources=[
+                                app_sync_athena_data_source_construct_inputs.latest_state.table_arn
+                            ],
+                        ),
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=["kms:Decrypt"],
+                            resources=[
+                                app_sync_athena_data_source_construct_inputs.latest_state.table_key_arn
+                            ],
+                        ),
+                    ]
+                ),
+                "query-lease-policy": aws_iam.PolicyDocument(
+                    statements=[
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=[
+                                "dynamodb:GetItem",
+                                "dynamodb:PutItem",
+                                "dynamodb:UpdateItem",
+                                "dynamodb:DeleteItem",
+                            ],
+                            resources=[self.query_lease_table.table_arn],
+                        ),
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=["kms:Decrypt", "kms:GenerateDataKey"],
+                            resources=[self.query_lease_table_key.key_arn],
+                        ),
+                    ]
+                ),
                 "ec2-vpc-policy": generate_ec2_vpc_policy(
                     self,
                     vpc_construct=app_sync_athena_data_source_construct_inputs.vpc_construct,
@@ -235,8 +311,17 @@ class AppSyncAthenaDataSourceConstruct(Construct):
                 # functional environmental variables
                 "GLUE_DATABASE_NAME": app_sync_athena_data_source_construct_inputs.glue_database_name,
                 "GLUE_TABLE_NAME": app_sync_athena_data_source_construct_inputs.glue_table_name,
+                "GLUE_PARQUET_TABLE_NAME": app_sync_athena_data_source_construct_inputs.glue_parquet_table_name,
                 "ATHENA_WORKGROUP": self.athena_workgroup.name,
                 "RECORD_LIMIT": "100",
+                "RESULT_REUSE_MAX_AGE_IN_MINUTES": "5",
+                "LATEST_STATE_TABLE_NAME": app_sync_athena_data_source_construct_inputs.latest_state.table_name,
+                "QUERY_LEASE_TABLE_NAME": self.query_lease_table.table_name,
+                # per query Athena statistics in embedded metric format
+                "POWERTOOLS_METRICS_NAMESPACE": ResourcePrefix.slash_separated(
+                    app_unique_id=module_inputs.app_unique_id,
+                    module_name=solution_config_inputs.module_short_name,
+                ),
             },
         )
 
@@ -253,10 +338,17 @@ class AppSyncAthenaDataSourceConstruct(Construct):
             request_mapping_template=aws_appsync.MappingTemplate.from_file(
                 join(
                     dirname(dirname(abspath(__file__))),
-                    "assets/graphql/mapping_templates/lambda_request.vtl",
+                    "assets/graphql/mapping_templates/lambda_batch_request.vtl",
                 )
             ),
-            response_mapping_template=aws_appsync.MappingTemplate.lambda_result(),
+            response_mapping_template=aws_appsync.MappingTemplate.from_file(
+                join(
+                    dirname(dirname(abspath(__file__))),
+                    "assets/graphql/mapping_templates/lambda_batch_response.vtl",
+                )
+            ),
+            # getVehicle fields resolved together are answered by one query
+            max_batch_size=MAX_GET_VEHICLE_BATCH_SIZE,
         )
 
         athena_data_source.create_resolver(
@@ -271,3 +363,42 @@ class AppSyncAthenaDataSourceConstruct(Construct):
             ),
             response_mapping_template=aws_appsync.MappingTemplate.lambda_result(),
         )
+
+        athena_data_source.create_resolver(
+            "resolver-list-vehicles-page",
+            type_name="Query",
+            field_name="listVehiclesPage",
+            request_mapping_template=aws_appsync.MappingTemplate.from_file(
+                join(
+                    dirname(dirname(abspath(__file__))),
+                    "assets/graphql/mapping_templates/lambda_request.vtl",
+                )
+            ),
+            response_mapping_template=aws_appsync.MappingTemplate.lambda_result(),
+        )
+
+        athena_data_source.create_resolver(
+            "resolver-get-vehicle-signal-history",
+            type_name="Query",
+            field_name="getVehicleSignalHistory",
+            request_mapping_template=aws_appsync.MappingTemplate.from_file(
+                join(
+                    dirname(dirname(abspath(__file__))),
+                    "assets/graphql/mapping_templates/lambda_request.vtl",
+                )
+            ),
+            response_mapping_template=aws_appsync.MappingTemplate.lambda_result(),
+        )
+
+        athena_data_source.create_resolver(
+            "resolver-get-fleet-signal-aggregate",
+            type_name="Query",
+            field_name="getFleetSignalAggregate",
+            request_mapping_template=aws_appsync.MappingTemplate.from_file(
+                join(
+                    dirname(dirname(abspath(__file__))),
+                    "assets/graphql/mapping_templates/lambda_request.vtl",
+                )
+            ),
+            response_mapping_template=aws_appsync.MappingTemplate.lambda_result(),
+        )
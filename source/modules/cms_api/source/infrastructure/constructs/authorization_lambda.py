@@ -12,6 +12,7 @@ from constructs import Construct
 from cms_common.config.resource_names import ResourceName, ResourcePrefix
 from cms_common.config.stack_inputs import SolutionConfigInputs
 from cms_common.constructs.vpc_construct import VpcConstruct
+from cms_common.policy_generators.auth import generate_idp_config_read_policy_document
 from cms_common.policy_generators.cloudwatch import (
     generate_lambda_cloudwatch_logs_policy_document,
 )
@@ -27,7 +28,9 @@ class AuthorizationLambdaConstruct(Construct):
         solution_config_inputs: SolutionConfigInputs,
         dependency_layer: aws_lambda.LayerVersion,
         token_validation_lambda_arn: str,
+        identity_provider_id: str,
         vpc_construct: VpcConstruct,
+        max_result_ttl: Duration = Duration.minutes(15),
     ) -> None:
         super().__init__(scope, construct_id)
 
@@ -48,6 +51,10 @@ class AuthorizationLambdaConstruct(Construct):
                 "cloudwatch-policy": generate_lambda_cloudwatch_logs_policy_document(
                     self, lambda_function_name=authorization_lambda_function_name
                 ),
+                # Tokens are validated in-process, the token validation lambda is the fallback
+                "idp-config-policy": generate_idp_config_read_policy_document(
+                    self, identity_provider_id=identity_provider_id
+                ),
                 "lambda-policy": aws_iam.PolicyDocument(
                     statements=[
                         aws_iam.PolicyStatement(
@@ -90,6 +97,12 @@ class AuthorizationLambdaConstruct(Construct):
             environment={
                 "USER_AGENT_STRING": solution_config_inputs.get_user_agent_string(),
                 "TOKEN_VALIDATION_LAMBDA_ARN": token_validation_lambda_arn,
+                "IDENTITY_PROVIDER_ID": identity_provider_id,
+                "TOKEN_VALIDATION_MODE": "in-process",
+                # Caps the ttlOverride derived from each token's remaining lifetime
+                "MAX_AUTHORIZER_RESULT_TTL_IN_SECONDS": str(
+                    max_result_ttl.to_seconds()
+                ),
             },
             log_retention=aws_logs.RetentionDays.THREE_MONTHS,
         )
@@ -16,6 +16,7 @@ from cms_common.config.ssm import resolve_ssm_parameter
 from cms_common.config.stack_inputs import SolutionConfigInputs
 from cms_common.constructs.app_unique_id import AppUniqueId
 from cms_common.constructs.encrypted_s3 import EncryptedS3Construct
+from cms_common.constructs.identity_provider_config import IdentityProviderConfig
 from cms_common.constructs.vpc_construct import create_vpc_config, get_vpc_name
 from cms_common.resource_names.auth import AuthResourceNames
 from cms_common.resource_names.module_short_names import CMSModuleShortNames
@@ -25,6 +26,7 @@ from cms_common.resource_names.module_short_names import CMSModuleShortNames
 class GlueInputs:
     database_name: str
     table_name: str
+    parquet_table_name: str
     schema_arn: str
     registry_name: str
 
@@ -34,6 +36,13 @@ class RootBucketInputs:
     bucket_arn: str
 
 
+@dataclass(frozen=True)
+class LatestStateInputs:
+    table_name: str
+    table_arn: str
+    table_key_arn: str
+
+
 @dataclass(frozen=True)
 class TokenValidationInputs:
     lambda_arn: str
@@ -44,6 +53,10 @@ class ModuleInputsConstruct(Construct):
         super().__init__(scope, construct_id)
         self.app_unique_id = AppUniqueId.create_cfn_parameter(Stack.of(self))
 
+        self.identity_provider_id = IdentityProviderConfig.get_identity_provider_id(
+            scope=self, app_unique_id=self.app_unique_id
+        )
+
         self.vpc_config = create_vpc_config(
             vpc_name=get_vpc_name(self, app_unique_id=self.app_unique_id)
         )
@@ -71,6 +84,12 @@ class ModuleInputsConstruct(Construct):
                     name="glue-table/name",
                 )
             ),
+            parquet_table_name=resolve_ssm_parameter(
+                parameter_name=ResourceName.slash_separated(
+                    prefix=connect_store_module_ssm_prefix_with_leading_slash,
+                    name="glue-parquet-table/name",
+                )
+            ),
             schema_arn=resolve_ssm_parameter(
                 parameter_name=ResourceName.slash_separated(
                     prefix=connect_store_module_ssm_prefix_with_leading_slash,
@@ -93,6 +112,27 @@ class ModuleInputsConstruct(Construct):
             ),
         )
 
+        self.latest_state = LatestStateInputs(
+            table_name=resolve_ssm_parameter(
+                parameter_name=ResourceName.slash_separated(
+                    prefix=connect_store_module_ssm_prefix_with_leading_slash,
+                    name="latest-state-table/name",
+                )
+            ),
+            table_arn=resolve_ssm_parameter(
+                parameter_name=ResourceName.slash_separated(
+                    prefix=connect_store_module_ssm_prefix_with_leading_slash,
+                    name="latest-state-table/arn",
+                )
+            ),
+            table_key_arn=resolve_ssm_parameter(
+                parameter_name=ResourceName.slash_separated(
+                    prefix=connect_store_module_ssm_prefix_with_leading_slash,
+                    name="latest-state-table-key/arn",
+                )
+            ),
+        )
+
         self.token_validation = TokenValidationInputs(
             lambda_arn=resolve_ssm_parameter(
                 parameter_name=AuthResourceNames.from_app_unique_id(
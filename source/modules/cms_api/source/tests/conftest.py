@@ -14,6 +14,7 @@ from .fixtures.fixture_shared import (
 )
 from .handlers.fixtures.fixture_athena_data_source import (
     fixture_athena_data_source_lambda_event,
+    fixture_athena_data_source_metrics,
     fixture_unproccessed_athena_query_results,
 )
 from .handlers.fixtures.fixture_authorization import (
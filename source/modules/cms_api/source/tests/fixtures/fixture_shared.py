@@ -29,6 +29,9 @@ def fixture_context() -> LambdaContext:
             self.aws_request_id = "52fdfc07-2182-154f-163f-5f0f9a621d72"
             self.log_stream_name = "TestLogSteam"
 
+        def get_remaining_time_in_millis(self) -> int:
+            return 60000
+
     return cast(LambdaContext, MockLambdaContext())
 
 
@@ -56,8 +59,11 @@ def fixture_mock_module_env_vars() -> Dict[str, str]:
         "DEPLOYMENT_UUID": "test-deployment-uuid",
         "GLUE_DATABASE_NAME": "test-glue-database",
         "GLUE_TABLE_NAME": "test-glue-table",
+        "GLUE_PARQUET_TABLE_NAME": "test-glue-parquet-table",
         "ATHENA_WORKGROUP": "test-athena-workgroup",
         "RECORD_LIMIT": "100",
+        "RESULT_REUSE_MAX_AGE_IN_MINUTES": "5",
+        "POWERTOOLS_METRICS_NAMESPACE": "test-metrics-namespace",
     }
 
 
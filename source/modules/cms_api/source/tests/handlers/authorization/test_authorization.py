@@ -4,6 +4,7 @@
 
 # Standard Library
 import json
+import os
 from io import BytesIO
 from typing import Any, Dict
 from unittest.mock import patch
@@ -15,6 +16,9 @@ import pytest
 import botocore
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+# CMS Common Library
+from cms_common.auth.token_validation import TokenValidationResult
+
 # Connected Mobility Solution on AWS
 from ....handlers.authorization.main import get_token, handler
 
@@ -130,7 +134,39 @@ def test_authorization_handler_invalid_event(
 ) -> None:
     response = handler(invalid_authorization_event, context)
     assert response["isAuthorized"] is False
+    assert response["ttlOverride"] == 0
+
 
+def test_authorization_handler_validates_in_process(
+    valid_authorization_event: Dict[str, Any],
+    context: LambdaContext,
+    mock_env_for_authorization: None,
+) -> None:
+    token_validation_result = TokenValidationResult(
+        validated=True,
+        status_code=200,
+        message="Mocked success message",
+        claims={"exp": 1600, "sub": "user-id"},
+    )
+    with patch.dict(os.environ, {"IDENTITY_PROVIDER_ID": "test-idp"}), patch(
+        "time.time", return_value=1000
+    ), patch(
+        "cms_common.auth.token_validation.validate_token",
+        return_value=token_validation_result,
+    ) as mock_validate_token, patch(
+        "botocore.client.BaseClient._make_api_call",
+        new=lambda self, operation_name, kwarg: mock_make_api_call(
+            self, operation_name, kwarg, {}
+        ),
+    ):
+        response = handler(valid_authorization_event, context)
+    assert response == {
+        "isAuthorized": True,
+        "ttlOverride": 600,
+        "resolverContext": {"sub": "user-id"},
+    }
+    assert mock_validate_token.call_args.kwargs["token"] == "valid.test.token"
+    assert AuthorizationAPICallBooleans.Invoke is False
 
 def test_get_token_success() -> None:
     token = get_token("Bearer test.bearer.token")
@@ -3,11 +3,54 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
-from typing import Any, Dict
+import os
+import re
+from os.path import abspath, dirname, join
+from typing import Any, Dict, Iterator, List, Tuple
 
 # Third Party Libraries
 import pytest
 
+# Connected Mobility Solution on AWS
+from ....handlers.athena_data_source.function.lib.query_metrics import metrics
+
+VSS_SCHEMA_PATH = join(
+    dirname(dirname(dirname(dirname(abspath(__file__))))),
+    "infrastructure/assets/graphql/schemas/vss_types.graphql",
+)
+ATHENA_TYPES = {
+    "Boolean": "boolean",
+    "Float": "double",
+    "Int": "integer",
+    "String": "varchar",
+}
+SAMPLE_VALUES = {
+    "boolean": "true",
+    "double": "12.5",
+    "integer": "7",
+    "varchar": "test",
+}
+
+
+def get_vss_leaf_columns() -> List[Dict[str, str]]:
+    # Athena column info for every leaf value of the VSS Vehicle type
+    with open(VSS_SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
+        schema = schema_file.read()
+
+    types = {
+        match.group(1): re.findall(r"^\s+(\w+): \[?(\w+)", match.group(2), re.M)
+        for match in re.finditer(r"^type (\w+)[^{]*\{(.*?)^\}", schema, re.S | re.M)
+    }
+
+    def walk(type_name: str, path: Tuple[str, ...]) -> Iterator[Dict[str, str]]:
+        for field_name, field_type in types[type_name]:
+            if field_name == "value" and field_type in ATHENA_TYPES:
+                yield {"Name": ".".join(path), "Type": ATHENA_TYPES[field_type]}
+            elif field_type in types:
+                yield from walk(field_type, (*path, field_name))
+
+    return list(walk("Vehicle", ()))
+
 
 @pytest.fixture(name="athena_data_source_lambda_event")
 def fixture_athena_data_source_lambda_event() -> Dict[str, Any]:
@@ -64,3 +107,12 @@ def fixture_unproccessed_athena_query_results() -> Dict[str, Any]:
             },
         },
     }
+
+
+@pytest.fixture(name="athena_data_source_metrics", autouse=True)
+def fixture_athena_data_source_metrics() -> Iterator[None]:
+    # The namespace is resolved when the metrics are created on import, before
+    # the module environment variables are patched in
+    metrics.namespace = os.environ["POWERTOOLS_METRICS_NAMESPACE"]
+    yield
+    metrics.clear_metrics()
@@ -4,11 +4,16 @@
 # mypy: disable-error-code=misc
 
 # Standard Library
+import json
 import os
-from typing import Any, Dict
-from unittest.mock import MagicMock
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
 
 # Third Party Libraries
+import pytest
 from moto import mock_aws
 
 # AWS Libraries
@@ -16,15 +21,48 @@ import boto3
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
 # Connected Mobility Solution on AWS
+from ...handlers.athena_data_source.function import main
+from ...handlers.athena_data_source.function.lib import (
+    query_lease,
+    query_poller,
+    result_reader,
+)
+from ...handlers.athena_data_source.function.lib.athena_exceptions import (
+    AthenaQueryError,
+)
 from ...handlers.athena_data_source.function.lib.query_config import (
+    QUERY_TYPE_HANDLER,
+    build_fleet_signal_aggregate_query,
     build_get_vehicle_query,
+    build_get_vehicles_batch_query,
+    build_list_vehicles_page_query,
     build_list_vehicles_query,
+    build_signal_history,
+    build_vehicle_page,
+    build_vehicle_signal_history_query,
+    decode_cursor,
+    encode_cursor,
+    get_time_partition_predicate,
+)
+from ...handlers.athena_data_source.function.lib.result_cache import (
+    _get_table_version,
+    get_table_version,
+    get_versioned_query,
+    normalize_query,
+)
+from ...handlers.athena_data_source.function.lib.result_reader import (
+    read_query_results,
+)
+from ...handlers.athena_data_source.function.lib.row_transformer import (
+    compile_row_transformer,
 )
 from ...handlers.athena_data_source.function.main import (
     execute_query,
     handler,
     results_to_json,
+    run_cached_query,
 )
+from .fixtures.fixture_athena_data_source import SAMPLE_VALUES, get_vss_leaf_columns
 
 
 @mock_aws
@@ -70,7 +108,7 @@ def test_build_get_vehicle_query(
     expected_query_string = (
         'SELECT "json"."path" as "json.path", "another"."json"."path" as "another.json.path" '
         'FROM "test-glue-table" '
-        "WHERE vehicleidentification.vin = 'ABCDEFGHIJ12345678' "
+        "WHERE \"vin\" = 'ABCDEFGHIJ12345678' "
         "LIMIT 1"
     )
     query_string = build_get_vehicle_query(selection_set, glue_table, arguments)
@@ -94,6 +132,55 @@ def test_build_list_vehicle_query(
     assert query_string == expected_query_string
 
 
+def test_build_list_vehicles_page_query() -> None:
+    selection_set = [
+        "items",
+        "items/vehicleIdentification",
+        "items/vehicleIdentification/vin",
+        "items/vehicleIdentification/vin/value",
+        "nextToken",
+    ]
+    glue_table = "test-glue-table"
+
+    assert build_list_vehicles_page_query(selection_set, glue_table, {"limit": 10}) == (
+        'SELECT "vehicleIdentification"."vin" as "vehicleIdentification.vin", '
+        '"vehicleidentification"."vin" as "cursor" '
+        'FROM "test-glue-table" '
+        "WHERE vehicleidentification.vin IS NOT NULL "
+        "ORDER BY vehicleidentification.vin LIMIT 11"
+    )
+    assert build_list_vehicles_page_query(
+        ["nextToken"], glue_table, {"after": encode_cursor("ABC123"), "limit": 500}
+    ) == (
+        'SELECT "vehicleidentification"."vin" as "cursor" '
+        'FROM "test-glue-table" '
+        "WHERE vehicleidentification.vin IS NOT NULL "
+        "AND vehicleidentification.vin > 'ABC123' "
+        "ORDER BY vehicleidentification.vin LIMIT 101"
+    )
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor("' OR 1=1 --")])
+def test_decode_cursor_rejects_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(AthenaQueryError):
+        decode_cursor(cursor)
+
+
+def test_build_vehicle_page() -> None:
+    results = [
+        {"speed": {"value": str(index)}, "cursor": {"value": f"VIN{index}"}}
+        for index in range(3)
+    ]
+
+    assert build_vehicle_page(results, {"limit": 2}) == {
+        "items": [{"speed": {"value": "0"}}, {"speed": {"value": "1"}}],
+        "nextToken": encode_cursor("VIN1"),
+    }
+    assert build_vehicle_page(results, {"limit": 3})["nextToken"] is None
+    # Results can be shared with the result cache and must not be modified
+    assert all("cursor" in result for result in results)
+
+
 def test_results_to_json(unproccessed_athena_query_results: Dict[str, Any]) -> None:
     expected_json_results = [
         {
@@ -107,3 +194,786 @@ def test_results_to_json(unproccessed_athena_query_results: Dict[str, Any]) -> N
     ]
     json_result = results_to_json(unproccessed_athena_query_results)
     assert json_result == expected_json_results
+
+
+def test_results_to_json_converts_column_types() -> None:
+    column_info = [
+        {"Name": "vehicleIdentification.vin", "Type": "varchar"},
+        {"Name": "speed", "Type": "double"},
+        {"Name": "traveledDistance", "Type": "bigint"},
+        {"Name": "isMoving", "Type": "boolean"},
+        {"Name": "startTime", "Type": "timestamp"},
+        {"Name": "body.mass", "Type": "decimal(10,2)"},
+        {"Name": "body.color", "Type": "varchar"},
+    ]
+    results = {
+        "ResultSet": {
+            "Rows": [
+                {"Data": [{"VarCharValue": column["Name"]} for column in column_info]},
+                {
+                    "Data": [
+                        {"VarCharValue": "ABC123"},
+                        {"VarCharValue": "42.5"},
+                        {"VarCharValue": "1200"},
+                        {"VarCharValue": "false"},
+                        {"VarCharValue": "2024-01-02 03:04:05.678"},
+                        {"VarCharValue": "1500.25"},
+                        {},
+                    ]
+                },
+            ],
+            "ResultSetMetadata": {"ColumnInfo": column_info},
+        }
+    }
+
+    [result] = results_to_json(results)
+
+    assert result == {
+        "vehicleIdentification": {"vin": {"value": "ABC123"}},
+        "speed": {"value": 42.5},
+        "traveledDistance": {"value": 1200},
+        "isMoving": {"value": False},
+        "startTime": {"value": "2024-01-02T03:04:05.678000+00:00"},
+        "body": {"mass": {"value": 1500.25}, "color": {"value": None}},
+    }
+    assert type(result["body"]) is dict  # pylint: disable=unidiomatic-typecheck
+
+
+def test_results_to_json_vss_columns() -> None:
+    # Every leaf of the VSS Vehicle type, test_scripts/benchmark_row_transformer.py
+    # reports the per row cost over the same surface
+    column_info = get_vss_leaf_columns()
+    row = {
+        "Data": [
+            {"VarCharValue": SAMPLE_VALUES[column["Type"]]} for column in column_info
+        ]
+    }
+    results = {
+        "ResultSet": {
+            "Rows": [row] * 3,
+            "ResultSetMetadata": {"ColumnInfo": column_info},
+        }
+    }
+
+    compile_row_transformer.cache_clear()
+    json_results = results_to_json(results)
+    results_to_json(results)
+
+    assert len(json_results) == 2
+    assert json_results[0] == json_results[1]
+    assert json_results[0]["vehicleIdentification"]["vin"] == {"value": "test"}
+    assert compile_row_transformer.cache_info().hits == 1
+
+
+def test_normalize_query() -> None:
+    assert (
+        normalize_query(' SELECT *\n  FROM "test-table"\tLIMIT 1 ; ')
+        == 'SELECT * FROM "test-table" LIMIT 1'
+    )
+    assert get_versioned_query('SELECT *\nFROM "test-table"', "3") == (
+        '/* table_version=3 */ SELECT * FROM "test-table"'
+    )
+
+
+@mock_aws
+def test_get_table_version() -> None:
+    _get_table_version.cache_clear()
+    glue_client = boto3.client("glue")
+    glue_client.create_database(DatabaseInput={"Name": "test-database"})
+    glue_client.create_table(
+        DatabaseName="test-database", TableInput={"Name": "test-table"}
+    )
+
+    assert get_table_version("test-database", "test-table") is not None
+    assert get_table_version("test-database", "missing-table") is None
+
+
+def test_handler_caches_results(
+    context: LambdaContext,
+    athena_data_source_lambda_event: Dict[str, Any],
+    unproccessed_athena_query_results: Dict[str, Any],
+    mocker: MagicMock,
+) -> None:
+    run_cached_query.cache_clear()
+    mocker.patch("requests.post")
+    mocker.patch.object(
+        main,
+        "get_table_version",
+        side_effect=["1", "1", "2"],
+    )
+    mocked_execute_query: MagicMock = mocker.patch.object(
+        main,
+        "execute_query",
+        return_value=unproccessed_athena_query_results,
+    )
+
+    first_response = handler(athena_data_source_lambda_event, context)
+    assert handler(athena_data_source_lambda_event, context) == first_response
+    mocked_execute_query.assert_called_once()
+    assert mocked_execute_query.call_args.kwargs["query_string"].startswith(
+        "/* table_version=1 */ SELECT"
+    )
+    assert mocked_execute_query.call_args.kwargs[
+        "result_reuse_max_age_in_minutes"
+    ] == int(os.environ["RESULT_REUSE_MAX_AGE_IN_MINUTES"])
+
+    # A new table version must not be served results cached for the old one
+    handler(athena_data_source_lambda_event, context)
+    assert mocked_execute_query.call_count == 2
+
+
+def test_handler_emits_query_metrics(
+    context: LambdaContext,
+    athena_data_source_lambda_event: Dict[str, Any],
+    unproccessed_athena_query_results: Dict[str, Any],
+    mocker: MagicMock,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    run_cached_query.cache_clear()
+    mocker.patch("requests.post")
+    mocker.patch.object(main, "get_table_version", return_value="1")
+    athena_client = MagicMock()
+    athena_client.start_query_execution.return_value = {
+        "QueryExecutionId": "test-query-id"
+    }
+    athena_client.get_query_execution.return_value = {
+        "QueryExecution": {
+            "QueryExecutionId": "test-query-id",
+            "Status": {"State": "SUCCEEDED"},
+            "Statistics": {
+                "DataScannedInBytes": 2048,
+                "EngineExecutionTimeInMillis": 300,
+                "QueryQueueTimeInMillis": 40,
+                "ServiceProcessingTimeInMillis": 20,
+                "TotalExecutionTimeInMillis": 360,
+                "ResultReuseInformation": {"ReusedPreviousResult": False},
+            },
+        }
+    }
+    athena_client.get_query_results.return_value = unproccessed_athena_query_results
+    mocker.patch.object(main, "get_athena_client", return_value=athena_client)
+    mocker.patch.object(result_reader, "get_athena_client", return_value=athena_client)
+
+    handler(athena_data_source_lambda_event, context)
+    handler(athena_data_source_lambda_event, context)
+
+    emf_documents = [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if '"_aws"' in line
+    ]
+    assert len(emf_documents) == 2
+    first_document, second_document = emf_documents
+    assert first_document["QueryType"] == "listVehicles"
+    assert first_document["AthenaDataScanned"] == [2048.0]
+    assert first_document["AthenaEngineExecutionTime"] == [300.0]
+    assert first_document["AthenaResultReused"] == [0.0]
+    assert first_document["ResultRows"] == [2.0]
+    assert first_document["ResultCacheMiss"] == [1.0]
+    assert "ResultTransformTime" in first_document
+    # The second request is served from the container cache without Athena
+    assert second_document["ResultCacheHit"] == [1.0]
+    assert "AthenaDataScanned" not in second_document
+
+
+@mock_aws
+def test_read_query_results_streams_csv_from_s3(mocker: MagicMock) -> None:
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(Bucket="test-athena-results")
+    s3_client.put_object(
+        Bucket="test-athena-results",
+        Key="test-query-id.csv",
+        Body=(
+            '"field","nested.field"\n'
+            '"value-1","multi\nline"\n'
+            '"value-2",\n'
+            '"value-3","nested-value-3"\n'
+        ).encode("utf-8"),
+    )
+    column_info = [{"Name": "field"}, {"Name": "nested.field"}]
+    athena_client = MagicMock()
+    athena_client.get_query_results.return_value = {
+        "ResultSet": {"Rows": [], "ResultSetMetadata": {"ColumnInfo": column_info}}
+    }
+    mocker.patch.object(result_reader, "get_athena_client", return_value=athena_client)
+
+    results = read_query_results(
+        {
+            "QueryExecutionId": "test-query-id",
+            "ResultConfiguration": {
+                "OutputLocation": "s3://test-athena-results/test-query-id.csv"
+            },
+        },
+        max_rows=3,
+        stream_results=True,
+    )
+
+    athena_client.get_query_results.assert_called_once_with(
+        QueryExecutionId="test-query-id", MaxResults=1
+    )
+    assert results["ResultSet"]["ResultSetMetadata"]["ColumnInfo"] == column_info
+    assert results["ResultSet"]["Rows"] == [
+        {"Data": [{"VarCharValue": "field"}, {"VarCharValue": "nested.field"}]},
+        {"Data": [{"VarCharValue": "value-1"}, {"VarCharValue": "multi\nline"}]},
+        {"Data": [{"VarCharValue": "value-2"}, {}]},
+    ]
+
+
+def test_read_query_results_paginates_without_output_location(
+    mocker: MagicMock,
+) -> None:
+    column_info = [{"Name": "field"}]
+    athena_client = MagicMock()
+    athena_client.get_query_results.side_effect = [
+        {
+            "ResultSet": {
+                "Rows": [{"Data": [{"VarCharValue": "field"}]}],
+                "ResultSetMetadata": {"ColumnInfo": column_info},
+            },
+            "NextToken": "test-next-token",
+        },
+        {
+            "ResultSet": {
+                "Rows": [{"Data": [{"VarCharValue": "value-1"}]}],
+                "ResultSetMetadata": {"ColumnInfo": column_info},
+            },
+        },
+    ]
+    mocker.patch.object(result_reader, "get_athena_client", return_value=athena_client)
+
+    results = read_query_results(
+        {"QueryExecutionId": "test-query-id"}, max_rows=5, stream_results=True
+    )
+
+    assert athena_client.get_query_results.call_args_list[1].kwargs == {
+        "QueryExecutionId": "test-query-id",
+        "NextToken": "test-next-token",
+        "MaxResults": 4,
+    }
+    assert len(results["ResultSet"]["Rows"]) == 2
+
+
+def test_build_get_vehicles_batch_query() -> None:
+    assert build_get_vehicles_batch_query(
+        ["speed", "speed/value"], "test-glue-table", ["ABC123", "DEF456"]
+    ) == (
+        'SELECT "speed" as "speed", "vehicleidentification"."vin" as "batchKey" '
+        'FROM (SELECT *, row_number() OVER (PARTITION BY "vin") '
+        'AS batch_row FROM "test-glue-table" '
+        "WHERE \"vin\" IN ('ABC123', 'DEF456')) "
+        "WHERE batch_row = 1"
+    )
+    with pytest.raises(AthenaQueryError):
+        build_get_vehicles_batch_query(["speed/value"], "test-glue-table", ["A'1"])
+
+
+def test_build_get_vehicle_fallback_query() -> None:
+    fallback = QUERY_TYPE_HANDLER["getVehicle"].fallback
+    assert fallback is not None and not fallback.partition_projected
+    assert fallback.query_string_builder(
+        ["speed", "speed/value"], "test-glue-table", {"vin": "ABC123"}
+    ) == (
+        'SELECT "speed" as "speed" FROM "test-glue-table" '
+        "WHERE vehicleidentification.vin = 'ABC123' LIMIT 1"
+    )
+
+
+def test_get_time_partition_predicate() -> None:
+    assert get_time_partition_predicate(
+        datetime(2024, 2, 1, 3, 30, tzinfo=timezone.utc),
+        datetime(2024, 2, 1, 5, 0, tzinfo=timezone.utc),
+    ) == ("\"day\" = '032_2024' AND \"hour\" BETWEEN '03' AND '05'")
+    assert get_time_partition_predicate(
+        datetime(2024, 12, 30, 22, tzinfo=timezone.utc),
+        datetime(2025, 1, 1, 1, tzinfo=timezone(timedelta(hours=-1))),
+    ) == (
+        "((\"day\" = '365_2024' AND \"hour\" >= '22') "
+        "OR \"day\" IN ('366_2024') "
+        "OR (\"day\" = '001_2025' AND \"hour\" <= '02'))"
+    )
+    with pytest.raises(AthenaQueryError):
+        get_time_partition_predicate(
+            datetime(2024, 2, 1, tzinfo=timezone.utc),
+            datetime(2024, 1, 1, tzinfo=timezone.utc),
+        )
+    with pytest.raises(AthenaQueryError):
+        get_time_partition_predicate(
+            datetime(2023, 1, 1, tzinfo=timezone.utc),
+            datetime(2024, 6, 1, tzinfo=timezone.utc),
+        )
+
+
+def test_build_vehicle_signal_history_query() -> None:
+    assert build_vehicle_signal_history_query(
+        [],
+        "test-glue-table",
+        {
+            "vin": "ABC123",
+            "path": "powertrain.tractionBattery.stateOfCharge.current",
+            "from": "2024-02-01T03:30:00Z",
+            "to": "2024-02-01T08:59:59Z",
+        },
+    ) == (
+        'SELECT date_parse("day" || \' \' || "hour", \'%j_%Y %H\') AS "time", '
+        'count(*) AS "count", count(DISTINCT "vin") AS "vehicleCount", '
+        'avg("powertrain"."tractionBattery"."stateOfCharge"."current") AS "average", '
+        'min("powertrain"."tractionBattery"."stateOfCharge"."current") AS "minimum", '
+        'max("powertrain"."tractionBattery"."stateOfCharge"."current") AS "maximum" '
+        'FROM "test-glue-table" '
+        "WHERE \"vin\" = 'ABC123' "
+        "AND \"day\" = '032_2024' AND \"hour\" BETWEEN '03' AND '08' "
+        'AND "powertrain"."tractionBattery"."stateOfCharge"."current" IS NOT NULL '
+        "GROUP BY 1 ORDER BY 1"
+    )
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        {"vins": [], "path": "speed", "from": "2024-02-01", "to": "2024-02-02"},
+        {
+            "vins": ["ABC123"],
+            "path": "speed;",
+            "from": "2024-02-01",
+            "to": "2024-02-02",
+        },
+        {"vins": ["ABC123"], "path": "speed", "from": "yesterday", "to": "2024-02-02"},
+        {
+            "vins": ["ABC123"],
+            "path": "speed",
+            "from": "2024-02-01",
+            "to": "2024-02-02",
+            "bucket": "MINUTE",
+        },
+        # 101 hourly buckets exceed the record limit
+        {
+            "vins": ["ABC123"],
+            "path": "speed",
+            "from": "2024-02-01",
+            "to": "2024-02-05T04:00",
+        },
+    ],
+)
+def test_build_fleet_signal_aggregate_query_rejects_invalid_arguments(
+    arguments: Dict[str, Any]
+) -> None:
+    with pytest.raises(AthenaQueryError):
+        build_fleet_signal_aggregate_query([], "test-glue-table", arguments)
+
+
+def test_build_fleet_signal_aggregate_query() -> None:
+    query_string = build_fleet_signal_aggregate_query(
+        [],
+        "test-glue-table",
+        {
+            "vins": ["ABC123", "DEF456", "ABC123"],
+            "path": "speed",
+            "from": "2024-01-01T00:00:00Z",
+            "to": "2024-02-09T00:00:00Z",
+            "bucket": "DAY",
+        },
+    )
+    assert query_string.startswith('SELECT date_parse("day", \'%j_%Y\') AS "time", ')
+    assert "WHERE \"vin\" IN ('ABC123', 'DEF456') AND ((\"day\" = '001_2024'" in (
+        query_string
+    )
+
+
+def test_build_signal_history() -> None:
+    assert build_signal_history(
+        [
+            {
+                "time": {"value": "2024-02-01T03:00:00+00:00"},
+                "count": {"value": 2},
+                "vehicleCount": {"value": 1},
+                "average": {"value": 41.5},
+                "minimum": {"value": 40.0},
+                "maximum": {"value": 43.0},
+            }
+        ],
+        {"path": "speed"},
+    ) == {
+        "path": "speed",
+        "bucket": "HOUR",
+        "buckets": [
+            {
+                "time": "2024-02-01T03:00:00+00:00",
+                "count": 2,
+                "vehicleCount": 1,
+                "average": 41.5,
+                "minimum": 40.0,
+                "maximum": 43.0,
+            }
+        ],
+    }
+
+
+def test_handler_batches_get_vehicle(context: LambdaContext, mocker: MagicMock) -> None:
+    mocker.patch("requests.post")
+    mocker.patch.object(main, "get_table_version", return_value=None)
+
+    def get_batch_results(speed: str, vin: str) -> Dict[str, Any]:
+        return {
+            "ResultSet": {
+                "Rows": [
+                    {"Data": [{"VarCharValue": "speed"}, {"VarCharValue": "batchKey"}]},
+                    {"Data": [{"VarCharValue": speed}, {"VarCharValue": vin}]},
+                ],
+                "ResultSetMetadata": {
+                    "ColumnInfo": [
+                        {"Name": "speed", "Type": "integer"},
+                        {"Name": "batchKey", "Type": "varchar"},
+                    ]
+                },
+            }
+        }
+
+    # DEF456 only has telemetry from before the Parquet table
+    mocked_execute_query: MagicMock = mocker.patch.object(
+        main,
+        "execute_query",
+        side_effect=[
+            get_batch_results("42", "ABC123"),
+            get_batch_results("7", "DEF456"),
+        ],
+    )
+
+    def get_vehicle_event(vin: str, selection_set_list: List[str]) -> Dict[str, Any]:
+        return {
+            "info": {"fieldName": "getVehicle", "parentTypeName": "Query"},
+            "selectionSetList": selection_set_list,
+            "arguments": {"vin": vin},
+        }
+
+    response = handler(
+        [
+            get_vehicle_event("ABC123", ["speed", "speed/value"]),
+            get_vehicle_event("DEF456", ["isMoving", "isMoving/value"]),
+            get_vehicle_event("bad-vin;", ["speed", "speed/value"]),
+            get_vehicle_event("ABC123", ["isMoving", "isMoving/value"]),
+        ],
+        context,
+    )
+
+    assert mocked_execute_query.call_count == 2
+    query_string = mocked_execute_query.call_args_list[0].kwargs["query_string"]
+    assert '"speed" as "speed", "isMoving" as "isMoving"' in query_string
+    assert "IN ('ABC123', 'DEF456')" in query_string
+    assert 'FROM "test-glue-parquet-table"' in query_string
+    fallback_query_string = mocked_execute_query.call_args_list[1].kwargs[
+        "query_string"
+    ]
+    assert "vehicleidentification.vin = 'DEF456'" in fallback_query_string
+    assert 'FROM "test-glue-table"' in fallback_query_string
+    assert response == [
+        {"data": {"speed": {"value": 42}}},
+        {"data": {"speed": {"value": 7}}},
+        {
+            "errorMessage": "vin input contained invalid characters",
+            "errorType": "AthenaQueryError",
+        },
+        {"data": {"speed": {"value": 42}}},
+    ]
+
+
+def test_handler_get_vehicle_falls_back_to_json_table(
+    context: LambdaContext, mocker: MagicMock
+) -> None:
+    mocker.patch("requests.post")
+    mocker.patch.object(main, "get_table_version", return_value=None)
+    column_info = {"ColumnInfo": [{"Name": "speed", "Type": "integer"}]}
+    mocked_execute_query: MagicMock = mocker.patch.object(
+        main,
+        "execute_query",
+        side_effect=[
+            {
+                "ResultSet": {
+                    "Rows": [{"Data": [{"VarCharValue": "speed"}]}],
+                    "ResultSetMetadata": column_info,
+                }
+            },
+            {
+                "ResultSet": {
+                    "Rows": [
+                        {"Data": [{"VarCharValue": "speed"}]},
+                        {"Data": [{"VarCharValue": "7"}]},
+                    ],
+                    "ResultSetMetadata": column_info,
+                }
+            },
+        ],
+    )
+
+    response = handler(
+        {
+            "info": {"fieldName": "getVehicle", "parentTypeName": "Query"},
+            "selectionSetList": ["speed", "speed/value"],
+            "arguments": {"vin": "ABC123"},
+        },
+        context,
+    )
+
+    assert response == {"speed": {"value": 7}}
+    assert [
+        call.kwargs["query_string"] for call in mocked_execute_query.call_args_list
+    ] == [
+        'SELECT "speed" as "speed" FROM "test-glue-parquet-table" '
+        "WHERE \"vin\" = 'ABC123' LIMIT 1",
+        'SELECT "speed" as "speed" FROM "test-glue-table" '
+        "WHERE vehicleidentification.vin = 'ABC123' LIMIT 1",
+    ]
+
+
+@mock_aws
+def test_handler_reads_latest_state(context: LambdaContext, mocker: MagicMock) -> None:
+    boto3.resource("dynamodb").create_table(
+        TableName="test-latest-state-table",
+        KeySchema=[{"AttributeName": "vin", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "vin", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    ).put_item(
+        Item={
+            "vin": "ABC123",
+            "speed": {"value": Decimal("42.5"), "timestamp": 1000},
+            "vehicleidentification.vin": {"value": "ABC123", "timestamp": 1000},
+        }
+    )
+    mocker.patch("requests.post")
+    mocker.patch.object(main, "get_table_version", return_value=None)
+    mocked_execute_query: MagicMock = mocker.patch.object(
+        main,
+        "execute_query",
+        return_value={
+            "ResultSet": {
+                "Rows": [
+                    {"Data": [{"VarCharValue": "speed"}, {"VarCharValue": "batchKey"}]},
+                    {"Data": [{"VarCharValue": "7"}, {"VarCharValue": "DEF456"}]},
+                ],
+                "ResultSetMetadata": {
+                    "ColumnInfo": [
+                        {"Name": "speed", "Type": "double"},
+                        {"Name": "batchKey", "Type": "varchar"},
+                    ]
+                },
+            }
+        },
+    )
+    selection_set_list = [
+        "speed",
+        "speed/value",
+        "vehicleIdentification",
+        "vehicleIdentification/vin",
+        "vehicleIdentification/vin/value",
+    ]
+
+    def get_vehicle_event(vin: str) -> Dict[str, Any]:
+        return {
+            "info": {"fieldName": "getVehicle", "parentTypeName": "Query"},
+            "selectionSetList": selection_set_list,
+            "arguments": {"vin": vin},
+        }
+
+    with patch.dict(os.environ, {"LATEST_STATE_TABLE_NAME": "test-latest-state-table"}):
+        single_response = handler(get_vehicle_event("ABC123"), context)
+        mocked_execute_query.assert_not_called()
+
+        batch_response = handler(
+            [get_vehicle_event("ABC123"), get_vehicle_event("DEF456")], context
+        )
+
+    latest_state = {
+        "speed": {"value": 42.5},
+        "vehicleIdentification": {"vin": {"value": "ABC123"}},
+    }
+    assert single_response == latest_state
+    # Only the VIN missing from the latest state store is read from Athena
+    mocked_execute_query.assert_called_once()
+    assert "\"vin\" = 'DEF456'" in mocked_execute_query.call_args.kwargs["query_string"]
+    assert batch_response == [
+        {"data": latest_state},
+        {"data": {"speed": {"value": 7.0}}},
+    ]
+
+
+@mock_aws
+def test_start_or_join_query_execution(mocker: MagicMock) -> None:
+    mocker.patch.dict(os.environ, {"QUERY_LEASE_TABLE_NAME": "test-query-lease-table"})
+    boto3.client("dynamodb").create_table(
+        TableName="test-query-lease-table",
+        KeySchema=[{"AttributeName": "query_key", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "query_key", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    query_key = query_lease.get_query_key(
+        "SELECT 1", "test-glue-database", "test-athena-workgroup"
+    )
+    start_first_query = MagicMock(return_value="first-query-id")
+    start_second_query = MagicMock(return_value="second-query-id")
+
+    assert query_lease.start_or_join_query_execution(
+        query_key, start_first_query, 60
+    ) == ("first-query-id", True)
+    # An identical query joins the leased execution instead of starting
+    assert query_lease.start_or_join_query_execution(
+        query_key, start_second_query, 60
+    ) == ("first-query-id", False)
+    start_second_query.assert_not_called()
+
+    # Once the leased execution failed and is released the next caller starts
+    query_lease.release_query_lease(query_key, "first-query-id")
+    assert query_lease.start_or_join_query_execution(
+        query_key, start_second_query, 60
+    ) == ("second-query-id", True)
+
+
+@mock_aws
+def test_start_or_join_query_execution_takes_over_stale_lease(
+    mocker: MagicMock,
+) -> None:
+    mocker.patch.dict(os.environ, {"QUERY_LEASE_TABLE_NAME": "test-query-lease-table"})
+    dynamodb_client = boto3.client("dynamodb")
+    dynamodb_client.create_table(
+        TableName="test-query-lease-table",
+        KeySchema=[{"AttributeName": "query_key", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "query_key", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    # A caller leased the query and failed before starting it
+    dynamodb_client.put_item(
+        TableName="test-query-lease-table",
+        Item={
+            "query_key": {"S": "test-query-key"},
+            "owner": {"S": "failed-owner"},
+            "expires_at": {"N": str(int(time.time()) - 1)},
+        },
+    )
+
+    assert query_lease.start_or_join_query_execution(
+        "test-query-key", MagicMock(return_value="test-query-id"), 60
+    ) == ("test-query-id", True)
+    assert (
+        query_lease.get_leased_query_execution_id("test-query-key") == "test-query-id"
+    )
+
+
+@mock_aws
+def test_execute_query_releases_finished_query_lease(mocker: MagicMock) -> None:
+    mocker.patch.dict(os.environ, {"QUERY_LEASE_TABLE_NAME": "test-query-lease-table"})
+    boto3.client("dynamodb").create_table(
+        TableName="test-query-lease-table",
+        KeySchema=[{"AttributeName": "query_key", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "query_key", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    boto3.client("athena").create_work_group(
+        Name=os.environ["ATHENA_WORKGROUP"], Configuration={}
+    )
+    mocked_start_or_join = mocker.spy(main, "start_or_join_query_execution")
+    query_key = query_lease.get_query_key(
+        'select * from "test-table"',
+        "test-database-name",
+        os.environ["ATHENA_WORKGROUP"],
+    )
+
+    execute_query(
+        'select * from "test-table"',
+        {"Database": "test-database-name"},
+        os.environ["ATHENA_WORKGROUP"],
+        10,
+        result_reuse_max_age_in_minutes=5,
+    )
+    mocked_start_or_join.assert_called_once()
+    # Later callers start a new query instead of joining the finished one
+    assert query_lease.get_leased_query_execution_id(query_key) is None
+
+    # Queries that do not accept reused results never join another execution
+    execute_query(
+        'select * from "test-table"',
+        {"Database": "test-database-name"},
+        os.environ["ATHENA_WORKGROUP"],
+        10,
+        result_reuse_max_age_in_minutes=0,
+    )
+    mocked_start_or_join.assert_called_once()
+
+
+def test_get_poll_delay() -> None:
+    # Checks tighten around the expected completion, then back off
+    assert query_poller.get_poll_delay(0, 1.0) == 0.5
+    assert query_poller.get_poll_delay(0.5, 1.0) == 0.25
+    assert query_poller.get_poll_delay(1.0, 1.0) == (
+        query_poller.MIN_POLL_INTERVAL_IN_SECONDS
+    )
+    assert query_poller.get_poll_delay(3.0, 1.0) == 1.0
+    assert query_poller.get_poll_delay(60, 1.0) == (
+        query_poller.MAX_POLL_INTERVAL_IN_SECONDS
+    )
+
+
+def test_wait_for_query_execution_learns_execution_time(mocker: MagicMock) -> None:
+    mocker.patch.object(query_poller.time, "sleep")
+    mocker.patch.dict(query_poller.execution_times, clear=True)
+    mocker.patch.object(query_poller.QueryInvocation, "query_type", "getVehicle")
+    mocker.patch.object(query_poller.QueryInvocation, "deadline", None)
+    get_query_execution = MagicMock(
+        side_effect=[
+            {"Status": {"State": "RUNNING"}},
+            {
+                "Status": {"State": "SUCCEEDED"},
+                "Statistics": {"TotalExecutionTimeInMillis": 400},
+            },
+        ]
+    )
+
+    query_execution = query_poller.wait_for_query_execution(
+        "test-query-id", 10, get_query_execution
+    )
+    assert query_execution["Status"]["State"] == "SUCCEEDED"
+    assert query_poller.get_expected_execution_time("getVehicle") == 0.4
+    assert (
+        query_poller.get_expected_execution_time("listVehicles")
+        == query_poller.DEFAULT_EXPECTED_EXECUTION_TIME_IN_SECONDS
+    )
+
+
+def test_wait_for_query_execution_stops_query_at_deadline(mocker: MagicMock) -> None:
+    mocker.patch.object(query_poller.time, "sleep")
+    # Less time left in the invocation than the deadline margin
+    mocker.patch.object(
+        query_poller.QueryInvocation,
+        "deadline",
+        time.monotonic() + query_poller.DEADLINE_MARGIN_IN_SECONDS / 2,
+    )
+    get_query_execution = MagicMock(return_value={"Status": {"State": "RUNNING"}})
+    stop_query_execution = MagicMock()
+
+    query_execution = query_poller.wait_for_query_execution(
+        "test-query-id", 10, get_query_execution, stop_query_execution
+    )
+    assert query_execution["Status"]["State"] == "RUNNING"
+    get_query_execution.assert_called_once_with("test-query-id")
+    stop_query_execution.assert_called_once_with("test-query-id")
+
+
+def test_execute_query_fails_when_query_runs_out_of_time(mocker: MagicMock) -> None:
+    mocker.patch.object(
+        main,
+        "poll_query_execution",
+        return_value={
+            "QueryExecutionId": "test-query-id",
+            "Status": {"State": "RUNNING"},
+        },
+    )
+    mocker.patch.object(
+        main, "get_athena_client"
+    ).return_value.start_query_execution.return_value = {
+        "QueryExecutionId": "test-query-id"
+    }
+
+    with pytest.raises(AthenaQueryError):
+        execute_query(
+            'select * from "test-table"',
+            {"Database": "test-database-name"},
+            os.environ["ATHENA_WORKGROUP"],
+            10,
+        )
@@ -11,6 +11,7 @@ from ...handlers.athena_data_source.function.lib.athena_exceptions import (
 )
 from ...handlers.athena_data_source.function.lib.validators import (
     validate_query_selection_string,
+    validate_query_signal_path,
     validate_query_table_name,
     validate_query_vin_input,
 )
@@ -79,3 +80,21 @@ def test_validate_query_vin_input(vin_input: str, throws_error: bool) -> None:
             validate_query_vin_input(vin_input)
     else:
         validate_query_vin_input(vin_input)
+
+
+@pytest.mark.parametrize(
+    "signal_path, throws_error",
+    [
+        ("speed", False),
+        ("powertrain.tractionBattery.stateOfCharge.current", False),
+        ("powertrain..current", True),
+        ('speed" as "x', True),
+        ("speed\n", True),
+    ],
+)
+def test_validate_query_signal_path(signal_path: str, throws_error: bool) -> None:
+    if throws_error:
+        with pytest.raises(AthenaQueryError):
+            validate_query_signal_path(signal_path)
+    else:
+        validate_query_signal_path(signal_path)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import time
+
+from source.handlers.athena_data_source.function.lib.row_transformer import (
+    compile_row_transformer,
+    get_column_set,
+)
+from source.tests.handlers.fixtures.fixture_athena_data_source import (
+    SAMPLE_VALUES,
+    get_vss_leaf_columns,
+)
+
+
+def benchmark_row_transformer(row_count: int) -> None:
+    column_info = get_vss_leaf_columns()
+    row = [{"VarCharValue": SAMPLE_VALUES[column["Type"]]} for column in column_info]
+
+    compile_row_transformer.cache_clear()
+    start = time.perf_counter()
+    transform_row = compile_row_transformer(get_column_set(column_info))
+    compile_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(row_count):
+        transform_row(row)
+    row_duration = (time.perf_counter() - start) / row_count
+
+    print(
+        f"{len(column_info)} columns: compiled in {compile_duration * 1e3:.1f} ms, "
+        f"{row_duration * 1e6:.1f} us per row over {row_count} rows"
+    )
+
+
+if __name__ == "__main__":
+    benchmark_row_transformer(row_count=1000)
@@ -4,8 +4,7 @@
 
 # Standard Library
 import os
-from functools import lru_cache
-from typing import Any, Dict
+from typing import Any, Dict, cast
 
 # Third Party Libraries
 import requests
@@ -17,12 +16,11 @@ from aws_lambda_powertools.utilities.typing import LambdaContext
 # CMS Common Library
 from cms_common.auth.auth_configs import (
     AuthConfigError,
+    CMSAuthConfigs,
     CMSClientConfig,
     CMSIdPConfig,
-    get_idp_config,
-    get_user_client_config,
+    get_auth_configs,
 )
-from cms_common.cache.ttl_cache import get_ttl_cache_check
 
 # Connected Mobility Solution on AWS
 from .lib.custom_exceptions import AuthorizationCodeExchangeError
@@ -30,16 +28,15 @@ from .lib.custom_exceptions import AuthorizationCodeExchangeError
 tracer = Tracer()
 logger = Logger()
 
-MAX_CACHE_SIZE_CONFIG = 1
-
 # Usage:
 #   This function exchanged an authorization code for an access token via a user specified /token endpoint, as defined in OAuth standards. It requires
 #   a secret with IdP configurations necessary to complete the authorization code flow token exchange. This secret has an expected JSON structure.
 #   See cms_common.auth_config for the JSON data structures.
 #
 # Caching:
-#   The IdP config retrieved from Secrets Manager is cached with a max cache size of only 1. A TTL of 10 minutes is
-#   applied to this cache in case the IdP config secret or SSM parameter value changes without invalidating the cache.
+#   The IdP and user client configs are retrieved together in one batched SSM and Secrets Manager round trip and cached
+#   by cms_common. A TTL of 10 minutes is applied to this cache in case the config secrets or SSM parameter values
+#   change without invalidating the cache.
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
 def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
@@ -74,15 +71,12 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
             )
             raise e
 
-        client_config = get_cached_user_client_config(
-            user_agent_string=user_agent_string,
-            identity_provider_id=identity_provider_id,
-        )
-
-        idp_config = get_cached_idp_config(
+        auth_configs = get_cached_auth_configs(
             user_agent_string=user_agent_string,
             identity_provider_id=identity_provider_id,
         )
+        client_config = cast(CMSClientConfig, auth_configs.user_client_config)
+        idp_config = cast(CMSIdPConfig, auth_configs.idp_config)
 
         authorization_code_exchange_response["user_tokens"] = get_user_tokens(
             token_endpoint=idp_config.token_endpoint,
@@ -118,29 +112,16 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
 
 
 # ========= GETTERS =========
-@lru_cache(maxsize=MAX_CACHE_SIZE_CONFIG)
-@tracer.capture_method
-def get_cached_user_client_config(
-    user_agent_string: str,
-    identity_provider_id: str,
-    ttl_cache_check: int = get_ttl_cache_check(),
-) -> CMSClientConfig:
-    return get_user_client_config(
-        user_agent_string=user_agent_string,
-        identity_provider_id=identity_provider_id,
-    )
-
-
-@lru_cache(maxsize=MAX_CACHE_SIZE_CONFIG)
 @tracer.capture_method
-def get_cached_idp_config(
+def get_cached_auth_configs(
     user_agent_string: str,
     identity_provider_id: str,
-    ttl_cache_check: int = get_ttl_cache_check(),
-) -> CMSIdPConfig:
-    return get_idp_config(
+) -> CMSAuthConfigs:
+    return get_auth_configs(
         user_agent_string=user_agent_string,
         identity_provider_id=identity_provider_id,
+        include_idp_config=True,
+        include_user_client_config=True,
     )
 
 
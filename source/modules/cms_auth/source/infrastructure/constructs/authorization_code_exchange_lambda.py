@@ -70,14 +70,21 @@ class AuthorizationCodeExchangeLambdaConstruct(Construct):
                                     auth_setup_resource_names.idp_config_secret_arn_ssm_parameter
                                 ),
                             ],
-                        )
+                        ),
+                        # BatchGetSecretValue does not support resource level permissions, access to
+                        # each secret is still limited by the GetSecretValue statement above
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=["secretsmanager:BatchGetSecretValue"],
+                            resources=["*"],
+                        ),
                     ]
                 ),
                 "ssm": aws_iam.PolicyDocument(
                     statements=[
                         aws_iam.PolicyStatement(
                             effect=aws_iam.Effect.ALLOW,
-                            actions=["ssm:GetParameter"],
+                            actions=["ssm:GetParameters", "ssm:GetParameter"],
                             resources=[
                                 Stack.of(self).format_arn(
                                     service="ssm",
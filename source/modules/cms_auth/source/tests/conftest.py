@@ -26,7 +26,7 @@ from .handlers.fixtures.fixture_token_validation_lambda import (
     fixture_expired_access_token,
     fixture_incorrect_key_id_token,
     fixture_invalid_claims_access_token,
-    fixture_invalid_claims_access_token_kid,
+    fixture_invalid_claims_access_token_public_key,
     fixture_invalid_kid_id_token,
     fixture_invalid_scope_service_access_token,
     fixture_mock_jwk_construct,
@@ -51,7 +51,7 @@ from .handlers.fixtures.fixture_token_validation_lambda import (
     fixture_valid_access_token_claims,
     fixture_valid_id_token,
     fixture_valid_id_token_claims,
-    fixture_valid_id_token_kid,
+    fixture_valid_id_token_public_key,
     fixture_valid_service_access_token,
     fixture_valid_user_pool_jwks,
 )
@@ -5,7 +5,6 @@
 # Standard Library
 import json
 import os
-from functools import _lru_cache_wrapper
 from typing import Any, Dict, Generator, List
 from unittest.mock import patch
 
@@ -19,10 +18,14 @@ from responses import matchers
 import boto3
 
 # CMS Common Library
-from cms_common.auth.auth_configs import CMSClientConfig, CMSIdPConfig
+from cms_common.auth.auth_configs import (
+    CMSClientConfig,
+    CMSIdPConfig,
+    get_auth_configs,
+)
+from cms_common.cache.ttl_cache import TTLCache
 
 # Connected Mobility Solution on AWS
-from ....handlers.authorization_code_exchange_lambda.function import main
 from .fixture_shared_jwt_mocks import (
     TEST_ALTERNATE_AUD_KEY,
     TEST_AUTH_SETUP_RESOURCE_NAMES_CLASS,
@@ -55,8 +58,8 @@ EXPECTED_REQUEST_BODY = {
 # =============== AUTOUSE ===============
 @pytest.fixture(autouse=True)
 def fixture_authorization_code_exchange_clear_lru_caches() -> None:
-    cached_functions: List[_lru_cache_wrapper[Any]] = [
-        main.get_cached_user_client_config,
+    cached_functions: List[TTLCache[Any]] = [
+        get_auth_configs,
     ]
     for function in cached_functions:
         function.cache_clear()
@@ -20,9 +20,9 @@ import boto3
 
 # CMS Common Library
 from cms_common.auth.auth_configs import CMSIdPConfig
+from cms_common.auth.token_validation import clear_token_validation_caches
 
 # Connected Mobility Solution on AWS
-from ....handlers.token_validation_lambda.function import main
 from .fixture_shared_jwt_mocks import (
     EXPIRED_ACCESS_TOKEN_KID,
     INCORRECT_KEY_ID_TOKEN_KID,
@@ -73,7 +73,7 @@ def fixture_mock_jwk_construct() -> Generator[None, None, None]:
 # Always clear caches
 @pytest.fixture(autouse=True)
 def fixture_token_validation_clear_lru_caches() -> None:
-    main.clear_caches()
+    clear_token_validation_caches()
 
 
 # =============== JWKs ===============
@@ -132,14 +132,14 @@ def fixture_valid_user_pool_jwks() -> List[Dict[str, Any]]:
     return VALID_MOCKED_USER_POOL_JWKS["keys"]
 
 
-@pytest.fixture(name="valid_id_token_kid", scope="session")
-def fixture_valid_id_token_kid() -> Dict[str, Any]:
-    return {"kid": VALID_ID_TOKEN_KID}
+@pytest.fixture(name="valid_id_token_public_key", scope="session")
+def fixture_valid_id_token_public_key() -> Any:
+    return tokens_and_keys[VALID_ID_TOKEN_KID]["key"].public_key()
 
 
-@pytest.fixture(name="invalid_claims_access_token_kid", scope="session")
-def fixture_invalid_claims_access_token_kid() -> Dict[str, Any]:
-    return {"kid": INVALID_CLAIMS_ACCESS_TOKEN_KID}
+@pytest.fixture(name="invalid_claims_access_token_public_key", scope="session")
+def fixture_invalid_claims_access_token_public_key() -> Any:
+    return tokens_and_keys[INVALID_CLAIMS_ACCESS_TOKEN_KID]["key"].public_key()
 
 
 # =============== JWTs ===============
@@ -4,12 +4,15 @@
 
 # Standard Library
 from typing import Any, Dict, List
+from unittest.mock import patch
 
 # Third Party Libraries
 import pytest
+import responses
 
-# Connected Mobility Solution on AWS
-from ....handlers.token_validation_lambda.function.lib.custom_exceptions import (
+# CMS Common Library
+from cms_common.auth import token_validation
+from cms_common.auth.token_validation import (
     ExpirationError,
     IdPAudError,
     ScopeError,
@@ -17,21 +20,26 @@ from ....handlers.token_validation_lambda.function.lib.custom_exceptions import
     TokenClaimsError,
     TokenDecodeError,
     WellKnownJWKError,
-)
-from ....handlers.token_validation_lambda.function.main import (
+    build_jwks_index,
+    get_cached_idp_config,
     get_cached_issuer_jwks,
     get_cached_token_claims,
-    handler,
+    rejected_tokens,
+    verified_tokens,
     verify_alternate_aud,
     verify_claims,
     verify_expiration,
     verify_scope,
     verify_signing_kid,
 )
+
+# Connected Mobility Solution on AWS
+from ....handlers.token_validation_lambda.function.main import handler
 from ..fixtures.fixture_shared_jwt_mocks import (
     TEST_ALTERNATE_AUD_KEY,
     TEST_ISSUER,
     TEST_KNOWN_AUDS,
+    VALID_MOCKED_USER_POOL_JWKS,
 )
 
 
@@ -49,6 +57,7 @@ def test_handler_success_access_token(
     )
     assert response["validated"] is True
     assert response["message"] == "Token validation successful!"
+    assert "exp" in response["claims"]
 
 
 def test_handler_success_service_token(
@@ -202,6 +211,41 @@ def test_handler_scope_error(
     assert response["status_code"] == 401
 
 
+def test_handler_rejected_token_keeps_caches_warm(
+    mock_token_validation_idp_config_valid: None,
+    mock_token_validation_environment_valid: None,
+    mock_well_known_jwks_valid: None,
+    token_validation_event_valid_access_token: Dict[str, Any],
+    token_validation_event_expired_token: Dict[str, Any],
+    context: Dict[str, Any],
+) -> None:
+    assert handler(token_validation_event_valid_access_token, context)["validated"]
+    assert handler(token_validation_event_expired_token, context)["status_code"] == 401
+
+    assert get_cached_idp_config.cache_info().currsize == 1
+    assert get_cached_issuer_jwks.cache_info().currsize == 1
+    assert len(verified_tokens) == 1
+    assert len(rejected_tokens) == 1
+
+
+def test_handler_rejected_token_served_from_negative_cache(
+    mock_token_validation_idp_config_valid: None,
+    mock_token_validation_environment_valid: None,
+    token_validation_event_expired_token: Dict[str, Any],
+    context: Dict[str, Any],
+) -> None:
+    assert handler(token_validation_event_expired_token, context)["status_code"] == 401
+
+    with patch.object(
+        token_validation, "get_cached_token_claims"
+    ) as mock_get_cached_token_claims:
+        response = handler(token_validation_event_expired_token, context)
+
+    mock_get_cached_token_claims.assert_not_called()
+    assert response["validated"] is False
+    assert response["status_code"] == 401
+
+
 # =============== GET_CACHED_ISSUER_JWKS ===============
 def test_get_cached_issuer_jwks_key_error(
     mock_well_known_jwks_invalid_key_error: None,
@@ -241,53 +285,75 @@ def test_get_cached_token_claims_decode_error() -> None:
 
 # =============== VERIFY_SIGNING_KID ===============
 def test_verify_signing_kid_valid(
-    valid_access_token: str, valid_user_pool_jwks: List[Dict[str, Any]]
+    valid_access_token: str, mock_well_known_jwks_valid: None
 ) -> None:
-    verify_signing_kid(valid_access_token, valid_user_pool_jwks)
+    assert verify_signing_kid(valid_access_token, TEST_ISSUER) is not None
 
 
-def test_verify_signing_kid_jwt_error(
-    valid_user_pool_jwks: List[Dict[str, Any]]
-) -> None:
+def test_verify_signing_kid_jwt_error() -> None:
     with pytest.raises(
         SigningKidError, match=r"Validation Failure: token header could not be decoded."
     ):
-        verify_signing_kid("invalid token", valid_user_pool_jwks)
+        verify_signing_kid("invalid token", TEST_ISSUER)
 
 
-def test_verify_signing_kid_jwk_key_error(valid_access_token: str) -> None:
+def test_verify_signing_kid_invalid_signing_kid(
+    valid_access_token: str, mock_well_known_jwks_unknown_jwks: None
+) -> None:
     with pytest.raises(
         SigningKidError,
-        match=r"Validation Failure: returned well known JWKs do not all have a `kid` key.",
+        match=r"Validation Failure: key id for the token did not match a public key id for the issuer.",
     ):
-        user_pool_jwks_missing_kid_claim: List[Dict[str, Any]] = [
-            {"kid": "not_the_access_token_kid_1"},
-            {"invalid_key": "not_the_access_token_kid_2"},
-        ]
-        verify_signing_kid(valid_access_token, user_pool_jwks_missing_kid_claim)
+        verify_signing_kid(valid_access_token, TEST_ISSUER)
 
 
-def test_verify_signing_kid_invalid_signing_kid(valid_access_token: str) -> None:
-    with pytest.raises(
-        SigningKidError,
-        match=r"Validation Failure: key id for the token did not match a public key id for the issuer.",
-    ):
-        user_pool_jwks_missing_access_token_kid: List[Dict[str, Any]] = [
-            {"kid": "not_the_access_token_kid_1"},
-            {"kid": "not_the_access_token_kid_2"},
+def test_verify_signing_kid_refetches_rotated_jwks(
+    valid_access_token: str, invalid_kid_id_token: str
+) -> None:
+    with responses.RequestsMock() as mock:
+        mock.get(
+            url=f"{TEST_ISSUER}/.well-known/jwks.json",
+            json={"keys": [{"kid": "rotated-out-kid"}]},
+            status=200,
+        )
+        mock.get(
+            url=f"{TEST_ISSUER}/.well-known/jwks.json",
+            json=VALID_MOCKED_USER_POOL_JWKS,
+            status=200,
+        )
+
+        assert verify_signing_kid(valid_access_token, TEST_ISSUER) is not None
+        assert len(mock.calls) == 2
+
+        # Unknown kids do not trigger another fetch within the refetch interval
+        with pytest.raises(SigningKidError):
+            verify_signing_kid(invalid_kid_id_token, TEST_ISSUER)
+        assert len(mock.calls) == 2
+
+
+# =============== BUILD_JWKS_INDEX ===============
+def test_build_jwks_index_skips_unusable_jwks(
+    valid_user_pool_jwks: List[Dict[str, Any]]
+) -> None:
+    jwks_index = build_jwks_index(
+        [
+            *valid_user_pool_jwks,
+            {"invalid_key": "missing_kid"},
+            {"kid": "unparseable-kid"},
         ]
-        verify_signing_kid(valid_access_token, user_pool_jwks_missing_access_token_kid)
+    )
+    assert set(jwks_index) == {jwk["kid"] for jwk in valid_user_pool_jwks}
 
 
 # =============== VERIFY_CLAIMS ===============
 def test_verify_claims_valid(
     valid_id_token: str,
-    valid_id_token_kid: Dict[str, Any],
+    valid_id_token_public_key: Any,
     valid_id_token_claims: Dict[str, Any],
 ) -> None:
     verify_claims(
         valid_id_token,
-        valid_id_token_kid,
+        valid_id_token_public_key,
         valid_id_token_claims["iss"],
         valid_id_token_claims["aud"],
     )
@@ -295,7 +361,7 @@ def test_verify_claims_valid(
 
 def test_verify_claims_invalid_iss_error(
     valid_id_token: str,
-    valid_id_token_kid: Dict[str, Any],
+    valid_id_token_public_key: Any,
     valid_id_token_claims: Dict[str, Any],
 ) -> None:
     with pytest.raises(
@@ -304,7 +370,7 @@ def test_verify_claims_invalid_iss_error(
     ):
         verify_claims(
             valid_id_token,
-            valid_id_token_kid,
+            valid_id_token_public_key,
             "incorrect issuer",
             valid_id_token_claims["aud"],
         )
@@ -312,7 +378,7 @@ def test_verify_claims_invalid_iss_error(
 
 def test_verify_claims_invalid_aud_error(
     valid_id_token: str,
-    valid_id_token_kid: Dict[str, Any],
+    valid_id_token_public_key: Any,
     valid_id_token_claims: Dict[str, Any],
 ) -> None:
     with pytest.raises(
@@ -321,7 +387,7 @@ def test_verify_claims_invalid_aud_error(
     ):
         verify_claims(
             valid_id_token,
-            valid_id_token_kid,
+            valid_id_token_public_key,
             valid_id_token_claims["iss"],
             ["incorrect aud"],
         )
@@ -329,7 +395,7 @@ def test_verify_claims_invalid_aud_error(
 
 def test_verify_claims_incorrect_kid(
     valid_access_token: str,
-    valid_id_token_kid: Dict[str, Any],
+    valid_id_token_public_key: Any,
     valid_access_token_claims: Dict[str, Any],
 ) -> None:
     with pytest.raises(
@@ -339,22 +405,7 @@ def test_verify_claims_incorrect_kid(
         # Mismatch token and JWK to force error
         verify_claims(
             valid_access_token,
-            valid_id_token_kid,
-            valid_access_token_claims["iss"],
-            None,
-        )
-
-
-def test_verify_claims_invalid_key_error(
-    valid_access_token: str, valid_access_token_claims: Dict[str, Any]
-) -> None:
-    with pytest.raises(
-        TokenClaimsError,
-        match=r"Validation Failure: could not construct public key from token JWK.",
-    ):
-        verify_claims(
-            valid_access_token,
-            {"Invalid JWK Key": "Invalid JWK Value"},
+            valid_id_token_public_key,
             valid_access_token_claims["iss"],
             None,
         )
@@ -362,7 +413,7 @@ def test_verify_claims_invalid_key_error(
 
 def test_verify_claims_missing_claims_error(
     invalid_claims_access_token: str,
-    invalid_claims_access_token_kid: Dict[str, Any],
+    invalid_claims_access_token_public_key: Any,
     valid_access_token_claims: Dict[str, Any],
 ) -> None:
     with pytest.raises(
@@ -371,7 +422,7 @@ def test_verify_claims_missing_claims_error(
     ):
         verify_claims(
             invalid_claims_access_token,
-            invalid_claims_access_token_kid,
+            invalid_claims_access_token_public_key,
             valid_access_token_claims["iss"],
             None,
         )
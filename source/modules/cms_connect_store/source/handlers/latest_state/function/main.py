@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard Library
+import os
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple, cast
+
+# AWS Libraries
+from aws_lambda_powertools import Logger, Tracer
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from boto3.dynamodb.types import TypeSerializer
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
+
+if TYPE_CHECKING:
+    # Third Party Libraries
+    from mypy_boto3_dynamodb import DynamoDBClient
+else:
+    DynamoDBClient = object
+
+tracer = Tracer()
+logger = Logger()
+
+# Added to the vehicle payload by the IoT rule, epoch milliseconds
+RECEIVED_TIMESTAMP_FIELD = "cms_received_timestamp"
+
+VIN_SIGNAL = "vehicleidentification.vin"
+
+# Keeps the condition expression, one clause per signal, below the 4 KB
+# expression limit
+MAX_SIGNALS_PER_UPDATE = 50
+
+serializer = TypeSerializer()
+
+
+def get_dynamodb_client() -> DynamoDBClient:
+    return cast(DynamoDBClient, get_client("dynamodb"))
+
+
+prewarm_clients(["dynamodb"])
+
+
+@logger.inject_lambda_context
+@tracer.capture_lambda_handler
+def handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    payload = dict(event)
+    received_timestamp = int(payload.pop(RECEIVED_TIMESTAMP_FIELD))
+    signals = dict(flatten_signals(payload))
+
+    vin = signals.get(VIN_SIGNAL)
+    if not isinstance(vin, str) or not vin:
+        logger.warning("Vehicle data without a VIN, skipping latest state update.")
+        return
+
+    signal_items = list(signals.items())
+    for index in range(0, len(signal_items), MAX_SIGNALS_PER_UPDATE):
+        update_latest_state(
+            vin=vin,
+            signals=signal_items[index : index + MAX_SIGNALS_PER_UPDATE],
+            received_timestamp=received_timestamp,
+        )
+
+
+def flatten_signals(
+    payload: Dict[str, Any], prefix: Tuple[str, ...] = ()
+) -> Iterator[Tuple[str, Any]]:
+    # Signals are keyed by their lower case dot separated VSS path, the same
+    # path the Glue table exposes, for example vehicleidentification.vin
+    for key, value in payload.items():
+        path = (*prefix, key.lower())
+        if isinstance(value, dict):
+            yield from flatten_signals(value, path)
+        else:
+            yield ".".join(path), value
+
+
+def to_attribute_value(value: Any) -> Dict[str, Any]:
+    # DynamoDB numbers are decimals, floats are converted through their
+    # shortest repr so 0.1 is stored as 0.1
+    if isinstance(value, float):
+        return cast(Dict[str, Any], serializer.serialize(Decimal(repr(value))))
+    if isinstance(value, list):
+        return {"L": [to_attribute_value(item) for item in value]}
+    return cast(Dict[str, Any], serializer.serialize(value))
+
+
+@tracer.capture_method
+def update_latest_state(
+    vin: str, signals: List[Tuple[str, Any]], received_timestamp: int
+) -> None:
+    dynamodb_client = get_dynamodb_client()
+    while signals:
+        attribute_names = {"#timestamp": "timestamp"}
+        attribute_values: Dict[str, Any] = {
+            ":timestamp": {"N": str(received_timestamp)}
+        }
+        for index, (signal, value) in enumerate(signals):
+            attribute_names[f"#s{index}"] = signal
+            attribute_values[f":s{index}"] = {
+                "M": {
+                    "value": to_attribute_value(value),
+                    "timestamp": {"N": str(received_timestamp)},
+                }
+            }
+
+        try:
+            # Messages can arrive out of order, a signal is only overwritten by
+            # a message at least as new as the one it was stored from
+            dynamodb_client.update_item(
+                TableName=os.environ["LATEST_STATE_TABLE_NAME"],
+                Key={"vin": {"S": vin}},
+                UpdateExpression="SET "
+                + ", ".join(f"#s{index} = :s{index}" for index in range(len(signals))),
+                ConditionExpression=" AND ".join(
+                    f"(attribute_not_exists(#s{index}) OR #s{index}.#timestamp <= :timestamp)"
+                    for index in range(len(signals))
+                ),
+                ExpressionAttributeNames=attribute_names,
+                ExpressionAttributeValues=attribute_values,
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+            return
+        except dynamodb_client.exceptions.ConditionalCheckFailedException as err:
+            # Newer values of some signals are stored, the update is retried
+            # with the signals this message is still the newest for
+            stored_item = err.response.get("Item", {})
+            newest_signals = [
+                (signal, value)
+                for signal, value in signals
+                if signal not in stored_item
+                or int(stored_item[signal]["M"]["timestamp"]["N"]) <= received_timestamp
+            ]
+            if len(newest_signals) == len(signals):
+                # Nothing to drop means the retry would fail the same way
+                logger.warning(
+                    "Latest state update for a VIN failed its condition check without a newer stored signal, skipping.",
+                    extra={"vin": vin, "received_timestamp": received_timestamp},
+                )
+                return
+            signals = newest_signals
@@ -5,7 +5,7 @@
 # Standard Library
 import os
 from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, cast
 
 # Third Party Libraries
 import requests
@@ -18,12 +18,12 @@ from botocore.config import Config
 
 # CMS Common Library
 from cms_common.auth.auth_configs import (
+    CMSAuthConfigs,
     CMSClientConfig,
     CMSIdPConfig,
-    get_idp_config,
-    get_service_client_config,
+    get_auth_configs,
 )
-from cms_common.cache.ttl_cache import get_ttl_cache_check
+from cms_common.cache.ttl_cache import config_ttl_cache
 
 # Connected Mobility Solution on AWS
 from .lib.custom_exceptions import ClientAuthenticationError, VehicleTriggerAlarmError
@@ -50,7 +50,7 @@ def get_ssm_client() -> SSMClient:
     )
 
 
-@lru_cache(maxsize=MAX_CACHE_SIZE_SSM_PARAMETERS)
+@config_ttl_cache(maxsize=MAX_CACHE_SIZE_SSM_PARAMETERS)
 def get_ssm_parameter(ssm_name: str) -> str:
     return get_ssm_client().get_parameter(Name=ssm_name, WithDecryption=True,)[
         "Parameter"
@@ -60,16 +60,14 @@ def get_ssm_parameter(ssm_name: str) -> str:
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
 def handler(event: Dict[str, Any], context: LambdaContext) -> None:
-    idp_config = get_idp_config_from_common(
+    auth_configs = get_auth_configs_from_common(
         user_agent_string=os.environ["USER_AGENT_STRING"],
         identity_provider_id=os.environ["IDENTITY_PROVIDER_ID"],
     )
-
-    client_config = get_service_client_config_from_common(
-        user_agent_string=os.environ["USER_AGENT_STRING"],
-        identity_provider_id=os.environ["IDENTITY_PROVIDER_ID"],
+    access_token = get_access_token(
+        cast(CMSIdPConfig, auth_configs.idp_config),
+        cast(CMSClientConfig, auth_configs.service_client_config),
     )
-    access_token = get_access_token(idp_config, client_config)
 
     response = post_mutation(access_token=access_token, event=event)
 
@@ -84,29 +82,17 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> None:
     )
 
 
-@lru_cache(maxsize=MAX_CACHE_SIZE_CLIENT_AUTH)
-@tracer.capture_method
-def get_service_client_config_from_common(
-    user_agent_string: str,
-    identity_provider_id: str,
-    ttl_cache_check: int = get_ttl_cache_check(),  # Add a TTL to cache in case of SSM or Secrets Manager value changes.
-) -> CMSClientConfig:
-    return get_service_client_config(
-        user_agent_string=user_agent_string,
-        identity_provider_id=identity_provider_id,
-    )
-
-
-@lru_cache(maxsize=MAX_CACHE_SIZE_CLIENT_AUTH)
+# Both configs are fetched in one batched round trip and cached by cms_common
 @tracer.capture_method
-def get_idp_config_from_common(
+def get_auth_configs_from_common(
     user_agent_string: str,
     identity_provider_id: str,
-    ttl_cache_check: int = get_ttl_cache_check(),  # Add a TTL to cache in case of SSM or Secrets Manager value changes.
-) -> CMSIdPConfig:
-    return get_idp_config(
+) -> CMSAuthConfigs:
+    return get_auth_configs(
         user_agent_string=user_agent_string,
         identity_provider_id=identity_provider_id,
+        include_idp_config=True,
+        include_service_client_config=True,
     )
 
 
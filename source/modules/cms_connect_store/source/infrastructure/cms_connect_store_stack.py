@@ -27,6 +27,7 @@ from cms_common.constructs.vpc_construct import VpcConstruct
 from .constructs.alerts_construct import AlertsConstruct
 from .constructs.iot_core_to_s3_json import IoTCoreToS3JsonConstruct
 from .constructs.iot_core_to_s3_parquet import IoTCoreToS3ParquetConstruct
+from .constructs.latest_state_construct import LatestStateConstruct
 from .constructs.module_integration import ModuleInputsConstruct, ModuleOutputsConstruct
 from .constructs.s3_to_glue import S3ToGlueConstruct
 
@@ -91,6 +92,9 @@ class CmsConnectStoreConstruct(Construct):
     DEFAULT_GLUE_REGISTRY_NAME = "default-registry"  # This name is pre-specified by Glue, and allows the automatic creation of a registry
     IOT_CORE_DATA_QUERY = "SELECT * FROM 'cms/data/#'"
     IOT_CORE_NOTIFICATIONS_QUERY = "SELECT * from 'cms/notification/#'"
+    IOT_CORE_LATEST_STATE_QUERY = (
+        "SELECT *, timestamp() AS cms_received_timestamp FROM 'cms/data/#'"
+    )
 
     def __init__(
         self,
@@ -167,6 +171,16 @@ class CmsConnectStoreConstruct(Construct):
             vpc_construct=vpc_construct,
         )
 
+        latest_state = LatestStateConstruct(
+            self,
+            "latest-state-construct",
+            app_unique_id=module_inputs_construct.app_unique_id,
+            solution_config_inputs=solution_config_inputs,
+            dependency_layer=dependency_layer_construct.dependency_layer,
+            latest_state_iot_core_query=self.IOT_CORE_LATEST_STATE_QUERY,
+            vpc_construct=vpc_construct,
+        )
+
         ModuleOutputsConstruct(
             self,
             "module-outputs-construct",
@@ -175,6 +189,7 @@ class CmsConnectStoreConstruct(Construct):
             glue_resources=s3_to_glue.glue_resources,
             root_s3_bucket=root_s3.bucket,
             glue_catalog_name=self.DEFAULT_GLUE_CATALOG_NAME,
+            latest_state=latest_state,
         )
 
     def load_vss_schema(self) -> Dict[str, Any]:
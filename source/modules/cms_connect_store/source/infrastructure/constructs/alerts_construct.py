@@ -83,7 +83,14 @@ class AlertsConstruct(Construct):
                                     auth_setup_resource_names.idp_config_secret_arn_ssm_parameter
                                 ),
                             ],
-                        )
+                        ),
+                        # BatchGetSecretValue does not support resource level permissions, access to
+                        # each secret is still limited by the GetSecretValue statement above
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=["secretsmanager:BatchGetSecretValue"],
+                            resources=["*"],
+                        ),
                     ]
                 ),
                 "ssm-policy": aws_iam.PolicyDocument(
@@ -21,7 +21,7 @@ from cms_common.config.stack_inputs import SolutionConfigInputs
 
 # Connected Mobility Solution on AWS
 from .log_group import LogGroupConstruct
-from .s3_to_glue import GlueResources
+from .s3_to_glue import PARQUET_PREFIX, GlueResources
 
 
 class IoTCoreToS3ParquetConstruct(Construct):
@@ -238,7 +238,11 @@ class IoTCoreToS3ParquetConstruct(Construct):
                         ),
                     ],
                 ),
-                prefix="Parquet/!{partitionKeyFromQuery:vin}/!{timestamp:DDD}_!{timestamp:yyyy}/!{timestamp:HH}",
+                # Must stay in line with the partition projection of the Parquet
+                # Glue table. The trailing slash keeps the hour a folder rather
+                # than a prefix of the object names.
+                prefix=PARQUET_PREFIX
+                + "/!{partitionKeyFromQuery:vin}/!{timestamp:DDD}_!{timestamp:yyyy}/!{timestamp:HH}/",
                 error_output_prefix="DataError/",
             ),
         )
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# AWS Libraries
+from aws_cdk import (
+    Duration,
+    Stack,
+    aws_dynamodb,
+    aws_ec2,
+    aws_iam,
+    aws_iot,
+    aws_kms,
+    aws_lambda,
+    aws_logs,
+)
+from constructs import Construct
+
+# CMS Common Library
+from cms_common.config.resource_names import ResourceName, ResourcePrefix
+from cms_common.config.stack_inputs import SolutionConfigInputs
+from cms_common.constructs.vpc_construct import VpcConstruct
+from cms_common.policy_generators.cloudwatch import (
+    generate_lambda_cloudwatch_logs_policy_document,
+)
+from cms_common.policy_generators.ec2_vpc import generate_ec2_vpc_policy
+
+
+class LatestStateConstruct(Construct):
+    """
+    Per VIN projection of the most recent value and timestamp of every signal.
+
+    Each vehicle message is applied to the item of its VIN as it is ingested,
+    so the current state of a vehicle is a single item read regardless of how
+    much history is kept in S3.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        app_unique_id: str,
+        solution_config_inputs: SolutionConfigInputs,
+        dependency_layer: aws_lambda.LayerVersion,
+        latest_state_iot_core_query: str,
+        vpc_construct: VpcConstruct,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.latest_state_table_key = aws_kms.Key(
+            self,
+            "latest-state-table-key",
+            enable_key_rotation=True,
+        )
+
+        self.latest_state_table = aws_dynamodb.Table(
+            self,
+            "latest-state-table",
+            partition_key=aws_dynamodb.Attribute(
+                name="vin",
+                type=aws_dynamodb.AttributeType.STRING,
+            ),
+            billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+            encryption=aws_dynamodb.TableEncryption.CUSTOMER_MANAGED,
+            encryption_key=self.latest_state_table_key,
+            point_in_time_recovery=True,
+        )
+
+        latest_state_lambda_name = ResourceName.hyphen_separated(
+            prefix=ResourcePrefix.hyphen_separated(
+                app_unique_id=app_unique_id,
+                module_name=solution_config_inputs.module_short_name,
+            ),
+            name="latest-state",
+        )
+
+        latest_state_lambda_role = aws_iam.Role(
+            self,
+            "lambda-role",
+            assumed_by=aws_iam.ServicePrincipal("lambda.amazonaws.com"),  # NOSONAR
+            path="/",
+            inline_policies={
+                "cloudwatch-logs-policy": generate_lambda_cloudwatch_logs_policy_document(
+                    self, lambda_function_name=latest_state_lambda_name
+                ),
+                "dynamodb-policy": aws_iam.PolicyDocument(
+                    statements=[
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=["dynamodb:UpdateItem"],
+                            resources=[self.latest_state_table.table_arn],
+                        ),
+                    ]
+                ),
+                "kms-policy": aws_iam.PolicyDocument(
+                    statements=[
+                        aws_iam.PolicyStatement(
+                            effect=aws_iam.Effect.ALLOW,
+                            actions=["kms:Decrypt", "kms:GenerateDataKey"],
+                            resources=[self.latest_state_table_key.key_arn],
+                        ),
+                    ]
+                ),
+                "ec2-vpc-policy": generate_ec2_vpc_policy(
+                    self,
+                    vpc_construct=vpc_construct,
+                    subnet_selection=vpc_construct.private_subnet_selection,
+                    authorized_service="lambda.amazonaws.com",
+                ),
+            },
+        )
+
+        latest_state_lambda_function = aws_lambda.Function(
+            self,
+            "lambda-function",
+            function_name=latest_state_lambda_name,
+            code=aws_lambda.Code.from_asset("deployment/dist/lambda/latest_state.zip"),
+            description="Vehicle Latest State Function",
+            handler="function.main.handler",
+            runtime=aws_lambda.Runtime.PYTHON_3_12,
+            role=latest_state_lambda_role,
+            layers=[dependency_layer],
+            timeout=Duration.seconds(30),
+            environment={
+                "USER_AGENT_STRING": solution_config_inputs.get_user_agent_string(),
+                "LATEST_STATE_TABLE_NAME": self.latest_state_table.table_name,
+            },
+            vpc=vpc_construct.vpc,
+            vpc_subnets=vpc_construct.private_subnet_selection,
+            security_groups=[
+                aws_ec2.SecurityGroup(
+                    self,
+                    "security-group",
+                    vpc=vpc_construct.vpc,
+                    allow_all_outbound=True,  # NOSONAR
+                )
+            ],
+            log_retention=aws_logs.RetentionDays.THREE_MONTHS,
+        )
+
+        latest_state_lambda_function.add_permission(
+            id="iot-invoke-latest-state-permission",
+            principal=aws_iam.ServicePrincipal("iot.amazonaws.com"),  # NOSONAR
+            action="lambda:InvokeFunction",
+            source_account=Stack.of(self).account,
+        )
+
+        aws_iot.CfnTopicRule(
+            self,
+            "iot-send-to-latest-state-lambda",
+            rule_name=ResourceName.underscore_separated(
+                prefix=ResourcePrefix.only_underscore_separated(
+                    app_unique_id=app_unique_id,
+                    module_name=solution_config_inputs.module_short_name,
+                ),
+                name="iot_send_to_latest_state_lambda",
+            ),
+            topic_rule_payload=aws_iot.CfnTopicRule.TopicRulePayloadProperty(
+                sql=latest_state_iot_core_query,
+                description="Send vss data to latest_state lambda",
+                actions=[
+                    aws_iot.CfnTopicRule.ActionProperty(
+                        lambda_=aws_iot.CfnTopicRule.LambdaActionProperty(
+                            function_arn=latest_state_lambda_function.function_arn,
+                        )
+                    ),
+                ],
+            ),
+        )
@@ -19,6 +19,7 @@ from cms_common.constructs.vpc_construct import create_vpc_config, get_vpc_name
 from cms_common.resource_names.module_short_names import CMSModuleShortNames
 
 # Connected Mobility Solution on AWS
+from .latest_state_construct import LatestStateConstruct
 from .s3_to_glue import GlueResources
 
 
@@ -60,6 +61,7 @@ class ModuleOutputsConstruct(Construct):
         glue_catalog_name: str,
         glue_resources: GlueResources,
         root_s3_bucket: aws_s3.Bucket,
+        latest_state: LatestStateConstruct,
     ) -> None:
         super().__init__(scope, construct_id)
 
@@ -103,6 +105,17 @@ class ModuleOutputsConstruct(Construct):
             string_value=glue_resources.glue_table.table_input.name,  # type: ignore [union-attr, arg-type]
             simple_name=False,
         )
+        aws_ssm.StringParameter(
+            self,
+            "ssm-telemetry-glue-parquet-table",
+            description="The partition projected Glue table over the Parquet telemetry data.",
+            parameter_name=ResourceName.slash_separated(
+                prefix=ssm_parameter_name_prefix_with_leading_slash,
+                name="glue-parquet-table/name",
+            ),
+            string_value=glue_resources.parquet_glue_table.table_input.name,  # type: ignore [union-attr, arg-type]
+            simple_name=False,
+        )
         aws_ssm.StringParameter(
             self,
             "ssm-glue-schema-arn",
@@ -158,3 +171,36 @@ class ModuleOutputsConstruct(Construct):
             string_value=root_s3_bucket.bucket_arn,
             simple_name=False,
         )
+        aws_ssm.StringParameter(
+            self,
+            "ssm-latest-state-table-name",
+            description="The DynamoDB table holding the latest state of every vehicle.",
+            parameter_name=ResourceName.slash_separated(
+                prefix=ssm_parameter_name_prefix_with_leading_slash,
+                name="latest-state-table/name",
+            ),
+            string_value=latest_state.latest_state_table.table_name,
+            simple_name=False,
+        )
+        aws_ssm.StringParameter(
+            self,
+            "ssm-latest-state-table-arn",
+            description="The ARN of the DynamoDB table holding the latest state of every vehicle.",
+            parameter_name=ResourceName.slash_separated(
+                prefix=ssm_parameter_name_prefix_with_leading_slash,
+                name="latest-state-table/arn",
+            ),
+            string_value=latest_state.latest_state_table.table_arn,
+            simple_name=False,
+        )
+        aws_ssm.StringParameter(
+            self,
+            "ssm-latest-state-table-key-arn",
+            description="The ARN of the KMS key encrypting the latest state table.",
+            parameter_name=ResourceName.slash_separated(
+                prefix=ssm_parameter_name_prefix_with_leading_slash,
+                name="latest-state-table-key/arn",
+            ),
+            string_value=latest_state.latest_state_table_key.key_arn,
+            simple_name=False,
+        )
@@ -18,11 +18,17 @@ from constructs import Construct
 from cms_common.config.resource_names import ResourceName, ResourcePrefix
 from cms_common.config.stack_inputs import SolutionConfigInputs
 
+# Prefix the Parquet Firehose stream writes to, one folder per VIN, day of the
+# year and hour of arrival
+PARQUET_PREFIX = "Parquet"
+PARQUET_PARTITION_KEYS = ["vin", "day", "hour"]
+
 
 @dataclass_validate
 @dataclass
 class GlueResources:
     glue_table: aws_glue.CfnTable
+    parquet_glue_table: aws_glue.CfnTable
     glue_schema: aws_glue.CfnSchema
     glue_database: aws_glue.CfnDatabase
 
@@ -108,8 +114,63 @@ class S3ToGlueConstruct(Construct):
         cfn_table.add_dependency(cfn_schema)
         cfn_table.add_dependency(cfn_database)
 
+        # Create partition projected table over the Parquet output. Partitions
+        # are computed from the query predicates instead of being registered,
+        # so queries on a VIN and time range only read the matching prefixes.
+        parquet_location = f"s3://{root_s3_bucket.bucket_name}/{PARQUET_PREFIX}"
+        cfn_parquet_table = aws_glue.CfnTable(
+            self,
+            "iot-parquet-glue-table",
+            catalog_id=Stack.of(self).account,
+            database_name=cfn_database.database_input.name,  # type: ignore [union-attr, arg-type]
+            table_input=aws_glue.CfnTable.TableInputProperty(
+                description="Partition projected Parquet telemetry table",
+                name="iot-parquet-glue-table",
+                table_type="EXTERNAL_TABLE",
+                partition_keys=[
+                    aws_glue.CfnTable.ColumnProperty(name=partition_key, type="string")
+                    for partition_key in PARQUET_PARTITION_KEYS
+                ],
+                parameters={
+                    "classification": "parquet",
+                    "projection.enabled": "true",
+                    # VINs can not be enumerated, queries must name them
+                    "projection.vin.type": "injected",
+                    # Firehose !{timestamp:DDD}_!{timestamp:yyyy}, in UTC
+                    "projection.day.type": "date",
+                    "projection.day.format": "DDD_yyyy",
+                    "projection.day.range": "NOW-5YEARS,NOW",
+                    "projection.day.interval": "1",
+                    "projection.day.interval.unit": "DAYS",
+                    # Firehose !{timestamp:HH}
+                    "projection.hour.type": "integer",
+                    "projection.hour.range": "0,23",
+                    "projection.hour.digits": "2",
+                    "storage.location.template": f"{parquet_location}/${{vin}}/${{day}}/${{hour}}",
+                },
+                storage_descriptor=aws_glue.CfnTable.StorageDescriptorProperty(
+                    location=f"{parquet_location}/",
+                    input_format="org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+                    output_format="org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+                    serde_info=aws_glue.CfnTable.SerdeInfoProperty(
+                        serialization_library="org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+                    ),
+                    schema_reference=aws_glue.CfnTable.SchemaReferenceProperty(
+                        schema_id=aws_glue.CfnTable.SchemaIdProperty(
+                            registry_name=cfn_schema.registry.name,  # type: ignore [union-attr]
+                            schema_name=cfn_schema.name,
+                        ),
+                        schema_version_number=1,
+                    ),
+                ),
+            ),
+        )
+        cfn_parquet_table.add_dependency(cfn_schema)
+        cfn_parquet_table.add_dependency(cfn_database)
+
         self.glue_resources = GlueResources(
             glue_table=cfn_table,
+            parquet_glue_table=cfn_parquet_table,
             glue_schema=cfn_schema,
             glue_database=cfn_database,
         )
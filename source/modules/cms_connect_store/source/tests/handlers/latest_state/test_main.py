@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+
+# Standard Library
+import os
+from typing import Any, Dict, Generator
+from unittest.mock import patch
+
+# Third Party Libraries
+import pytest
+from moto import mock_aws
+
+# AWS Libraries
+import boto3
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+# Connected Mobility Solution on AWS
+from ....handlers.latest_state.function import main
+from ....handlers.latest_state.function.main import flatten_signals, handler
+
+LATEST_STATE_TABLE_NAME = "test-latest-state-table"
+
+
+@pytest.fixture(name="latest_state_table")
+def fixture_latest_state_table() -> Generator[Any, None, None]:
+    with mock_aws(), patch.dict(
+        os.environ, {"LATEST_STATE_TABLE_NAME": LATEST_STATE_TABLE_NAME}
+    ):
+        yield boto3.resource("dynamodb").create_table(
+            TableName=LATEST_STATE_TABLE_NAME,
+            KeySchema=[{"AttributeName": "vin", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "vin", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+def get_vehicle_event(received_timestamp: int, **signals: Any) -> Dict[str, Any]:
+    return {
+        "vehicleIdentification": {"vin": "TESTVIN123"},
+        **signals,
+        "cms_received_timestamp": received_timestamp,
+    }
+
+
+def test_flatten_signals() -> None:
+    assert dict(
+        flatten_signals(
+            {"Speed": 1.5, "currentLocation": {"latitude": 1, "heading": None}}
+        )
+    ) == {
+        "speed": 1.5,
+        "currentlocation.latitude": 1,
+        "currentlocation.heading": None,
+    }
+
+
+def test_latest_state_handler_keeps_newest_signals(
+    latest_state_table: Any, context: LambdaContext
+) -> None:
+    handler(get_vehicle_event(2000, speed=10.5, isMoving=True), context)
+    # Older message arriving late only fills signals that were never seen
+    handler(get_vehicle_event(1000, speed=5.0, traveledDistance=100), context)
+
+    item = latest_state_table.get_item(Key={"vin": "TESTVIN123"})["Item"]
+    assert item["speed"] == {"value": 10.5, "timestamp": 2000}
+    assert item["ismoving"] == {"value": True, "timestamp": 2000}
+    assert item["traveleddistance"] == {"value": 100, "timestamp": 1000}
+    assert item["vehicleidentification.vin"]["value"] == "TESTVIN123"
+
+    handler(get_vehicle_event(3000, speed=20), context)
+    item = latest_state_table.get_item(Key={"vin": "TESTVIN123"})["Item"]
+    assert item["speed"] == {"value": 20, "timestamp": 3000}
+    assert item["ismoving"] == {"value": True, "timestamp": 2000}
+
+
+def test_latest_state_handler_keeps_newest_value_per_signal(
+    latest_state_table: Any, context: LambdaContext
+) -> None:
+    handler(get_vehicle_event(1000, speed=5.0, isMoving=False), context)
+    handler(get_vehicle_event(3000, speed=20), context)
+    # Older than the stored speed, newer than the stored isMoving
+    handler(get_vehicle_event(2000, speed=10.5, isMoving=True), context)
+
+    item = latest_state_table.get_item(Key={"vin": "TESTVIN123"})["Item"]
+    assert item["speed"] == {"value": 20, "timestamp": 3000}
+    assert item["ismoving"] == {"value": True, "timestamp": 2000}
+    assert item["vehicleidentification.vin"]["timestamp"] == 3000
+
+
+def test_latest_state_handler_skips_data_without_vin(
+    latest_state_table: Any, context: LambdaContext
+) -> None:
+    handler({"speed": 10, "cms_received_timestamp": 1000}, context)
+
+    assert latest_state_table.scan()["Count"] == 0
+
+
+def test_latest_state_handler_stops_when_no_signal_is_newer(
+    latest_state_table: Any, context: LambdaContext
+) -> None:
+    dynamodb_client = boto3.client("dynamodb")
+    condition_failure = dynamodb_client.exceptions.ConditionalCheckFailedException(
+        {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+    )
+    with patch.object(main, "get_dynamodb_client", return_value=dynamodb_client):
+        with patch.object(
+            dynamodb_client, "update_item", side_effect=condition_failure
+        ) as mock_update_item:
+            handler(get_vehicle_event(1000, speed=5.0), context)
+
+    mock_update_item.assert_called_once()
@@ -5,17 +5,17 @@
 # Standard Library
 import csv
 import os
-from functools import lru_cache
 from io import StringIO
-from typing import TYPE_CHECKING, Annotated, Any, Dict, List
+from typing import TYPE_CHECKING, Annotated, Any, Dict, List, cast
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.event_handler import BedrockAgentResolver
 from aws_lambda_powertools.event_handler.openapi.params import Body, Query
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
 
 if TYPE_CHECKING:
     # Third Party Libraries
@@ -28,11 +28,11 @@ logger = Logger()
 app = BedrockAgentResolver()
 
 
-@lru_cache(maxsize=1)
 def get_s3_client() -> S3Client:
-    return boto3.client(
-        "s3", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+    return cast(S3Client, get_client("s3"))
+
+
+prewarm_clients(["s3"])
 
 
 def get_csv_object_from_s3(bucket_name: str, object_key: str) -> List[List[Any]]:
@@ -6,14 +6,14 @@
 import json
 import os
 from datetime import datetime, timezone
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Callable, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, cast
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
 
 if TYPE_CHECKING:
     # Third Party Libraries
@@ -27,20 +27,15 @@ tracer = Tracer()
 logger = Logger()
 
 
-@lru_cache(maxsize=1)
 def get_sagemaker_runtime_client() -> SageMakerRuntimeClient:
-    return boto3.client(
-        "sagemaker-runtime",
-        config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"]),
-    )
+    return cast(SageMakerRuntimeClient, get_client("sagemaker-runtime"))
 
 
-@lru_cache(maxsize=1)
 def get_sagemaker_client() -> SageMakerClient:
-    return boto3.client(
-        "sagemaker",
-        config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"]),
-    )
+    return cast(SageMakerClient, get_client("sagemaker"))
+
+
+prewarm_clients(["sagemaker-runtime", "sagemaker"])
 
 
 @logger.inject_lambda_context
@@ -11,14 +11,13 @@ from unittest.mock import patch
 # Third Party Libraries
 import pytest
 
-# Connected Mobility Solution on AWS
-from ..main import get_sagemaker_client, get_sagemaker_runtime_client
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import clear_clients
 
 
 @pytest.fixture(name="predict_api_setup")
 def fixture_predict_api_setup() -> Any:
-    get_sagemaker_client.cache_clear()
-    get_sagemaker_runtime_client.cache_clear()
+    clear_clients()
 
 
 @pytest.fixture(name="predict_api_env_vars")
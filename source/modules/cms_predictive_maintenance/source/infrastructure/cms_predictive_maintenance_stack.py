@@ -244,6 +244,7 @@ class CmsPredictiveMaintenanceConstruct(Construct):
             solution_config_inputs=solution_config_inputs,
             dependency_layer=lambda_dependencies_construct.dependency_layer,
             token_validation_lambda_arn=module_inputs_construct.token_validation.lambda_arn,
+            identity_provider_id=module_inputs_construct.identity_provider_id,
             vpc_construct=vpc_construct,
         )
 
@@ -16,6 +16,7 @@ from cms_common.config.ssm import resolve_ssm_parameter
 from cms_common.config.stack_inputs import SolutionConfigInputs
 from cms_common.constructs.app_unique_id import AppUniqueId
 from cms_common.constructs.encrypted_s3 import EncryptedS3Construct
+from cms_common.constructs.identity_provider_config import IdentityProviderConfig
 from cms_common.constructs.vpc_construct import create_vpc_config, get_vpc_name
 from cms_common.resource_names.auth import AuthResourceNames
 
@@ -40,6 +41,10 @@ class ModuleInputsConstruct(Construct):
 
         self.app_unique_id = AppUniqueId.create_cfn_parameter(Stack.of(self))
 
+        self.identity_provider_id = IdentityProviderConfig.get_identity_provider_id(
+            scope=self, app_unique_id=self.app_unique_id
+        )
+
         self.vpc_config = create_vpc_config(
             vpc_name=get_vpc_name(scope=self, app_unique_id=self.app_unique_id)
         )
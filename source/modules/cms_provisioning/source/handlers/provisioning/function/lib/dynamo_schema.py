@@ -62,6 +62,19 @@ def from_ddb_item(cls: Type[DynamoDBItem], ddb_item: Dict[str, Any]) -> DynamoDB
     return cattrs.structure(dataclass_as_dict, cls)
 
 
+def from_dyn_item(cls: Type[DynamoDBItem], item: Mapping[str, Any]) -> DynamoDBItem:
+    # Items returned by the DynamoDB resource layer are already deserialized
+    missing_fields = [
+        data_field.name for data_field in fields(cls) if data_field.name not in item
+    ]
+    if missing_fields:
+        raise TypeError(f"Item is missing required fields: {missing_fields}")
+
+    return cattrs.structure(
+        {data_field.name: item[data_field.name] for data_field in fields(cls)}, cls
+    )
+
+
 def to_ddb_item(obj: DynamoDBItem) -> Mapping[str, Any]:
     serializer = TypeSerializer()
 
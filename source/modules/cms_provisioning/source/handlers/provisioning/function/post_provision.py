@@ -4,22 +4,24 @@
 
 # Standard Library
 import os
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, cast
 
 # Third Party Libraries
 from dataclass_type_validator import TypeValidationError  # type: ignore
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
+from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
+from cms_common.boto3_wrappers.dynamo_crud import DynHelpers
+
 # Connected Mobility Solution on AWS
 from .lib.certificate_status_enum import CertificateStatus
-from .lib.dynamo_schema import ProvisionedVehicle, from_ddb_item
+from .lib.dynamo_schema import ProvisionedVehicle, from_dyn_item
 from .lib.dynamo_table_name_key_enum import DynamoTableNameKey
 
 if TYPE_CHECKING:
@@ -35,18 +37,15 @@ tracer = Tracer()
 logger = Logger()
 
 
-@lru_cache(maxsize=128)
 def get_dynamodb_client() -> DynamoDBClient:
-    return boto3.client(
-        "dynamodb", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+    return cast(DynamoDBClient, get_client("dynamodb"))
 
 
-@lru_cache(maxsize=128)
 def get_iot_client() -> IoTClient:
-    return boto3.client(
-        "iot", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+    return cast(IoTClient, get_client("iot"))
+
+
+prewarm_clients(["dynamodb", "iot"])
 
 
 # This lambda is triggered by an IoT Rule listening to THING events (create, update, delete)
@@ -185,17 +184,16 @@ def delete_old_certificates(vin: str, certificate_id: str, thing_name: str) -> N
 
 
 def get_provisioned_vehicle_records(vin: str) -> list[ProvisionedVehicle]:
-    provisioned_vehicles_ddb_items = get_dynamodb_client().query(
-        TableName=os.environ[DynamoTableNameKey.PROVISIONED_VEHICLES_TABLE_NAME.value],
-        KeyConditionExpression="vin = :vin",
-        ExpressionAttributeValues={":vin": {"S": f"{vin}"}},
-    )["Items"]
+    provisioned_vehicles_items = DynHelpers.dyn_query_items(
+        table_name=os.environ[DynamoTableNameKey.PROVISIONED_VEHICLES_TABLE_NAME.value],
+        key_condition_expression=Key("vin").eq(vin),
+    )
     provisioned_vehicles_list = list(  # pylint: disable=unnecessary-lambda
         map(
-            lambda provisioned_vehicle_ddb_item: from_ddb_item(
-                ProvisionedVehicle, provisioned_vehicle_ddb_item
+            lambda provisioned_vehicle_item: from_dyn_item(
+                ProvisionedVehicle, provisioned_vehicle_item
             ),
-            provisioned_vehicles_ddb_items,
+            provisioned_vehicles_items,
         )
     )
     return provisioned_vehicles_list
@@ -4,25 +4,28 @@
 
 # Standard Library
 import os
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional, cast
 
 # Third Party Libraries
 from dataclass_type_validator import TypeValidationError  # type: ignore
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
+from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
+from cms_common.boto3_wrappers.dynamo_crud import DynHelpers
+
 # Connected Mobility Solution on AWS
 from .lib.certificate_status_enum import CertificateStatus
 from .lib.dynamo_schema import (
     AuthorizedVehicle,
     ProvisionedVehicle,
     from_ddb_item,
+    from_dyn_item,
     to_ddb_item,
 )
 from .lib.dynamo_table_name_key_enum import DynamoTableNameKey
@@ -41,18 +44,15 @@ tracer = Tracer()
 logger = Logger()
 
 
-@lru_cache(maxsize=128)
 def get_dynamodb_client() -> DynamoDBClient:
-    return boto3.client(
-        "dynamodb", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+    return cast(DynamoDBClient, get_client("dynamodb"))
 
 
-@lru_cache(maxsize=128)
 def get_iot_client() -> IoTClient:
-    return boto3.client(
-        "iot", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+    return cast(IoTClient, get_client("iot"))
+
+
+prewarm_clients(["dynamodb", "iot"])
 
 
 @logger.inject_lambda_context
@@ -96,16 +96,15 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
 @tracer.capture_method
 def deactivate_existing_certificates(vin: str, certificate_id: str) -> None:
     try:
-        provisioned_vehicles_ddb_items = get_dynamodb_client().query(
-            TableName=os.environ[
+        provisioned_vehicles_items = DynHelpers.dyn_query_items(
+            table_name=os.environ[
                 DynamoTableNameKey.PROVISIONED_VEHICLES_TABLE_NAME.value
             ],
-            KeyConditionExpression="vin = :vin",
-            ExpressionAttributeValues={":vin": {"S": f"{vin}"}},
-        )["Items"]
-        for provisioned_vehicles_ddb_item in provisioned_vehicles_ddb_items:
-            provisioned_vehicle = from_ddb_item(
-                ProvisionedVehicle, provisioned_vehicles_ddb_item
+            key_condition_expression=Key("vin").eq(vin),
+        )
+        for provisioned_vehicles_item in provisioned_vehicles_items:
+            provisioned_vehicle = from_dyn_item(
+                ProvisionedVehicle, provisioned_vehicles_item
             )
             if (
                 provisioned_vehicle.certificate_status
@@ -5,16 +5,14 @@
 # Standard Library
 import json
 import os
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, cast
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
 
 # CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
 from cms_common.enums.rotate_secret import RotateSecretStep, SecretStatus
 
 # Connected Mobility Solution on AWS
@@ -32,19 +30,15 @@ tracer = Tracer()
 logger = Logger()
 
 
-@lru_cache(maxsize=128)
 def get_secrets_manager_client() -> SecretsManagerClient:
-    return boto3.client(
-        "secretsmanager",
-        config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"]),
-    )
+    return cast(SecretsManagerClient, get_client("secretsmanager"))
 
 
-@lru_cache(maxsize=128)
 def get_iot_client() -> IoTClient:
-    return boto3.client(
-        "iot", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
+    return cast(IoTClient, get_client("iot"))
+
+
+prewarm_clients(["secretsmanager", "iot"])
 
 
 # Based on the lambda function template from
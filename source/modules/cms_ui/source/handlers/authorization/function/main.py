@@ -3,35 +3,21 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard Library
-import json
 import os
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Dict
+from typing import Any, Dict
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
-if TYPE_CHECKING:
-    # Third Party Libraries
-    from mypy_boto3_lambda import LambdaClient
-else:
-    LambdaClient = object
+# CMS Common Library
+from cms_common.auth.token_validation import validate_token_from_environment
 
 tracer = Tracer()
 logger = Logger()
 
 
-@lru_cache(maxsize=1)
-def get_lambda_client() -> LambdaClient:
-    return boto3.client(
-        "lambda", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
-
-
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
 def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
@@ -40,21 +26,13 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     try:
         token = event["headers"]["Authorization"]
 
-        # Call token validation lambda
-        token_validation_response = get_lambda_client().invoke(
-            FunctionName=os.environ["TOKEN_VALIDATION_LAMBDA_ARN"],
-            InvocationType="RequestResponse",
-            Payload=json.dumps(
-                {"Token": token, "SpecifiedAud": os.environ["AUTHORIZATION_AUD"]}
-            ),
-        )
-
-        token_validation_response_payload = json.loads(
-            token_validation_response["Payload"].read().decode("utf-8")
+        # Validated in-process, or by the token validation lambda in remote mode
+        token_validation_result = validate_token_from_environment(
+            token, specified_aud=os.environ["AUTHORIZATION_AUD"]
         )
 
-        is_authorized = token_validation_response_payload["validated"]
-        logger.info(token_validation_response_payload["message"])
+        is_authorized = token_validation_result.validated
+        logger.info(token_validation_result.message)
 
     except (ValueError, ClientError, KeyError):
         logger.error("Error validating token", exc_info=True)
@@ -145,6 +145,7 @@ class CmsUiConstruct(Construct):
             solution_config_inputs=solution_config_inputs,
             dependency_layer=dependency_layer_construct.dependency_layer,
             token_validation_lambda_arn=module_inputs_construct.token_validation.lambda_arn,
+            identity_provider_id=module_inputs_construct.identity_provider_id,
             vpc_construct=vpc_construct,
             cognito_app_client=cognito_app_client_construct,
         )
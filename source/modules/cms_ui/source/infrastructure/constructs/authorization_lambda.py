@@ -10,6 +10,7 @@ from constructs import Construct
 from cms_common.config.resource_names import ResourceName, ResourcePrefix
 from cms_common.config.stack_inputs import SolutionConfigInputs
 from cms_common.constructs.vpc_construct import VpcConstruct
+from cms_common.policy_generators.auth import generate_idp_config_read_policy_document
 from cms_common.policy_generators.cloudwatch import (
     generate_lambda_cloudwatch_logs_policy_document,
 )
@@ -28,6 +29,7 @@ class AuthorizationLambdaConstruct(Construct):
         solution_config_inputs: SolutionConfigInputs,
         dependency_layer: aws_lambda.LayerVersion,
         token_validation_lambda_arn: str,
+        identity_provider_id: str,
         vpc_construct: VpcConstruct,
         cognito_app_client: CognitoAppClientConstruct,
     ) -> None:
@@ -50,6 +52,10 @@ class AuthorizationLambdaConstruct(Construct):
                 "cloudwatch-policy": generate_lambda_cloudwatch_logs_policy_document(
                     self, lambda_function_name=authorization_lambda_function_name
                 ),
+                # Tokens are validated in-process, the token validation lambda is the fallback
+                "idp-config-policy": generate_idp_config_read_policy_document(
+                    self, identity_provider_id=identity_provider_id
+                ),
                 "lambda-policy": aws_iam.PolicyDocument(
                     statements=[
                         aws_iam.PolicyStatement(
@@ -95,6 +101,8 @@ class AuthorizationLambdaConstruct(Construct):
             environment={
                 "USER_AGENT_STRING": solution_config_inputs.get_user_agent_string(),
                 "TOKEN_VALIDATION_LAMBDA_ARN": token_validation_lambda_arn,
+                "IDENTITY_PROVIDER_ID": identity_provider_id,
+                "TOKEN_VALIDATION_MODE": "in-process",
                 "AUTHORIZATION_AUD": cognito_app_client.cms_ui_client_id,
             },
             log_retention=aws_logs.RetentionDays.THREE_MONTHS,
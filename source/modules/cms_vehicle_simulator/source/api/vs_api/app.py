@@ -238,6 +238,7 @@ def get_simulations() -> Response:
                 FilterExpression="stage = :stage",
                 ExpressionAttributeValues={":stage": "running"},
                 ProjectionExpression="devices",
+                total_segments=DynHelpers.DEFAULT_SCAN_SEGMENTS,
             )
             logger.info("stat data", extra={"stat_data": stat_data})
 
@@ -323,12 +324,17 @@ def get_simulation_by_id(simulation_id: str) -> Response:
         os.environ["DYN_SIMULATIONS_TABLE"], {"sim_id": simulation_id}
     )
 
-    for device in simulation["devices"]:
-        device.update(
-            DynHelpers.get_item(
-                os.environ["DYN_DEVICE_TYPES_TABLE"], {"type_id": device["type_id"]}
-            )
-        )
+    lambda_context = getattr(app, "lambda_context", None)
+    device_types = DynHelpers.dyn_batch_get_items(
+        os.environ["DYN_DEVICE_TYPES_TABLE"],
+        [{"type_id": device["type_id"]} for device in simulation["devices"]],
+        lambda_context.get_remaining_time_in_millis if lambda_context else None,
+    )
+    for device, device_type in zip(simulation["devices"], device_types):
+        if device_type is None:
+            logger.error("Device type %s not found.", device["type_id"])
+            raise KeyError(device["type_id"])
+        device.update(device_type)
 
     return success_response(body=simulation)
 
@@ -8,11 +8,12 @@ import os
 from typing import Any, Dict
 
 # AWS Libraries
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from boto3.dynamodb.types import TypeDeserializer
-from botocore.config import Config
+
+# CMS Common Library
+from cms_common.boto3_wrappers.client_pool import get_client, prewarm_clients
 
 # Connected Mobility Solution on AWS
 from .provision import DeviceProvisioner
@@ -22,6 +23,13 @@ tracer = Tracer()
 logger = Logger()
 
 
+def get_iot_data_client() -> Any:
+    return get_client("iot-data")
+
+
+prewarm_clients(["iot-data"])
+
+
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
 def provision_handler(event: Dict[str, Any], context: LambdaContext) -> None:
@@ -77,10 +85,7 @@ def data_sim_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str,
                 field, counter=options["counter"]
             )
 
-    iot_endpoint = boto3.client(
-        "iot-data", config=Config(user_agent_extra=os.environ["USER_AGENT_STRING"])
-    )
-    iot_endpoint.publish(
+    get_iot_data_client().publish(
         topic=f"{os.environ.get('TOPIC_PREFIX', 'cms/data/simulated')}/{event['info']['name']['S']}-{event['index']}",  # default topic prefix for tests
         payload=json.dumps(data),
         qos=0,
@@ -204,14 +204,22 @@ def test_create_simulation(
 
 def test_get_simulation_by_id(mocker: mock.MagicMock) -> None:
     mocked_response = {"devices": [{"type_id": "test", "test": "test"}]}
-    mocked_dyn_scan: mock.MagicMock = mocker.patch.object(
+    mocked_get_item: mock.MagicMock = mocker.patch.object(
         DynHelpers,
         "get_item",
         return_value=mocked_response,
     )
+    mocked_batch_get: mock.MagicMock = mocker.patch.object(
+        DynHelpers,
+        "dyn_batch_get_items",
+        return_value=[{"type_id": "test", "name": "test-type"}],
+    )
     response = app.get_simulation_by_id("test")
-    assert response.body == mocked_response
-    mocked_dyn_scan.assert_called()
+    assert response.body == {
+        "devices": [{"type_id": "test", "test": "test", "name": "test-type"}]
+    }
+    mocked_get_item.assert_called_once()
+    mocked_batch_get.assert_called_once()
 
 
 def test_get_simulations(mocker: mock.MagicMock) -> None: